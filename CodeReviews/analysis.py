@@ -1,152 +1,268 @@
-import pandas as pd
-import numpy as np
-from openpyxl import load_workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
+import argparse
 import shutil
 import os
+import sqlite3
+
+import dedupe
+import profiling
+from check_catalogue import load_catalogue
+from parse_cache import ParseCache
+from profiling import stage
+from review_rows import review_rows
 
 # Tên file Excel của bạn
 EXCEL_FILE_SOURCE = 'CodeReviews.xlsx'
 EXCEL_FILE_DEST = 'Code_Review_Report_Horizontal.xlsx' # Đổi tên file output
 OUTPUT_SHEET_NAME = 'Summary_Report'
+CODES_MAPPING_FILE = 'codes_mapping.txt' # Danh mục Check code (dùng chung với export_reviews.py)
+EXCEL_FILE_SUMMARY = 'Code_Review_Summary.xlsx' # Output của chế độ standalone
+
+# Import module này không làm gì cả: toàn bộ xử lý nằm trong main(),
+# được gọi khi chạy script hoặc qua `acript analyze` (main.py).
+# pandas / openpyxl (qua review_stats.py, summary_writer.py) chỉ được import
+# trong các hàm cần đến, để `acript analyze --help` khởi động ngay.
+
+
+def build_parser():
+    # Chế độ ghi kết quả:
+    #  - splice:     sao chép package .xlsx và chèn sheet Summary như một part mới
+    #                (không load / ghi lại các sheet khác) - mặc định
+    #  - standalone: chỉ ghi sheet Summary vào một file mới (write-only)
+    #  - load:       cách cũ, copy + load_workbook toàn bộ file rồi ghi từng ô
+    parser = argparse.ArgumentParser(description='Thống kê lỗi code review theo chiều ngang.')
+    parser.add_argument('--output-mode', choices=['splice', 'standalone', 'load'], default='splice')
+    parser.add_argument('--output', help='File output (mặc định tùy theo chế độ)')
+    parser.add_argument('--dedupe', action='store_true', help='Gộp các lỗi gần trùng lặp trong cùng sheet (dedupe.py) trước khi thống kê')
+    parser.add_argument('--dedupe-threshold', type=float, default=dedupe.THRESHOLD, help='Độ tương đồng tối thiểu (Jaccard, 0-1) của hai lỗi trùng lặp')
+    parser.add_argument('--clusters', type=int, default=5, metavar='K', help='Số cụm khi phân cụm File theo tập Check code (Bảng 9)')
+    parser.add_argument('--from-db', metavar='DB', help='Đọc dữ liệu từ database của `acript db ingest` (review_db.py) thay cho file Excel (chế độ splice vẫn cần file Excel nguồn)')
+    parser.add_argument('--db-workbook', metavar='LABEL', help='Workbook trong database --from-db (mặc định: workbook được ingest gần nhất)')
+    parser.add_argument('--profile', action='store_true', help='In thời gian và bộ nhớ đỉnh của từng bước')
+    parser.add_argument('--profile-trace', metavar='FILE', help='Ghi thêm trace dạng Chrome trace-event JSON (bao gồm --profile)')
+    return parser
+
+
+def compute_blocks(dedupe_threshold=None, clusters=5, store=None):
+    """
+    Đọc file nguồn và tính các bảng thống kê: [(tiêu đề, DataFrame)], hoặc None nếu lỗi.
+    Nếu có dedupe_threshold, các lỗi gần trùng lặp được gộp vào lỗi đầu tiên.
+    Nếu có store (review_db.ReviewStore), dữ liệu được đọc từ database thay cho file Excel.
+    """
+    import pandas as pd
+    from review_stats import (agreement_matrix, aggregate_findings, code_cooccurrence, coverage_curve,
+                              coverage_matrix, file_clusters, findings_frame, never_hit_codes,
+                              reviewer_bitsets, reviewer_contributions, reviewer_overlaps,
+                              section_coverage, section_rollup)
+
+    # 1. Đọc tất cả các sheet (qua parse cache dùng chung với export_reviews.py,
+    #    chỉ các sheet đã thay đổi mới được đọc lại từ file Excel)
+    source = store.db_path if store else EXCEL_FILE_SOURCE
+    try:
+        with stage('read workbook'):
+            all_sheets = (store or ParseCache()).load(EXCEL_FILE_SOURCE)
+    except FileNotFoundError:
+        print(f"Lỗi: Không tìm thấy file nguồn '{source}'.")
+        return None
+    except (LookupError, RuntimeError, sqlite3.Error) as e:
+        # Sheet không tồn tại, database hỏng hoặc khác phiên bản schema
+        print(f"Lỗi: {e}")
+        return None
+
+    # Lọc sheet báo cáo (tên bắt đầu bằng 'Ass1'), lấy các dòng sau tiêu đề 'Check code'
+    report_sheets = {
+        sheet.name: sheet.report[1]
+        for sheet in all_sheets
+        if sheet.name.startswith('Ass1') and sheet.report and sheet.report[1] is not None
+    }
+
+    # Mỗi dòng lỗi được đọc một lần thành ReviewRow (review_rows.py, dùng chung với export_reviews.py)
+    with stage('review rows'):
+        report_rows = {name: review_rows(rows) for name, rows in report_sheets.items()}
+
+    # Gộp các lỗi mà nhiều reviewer ghi lại cho cùng một chỗ với cách diễn đạt
+    # khác nhau (cùng sheet, cùng Check code, dòng gần nhau, nội dung gần giống)
+    if dedupe_threshold is not None:
+        with stage('dedupe'):
+            deduper = dedupe.Deduper(dedupe_threshold)
+            merged = 0
+            for name, rows in report_rows.items():
+                groups = deduper.groups(dedupe.sheet_findings(name, rows))
+                merged += sum(len(g.duplicates) for g in groups)
+                report_rows[name] = dedupe.apply_duplicates(rows, groups, 'merge')
+        print(f"Đã gộp {merged} lỗi gần trùng lặp.")
+
+    # Lấy Check List: danh mục đã biên dịch từ codes_mapping.txt (cache trong .parse_cache/)
+    try:
+        with stage('load catalogue'):
+            catalogue = load_catalogue(CODES_MAPPING_FILE)
+    except FileNotFoundError:
+        print(f"Lỗi: Không tìm thấy file '{CODES_MAPPING_FILE}'.")
+        return None
+
+    # 2 & 3. Tính toán các bảng thống kê trong một lượt (vector hóa), trên một
+    #        DataFrame dài chứa (Sheet, Check Code, Reviewer) của tất cả các sheet
+    with stage('findings frame'):
+        findings = findings_frame(report_rows)
+    with stage('aggregate'):
+        df_top_errors, df_file_stats, df_reviewer_stats = aggregate_findings(findings, report_sheets.keys(), catalogue.descriptions)
+    # Tổng hợp theo nhóm (Section I, II, III...) của danh mục
+    with stage('section rollup'):
+        df_section_stats = section_rollup(findings, catalogue)
+
+    # Ma trận boolean Check code x File (dựng một lần từ các cặp (code, sheet)),
+    # từ đó tính độ phủ theo nhóm, các cặp code hay đi cùng nhau, các code chưa
+    # từng xuất hiện và phân cụm File - đều bằng phép toán ma trận
+    with stage('coverage matrix'):
+        codes, hits = coverage_matrix(findings, len(report_sheets), catalogue)
+    with stage('coverage stats'):
+        df_coverage = section_coverage(codes, hits, catalogue)
+        df_pairs = code_cooccurrence(codes, hits)
+        df_never_hit = never_hit_codes(codes, hits, catalogue)
+    with stage('file clusters'):
+        df_clusters = file_clusters(codes, hits, report_sheets.keys(), k=clusters)
+
+    # Mức độ trùng khớp giữa các Reviewer: mỗi Reviewer là một bitset trên tập
+    # các lỗi (sheet, code, dòng) chung, các phép giao / hợp / đếm bit chạy trên
+    # cả hàng cùng lúc
+    with stage('reviewer bitsets'):
+        reviewers, bits = reviewer_bitsets(findings)
+    with stage('reviewer agreement'):
+        if reviewers:
+            sizes, both = reviewer_overlaps(bits)
+            df_agreement = agreement_matrix(reviewers, sizes, both)
+            df_contributions = reviewer_contributions(reviewers, bits, sizes, both)
+            df_curve = coverage_curve(reviewers, bits)
+        else:
+            df_agreement = df_contributions = df_curve = pd.DataFrame()
+
+    return [
+        ('Bảng 1: Top Lỗi (Theo số lượng File bị ảnh hưởng)', df_top_errors),
+        ('Bảng 2: Số lỗi DUY NHẤT theo File', df_file_stats),
+        ('Bảng 3 & 4: Thống kê theo Reviewer (Lỗi duy nhất trong mỗi File)', df_reviewer_stats),
+        ('Bảng 5: Tổng hợp theo nhóm Check code (Section)', df_section_stats),
+        ('Bảng 6: Độ phủ Check code theo nhóm (Section)', df_coverage),
+        ('Bảng 7: Các cặp Check code thường cùng xuất hiện trong một File', df_pairs),
+        ('Bảng 8: Check code chưa từng được ghi nhận', df_never_hit),
+        ('Bảng 9: Phân cụm File theo tập Check code', df_clusters),
+        ('Bảng 10: Độ trùng khớp giữa các Reviewer (Jaccard trên các lỗi sheet/code/dòng)', df_agreement),
+        ('Bảng 11: Lỗi chỉ một Reviewer phát hiện', df_contributions),
+        ('Bảng 12: Độ phủ của nhóm khi thêm dần từng Reviewer', df_curve),
+    ]
+
+
+def write_with_openpyxl(blocks, dest_file):
+    """Chế độ load: Sao chép và Ghi kết quả vào file Excel MỚI (cách cũ)."""
+    from openpyxl import load_workbook
+    from openpyxl.utils.dataframe import dataframe_to_rows
+
+    if not os.path.exists(EXCEL_FILE_SOURCE):
+        print("Lỗi: Không tìm thấy file nguồn để sao chép.")
+        return False
+
+    try:
+        with stage('copy workbook'):
+            shutil.copyfile(EXCEL_FILE_SOURCE, dest_file)
+    except Exception as e:
+        print(f"Lỗi khi sao chép file: {e}")
+        return False
 
-# ... (Phần 1, 2, 3: Đọc và tính toán dữ liệu không đổi - Giả sử bạn đã dán toàn bộ logic này) ...
-
-# 1. Đọc tất cả các sheet
-try:
-    all_sheets = pd.read_excel(EXCEL_FILE_SOURCE, sheet_name=None, header=None, engine='openpyxl')
-except FileNotFoundError:
-    print(f"Lỗi: Không tìm thấy file nguồn '{EXCEL_FILE_SOURCE}'.")
-    exit()
-
-# Lọc sheet báo cáo (tên bắt đầu bằng 'Ass1')
-report_sheets = {name: df for name, df in all_sheets.items() if name.startswith('Ass1')}
-
-# Lấy Check List
-try:
-    check_list_df = all_sheets['Check list'].iloc[0:, 0:2].dropna(subset=[0]).rename(columns={0: 'Check Code', 1: 'Description'})
-    check_list = check_list_df[pd.to_numeric(check_list_df['Check Code'], errors='coerce').notna()].copy()
-    check_list['Check Code'] = check_list['Check Code'].astype('Int64') 
-    check_list = check_list.set_index('Check Code')['Description'].to_dict()
-except KeyError:
-    print("Lỗi: Không tìm thấy sheet 'Check list'.")
-    exit()
-
-# Khởi tạo các danh sách tổng hợp
-file_errors = []
-top_errors_map = {}
-reviewer_stats = {}
-
-# 2. Xử lý từng file báo cáo (sheet)
-for file_name, df_full in report_sheets.items():
+    # Mở file mới bằng Openpyxl
     try:
-        df_report = df_full.iloc[11:].iloc[:, [0, 5]].dropna(subset=[0, 5]) 
-        df_report.columns = ['Check Code', 'Reviewer']
-    except IndexError:
-        continue
-
-    df_report['Reviewer'] = df_report['Reviewer'].astype(str).str.strip()
-    df_report['Check Code'] = pd.to_numeric(df_report['Check Code'], errors='coerce').astype('Int64')
-    df_report = df_report.dropna(subset=['Check Code', 'Reviewer'])
-    
-    if df_report.empty:
-        continue
-
-    unique_codes = df_report['Check Code'].unique()
-    file_errors.append({'File/Sheet Name': file_name, 'Unique Errors Count': len(unique_codes)})
-    for code in unique_codes:
-        code_int = int(code)
-        top_errors_map[code_int] = top_errors_map.get(code_int, 0) + 1
-        
-    df_unique_per_reviewer_per_file = df_report.groupby(['Reviewer', 'Check Code']).size().reset_index(name='Count')
-    file_reviewers = df_report['Reviewer'].unique()
-
-    for index, row in df_unique_per_reviewer_per_file.iterrows():
-        reviewer = row['Reviewer']
-        if reviewer not in reviewer_stats:
-            reviewer_stats[reviewer] = {'Unique Files Reviewed': 0, 'Total Unique Errors Reported (Per File)': 0}
-        reviewer_stats[reviewer]['Total Unique Errors Reported (Per File)'] += 1
-        
-    for reviewer in file_reviewers:
-        if reviewer not in reviewer_stats:
-            reviewer_stats[reviewer] = {'Unique Files Reviewed': 0, 'Total Unique Errors Reported (Per File)': 0}
-        reviewer_stats[reviewer]['Unique Files Reviewed'] += 1
-
-# 3. Tạo DataFrames cho các bảng thống kê cuối cùng
-df_file_stats = pd.DataFrame(file_errors)
-df_top_errors = pd.DataFrame(list(top_errors_map.items()), columns=['Check Code', 'Total Files Affected'])
-df_top_errors.insert(1, 'Description', df_top_errors['Check Code'].map(check_list).fillna('Description Missing'))
-df_top_errors = df_top_errors.sort_values(by='Total Files Affected', ascending=False)
-df_reviewer_stats = pd.DataFrame.from_dict(reviewer_stats, orient='index').reset_index().rename(columns={'index': 'Reviewer'})
-df_reviewer_stats = df_reviewer_stats.sort_values(by='Total Unique Errors Reported (Per File)', ascending=False)
-
-
-# 4. Sao chép và Ghi kết quả vào file Excel MỚI (CHỈNH SỬA LỚN Ở ĐÂY)
-if not os.path.exists(EXCEL_FILE_SOURCE):
-    print("Lỗi: Không tìm thấy file nguồn để sao chép.")
-    exit()
-
-try:
-    shutil.copyfile(EXCEL_FILE_SOURCE, EXCEL_FILE_DEST)
-except Exception as e:
-    print(f"Lỗi khi sao chép file: {e}")
-    exit()
-
-# Mở file mới bằng Openpyxl
-try:
-    wb = load_workbook(EXCEL_FILE_DEST)
-    
-    # Xóa sheet Summary cũ nếu tồn tại
-    if OUTPUT_SHEET_NAME in wb.sheetnames:
-        del wb[OUTPUT_SHEET_NAME]
-    
-    # Tạo sheet Summary mới và đặt ở vị trí đầu tiên
-    ws = wb.create_sheet(OUTPUT_SHEET_NAME, 0) 
-
-    # Khởi tạo vị trí bắt đầu (Hàng 1, Cột 1)
-    START_ROW = 1 
-    current_col_idx = 1 
-    
-    # Hàm ghi tiêu đề
-    def write_title(title, sheet, row_idx, col_idx):
-        sheet.cell(row=row_idx, column=col_idx, value=title)
-        return row_idx # Trả về hàng không đổi
-
-    # Hàm ghi DataFrame
-    def write_dataframe(df, sheet, row_idx, col_idx):
-        # Ghi headers (tiêu đề cột của DataFrame)
-        for c_idx, col_name in enumerate(df.columns):
-            sheet.cell(row=row_idx, column=col_idx + c_idx, value=col_name)
-            
-        # Ghi dữ liệu
-        for r_idx, row in enumerate(dataframe_to_rows(df, header=False, index=False)):
-            for c_idx, value in enumerate(row):
-                 sheet.cell(row=row_idx + r_idx + 1, column=col_idx + c_idx, value=value)
-                 
-        # Trả về cột tiếp theo sau khi ghi (+1 cột trống để tách bảng)
-        return col_idx + len(df.columns) + 1 
-
-    
-    # --- 1. Top Lỗi ---
-    if not df_top_errors.empty:
-        write_title('Bảng 1: Top Lỗi (Theo số lượng File bị ảnh hưởng)', ws, START_ROW, current_col_idx)
-        current_col_idx = write_dataframe(df_top_errors, ws, START_ROW + 1, current_col_idx) # +1 hàng cho tiêu đề bảng
-    
-    # --- 2. Số lỗi theo File ---
-    if not df_file_stats.empty:
-        write_title('Bảng 2: Số lỗi DUY NHẤT theo File', ws, START_ROW, current_col_idx)
-        current_col_idx = write_dataframe(df_file_stats, ws, START_ROW + 1, current_col_idx)
-        
-    # --- 3 & 4. Thống kê theo Reviewer ---
-    if not df_reviewer_stats.empty:
-        write_title('Bảng 3 & 4: Thống kê theo Reviewer (Lỗi duy nhất trong mỗi File)', ws, START_ROW, current_col_idx)
-        current_col_idx = write_dataframe(df_reviewer_stats, ws, START_ROW + 1, current_col_idx)
-
-    # Lưu file
-    wb.save(EXCEL_FILE_DEST)
-
-except Exception as e:
-    print(f"Lỗi khi ghi dữ liệu bằng Openpyxl: {e}")
-    
-print(f"\n✅ Đã hoàn thành. File '{EXCEL_FILE_DEST}' đã được tạo.")
-print(f"Các bảng thống kê được sắp xếp theo **chiều ngang** trên Sheet '{OUTPUT_SHEET_NAME}'.")
\ No newline at end of file
+        with stage('load workbook'):
+            wb = load_workbook(dest_file)
+
+        # Xóa sheet Summary cũ nếu tồn tại
+        if OUTPUT_SHEET_NAME in wb.sheetnames:
+            del wb[OUTPUT_SHEET_NAME]
+
+        # Tạo sheet Summary mới và đặt ở vị trí đầu tiên
+        ws = wb.create_sheet(OUTPUT_SHEET_NAME, 0)
+
+        # Khởi tạo vị trí bắt đầu (Hàng 1, Cột 1)
+        START_ROW = 1
+        current_col_idx = 1
+
+        # Hàm ghi tiêu đề
+        def write_title(title, sheet, row_idx, col_idx):
+            sheet.cell(row=row_idx, column=col_idx, value=title)
+            return row_idx # Trả về hàng không đổi
+
+        # Hàm ghi DataFrame
+        def write_dataframe(df, sheet, row_idx, col_idx):
+            # Ghi headers (tiêu đề cột của DataFrame)
+            for c_idx, col_name in enumerate(df.columns):
+                sheet.cell(row=row_idx, column=col_idx + c_idx, value=col_name)
+
+            # Ghi dữ liệu
+            for r_idx, row in enumerate(dataframe_to_rows(df, header=False, index=False)):
+                for c_idx, value in enumerate(row):
+                    sheet.cell(row=row_idx + r_idx + 1, column=col_idx + c_idx, value=value)
+
+            # Trả về cột tiếp theo sau khi ghi (+1 cột trống để tách bảng)
+            return col_idx + len(df.columns) + 1
+
+        # --- 1. Top Lỗi, 2. Số lỗi theo File, 3 & 4. Thống kê theo Reviewer,
+        #     5. Tổng hợp theo Section ---
+        for title, df in blocks:
+            if not df.empty:
+                write_title(title, ws, START_ROW, current_col_idx)
+                current_col_idx = write_dataframe(df, ws, START_ROW + 1, current_col_idx) # +1 hàng cho tiêu đề bảng
+
+        # Lưu file
+        with stage('save workbook'):
+            wb.save(dest_file)
+
+    except Exception as e:
+        print(f"Lỗi khi ghi dữ liệu bằng Openpyxl: {e}")
+    return True
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile or args.profile_trace:
+        profiling.start(args.profile_trace)
+
+    store = None
+    if args.from_db:
+        from review_db import ReviewStore
+        store = ReviewStore(args.from_db, args.db_workbook)
+
+    blocks = compute_blocks(args.dedupe_threshold if args.dedupe else None, args.clusters, store)
+    if blocks is None:
+        return
+
+    # 4. Ghi kết quả vào file Excel MỚI
+    dest_file = EXCEL_FILE_DEST
+    if args.output_mode == 'standalone':
+        dest_file = args.output or EXCEL_FILE_SUMMARY
+    elif args.output:
+        dest_file = args.output
+
+    if os.path.abspath(dest_file) == os.path.abspath(EXCEL_FILE_SOURCE):
+        print("Lỗi: File output không được trùng với file nguồn.")
+        return
+
+    if args.output_mode != 'load':
+        from summary_writer import splice_summary_sheet, summary_grid, write_summary_workbook
+
+        # Toàn bộ lưới (tiêu đề, header, dữ liệu) được dựng một lần rồi ghi theo dòng
+        with stage('summary grid'):
+            rows = summary_grid(blocks)
+        try:
+            with stage('write summary', mode=args.output_mode):
+                if args.output_mode == 'standalone':
+                    write_summary_workbook(dest_file, OUTPUT_SHEET_NAME, rows)
+                else:
+                    splice_summary_sheet(EXCEL_FILE_SOURCE, dest_file, OUTPUT_SHEET_NAME, rows)
+        except Exception as e:
+            print(f"Lỗi khi ghi file '{dest_file}': {e}")
+            return
+    elif not write_with_openpyxl(blocks, dest_file):
+        return
+
+    print(f"\n✅ Đã hoàn thành. File '{dest_file}' đã được tạo.")
+    print(f"Các bảng thống kê được sắp xếp theo **chiều ngang** trên Sheet '{OUTPUT_SHEET_NAME}'.")
+
+
+if __name__ == '__main__':
+    main()
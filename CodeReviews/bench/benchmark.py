@@ -0,0 +1,322 @@
+"""
+benchmark.py
+
+Times and memory-profiles the review pipeline on synthetic workspaces
+(generate_workload.py) at several scales, and keeps the results as JSON so
+runs can be compared.
+
+Every task runs as its own subprocess with the workspace as working
+directory, exactly as it would be run by hand. Wall time comes from the
+parent; user/system CPU time and peak RSS come from os.wait4(), so each
+measurement covers that process and nothing else. Tasks, in order:
+ - export-cold:  export_reviews.py on a fresh workspace (no caches, no output),
+ - export-warm:  export_reviews.py again, nothing changed (manifest + caches),
+ - analysis:     analysis.py (default splice mode),
+ - excel-to-csv: xlsx/excel_to_csv.py on CodeReviews.xlsx,
+ - csv-to-excel: xlsx/csv_to_excel.py on the CSV files just written,
+ - annotate:     provided_src/annonate-line-java-file.py on the source tree.
+
+Results go to bench/results/<timestamp>.json; --compare OLD.json prints the
+change of every (scale, task) against an earlier run.
+
+Usage: python bench/benchmark.py --scales small,medium --repeat 3
+       python bench/benchmark.py --scales 20x100x4 --compare bench/results/OLD.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from generate_workload import generate_workspace
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# name -> (sheets, rows per sheet, reviewers)
+SCALES = {
+    "small": (10, 50, 3),
+    "medium": (50, 200, 4),
+    "large": (200, 500, 6),
+}
+TASKS = [
+    "export-cold",
+    "export-warm",
+    "analysis",
+    "excel-to-csv",
+    "csv-to-excel",
+    "annotate",
+]
+
+
+def parse_scale(text):
+    """A preset name or SHEETSxROWSxREVIEWERS -> (name, (sheets, rows, reviewers))."""
+    if text in SCALES:
+        return text, SCALES[text]
+    try:
+        sheets, rows, reviewers = (int(n) for n in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"unknown scale '{text}' (use {', '.join(SCALES)} or SHEETSxROWSxREVIEWERS)"
+        )
+    return text, (sheets, rows, reviewers)
+
+
+def task_commands(workspace):
+    """name -> (argv, reset) for every task; reset() runs before each repeat."""
+    python = sys.executable
+
+    def fresh_export():
+        for path in (workspace / ".parse_cache", workspace / "output_tex"):
+            shutil.rmtree(path, ignore_errors=True)
+
+    def fresh_csv():
+        shutil.rmtree(workspace / "csv", ignore_errors=True)
+
+    def fresh_annotations():
+        for path in (workspace / "provided_src").rglob("*_annotated.java"):
+            path.unlink()
+
+    def nothing():
+        pass
+
+    return {
+        "export-cold": ([python, REPO_DIR / "export_reviews.py"], fresh_export),
+        "export-warm": ([python, REPO_DIR / "export_reviews.py"], nothing),
+        "analysis": ([python, REPO_DIR / "analysis.py"], nothing),
+        "excel-to-csv": (
+            [
+                python,
+                REPO_DIR / "xlsx" / "excel_to_csv.py",
+                "CodeReviews.xlsx",
+                "-o",
+                "csv",
+            ],
+            fresh_csv,
+        ),
+        "csv-to-excel": (
+            [
+                python,
+                REPO_DIR / "xlsx" / "csv_to_excel.py",
+                "csv",
+                "-o",
+                "Combined.xlsx",
+            ],
+            nothing,
+        ),
+        "annotate": (
+            [
+                python,
+                REPO_DIR / "provided_src" / "annonate-line-java-file.py",
+                "provided_src",
+            ],
+            fresh_annotations,
+        ),
+    }
+
+
+def measure(argv, cwd):
+    """
+    Run argv in cwd and return (wall seconds, user seconds, system seconds,
+    peak RSS in MB, return code, tail of the output).
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [str(a) for a in argv],
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    output = proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.stdout.close()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    rss = usage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+    tail = output.decode("utf-8", "replace").strip().splitlines()[-5:]
+    return wall, usage.ru_utime, usage.ru_stime, rss, proc.returncode, tail
+
+
+def run_scale(name, size, tasks, repeat, seed, keep):
+    """Benchmark every task on one generated workspace. Returns result dicts."""
+    sheets, rows, reviewers = size
+    base = Path(tempfile.mkdtemp(prefix=f"bench-{name}-"))
+    workspace = base / "workspace"
+    start = time.perf_counter()
+    generate_workspace(workspace, sheets, rows, reviewers, seed)
+    print(
+        f"--- {name}: {sheets} sheets x {rows} rows x {reviewers} reviewers "
+        f"(generated in {time.perf_counter() - start:.2f}s) ---"
+    )
+
+    commands = task_commands(workspace)
+    results = []
+    try:
+        for task in tasks:
+            argv, reset = commands[task]
+            runs = []
+            for _ in range(repeat):
+                reset()
+                runs.append(measure(argv, workspace))
+            # The fastest run is the least disturbed by the rest of the machine
+            wall, user, system, _, code, tail = min(runs)
+            rss = max(r[3] for r in runs)
+            results.append(
+                {
+                    "scale": name,
+                    "sheets": sheets,
+                    "rows": rows,
+                    "reviewers": reviewers,
+                    "task": task,
+                    "wall_s": round(wall, 4),
+                    "user_s": round(user, 4),
+                    "sys_s": round(system, 4),
+                    "max_rss_mb": round(rss, 1),
+                    "runs": [round(r[0], 4) for r in runs],
+                    "returncode": code,
+                }
+            )
+            status = "❌" if code else "->"
+            print(f"   {status} {task:<13} {wall:>8.2f}s {rss:>8.1f} MB")
+            if code:
+                for line in tail:
+                    print(f"      {line}")
+    finally:
+        if keep:
+            print(f"   Workspace kept in {workspace}")
+        else:
+            shutil.rmtree(base, ignore_errors=True)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, old_path):
+    """Print wall time and peak RSS against an earlier results file."""
+    old = {
+        (r["scale"], r["task"]): r
+        for r in json.loads(Path(old_path).read_text(encoding="utf-8"))["results"]
+    }
+    print(f"\nCompared with {old_path}:")
+    print(
+        f"{'Scale':<10} {'Task':<13} {'Wall':>9} {'Change':>8} {'RSS':>9} {'Change':>8}"
+    )
+    for r in results:
+        before = old.get((r["scale"], r["task"]))
+        if before is None:
+            print(f"{r['scale']:<10} {r['task']:<13} {r['wall_s']:>8.2f}s {'new':>8}")
+            continue
+        wall_change = (
+            (r["wall_s"] / before["wall_s"] - 1) * 100 if before["wall_s"] else 0
+        )
+        rss_change = (
+            (r["max_rss_mb"] / before["max_rss_mb"] - 1) * 100
+            if before["max_rss_mb"]
+            else 0
+        )
+        print(
+            f"{r['scale']:<10} {r['task']:<13} {r['wall_s']:>8.2f}s {wall_change:>+7.1f}% "
+            f"{r['max_rss_mb']:>6.1f} MB {rss_change:>+7.1f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the review pipeline.")
+    parser.add_argument(
+        "--scales",
+        type=lambda text: [parse_scale(s) for s in text.split(",")],
+        default=[parse_scale("small"), parse_scale("medium")],
+        help=f"comma-separated presets ({', '.join(SCALES)}) or SHEETSxROWSxREVIEWERS",
+    )
+    parser.add_argument(
+        "--tasks",
+        type=lambda text: text.split(","),
+        default=TASKS,
+        help=f"comma-separated subset of: {', '.join(TASKS)}",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        metavar="N",
+        help="runs per task (fastest kept)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        help="results file (default: bench/results/<timestamp>.json)",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        metavar="OLD",
+        help="earlier results file to compare with",
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="keep the generated workspaces"
+    )
+    args = parser.parse_args()
+
+    unknown = [t for t in args.tasks if t not in TASKS]
+    if unknown:
+        parser.error(f"unknown task(s): {', '.join(unknown)}")
+    # Keep the pipeline order: later tasks use the output of earlier ones
+    tasks = [t for t in TASKS if t in args.tasks]
+
+    started = datetime.now(timezone.utc)
+    results = []
+    for name, size in args.scales:
+        results.extend(
+            run_scale(name, size, tasks, max(args.repeat, 1), args.seed, args.keep)
+        )
+
+    out_path = args.output or RESULTS_DIR / f"{started:%Y%m%dT%H%M%SZ}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(
+        json.dumps(
+            {
+                "started": started.isoformat(timespec="seconds"),
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "repeat": args.repeat,
+                "seed": args.seed,
+                "results": results,
+            },
+            indent=2,
+            ensure_ascii=False,
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    print(f"\n✅ Results written to {out_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+    if any(r["returncode"] for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+generate_workload.py
+
+Synthetic review workspaces for benchmarking the pipeline.
+
+A workspace holds what the tools expect in their working directory:
+ - CodeReviews.xlsx in the layout of xlsx/out/*.csv: a cover page with the
+   team table, the "Check list" sheet built from codes_mapping.txt, and one
+   report sheet per reviewed file (metadata block, "Check code" header and
+   rows from several reviewers, with Vietnamese text, multi-line comments and
+   LaTeX special characters);
+ - provided_src/ with one synthetic Java file per report sheet, so the Line
+   column points at real code;
+ - codes_mapping.txt, the LaTeX templates and a redactions.csv.
+
+The size is set by sheets x rows (per sheet) x reviewers; the same seed
+always gives the same workspace.
+
+Usage: python bench/generate_workload.py OUT_DIR --sheets 50 --rows 200 --reviewers 4
+"""
+import argparse
+import random
+import shutil
+from pathlib import Path
+
+from openpyxl import Workbook
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+TEMPLATES = ["main_report.tex", "main.tex", "summary.tex", "cover_page.tex"]
+
+FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Võ", "Đặng"]
+GIVEN_NAMES = ["Văn An", "Thị Bích", "Minh Châu", "Quốc Dũng", "Thu Hà", "Đức Huy"]
+COMMENT_WORDS = (
+    "biến tên không rõ nghĩa vòng lặp thừa điều kiện sai thiếu kiểm tra null "
+    "nên tách hàm if (a & b) 50% $total #count {x} ~tmp ^mask a|b a_b "
+    "path/to/File.java obj.method() 1,2,3 query_string theList"
+).split()
+FIX_WORDS = (
+    "đổi thành dùng && thay cho & tách ra hàm riêng kiểm tra != null "
+    "đặt tên lại theo camelCase bỏ biến thừa dùng StringBuilder final static"
+).split()
+JAVA_LINES = [
+    "    private {type} {name} = {value};",
+    "    public {type} get{Name}() {{",
+    "        return this.{name};",
+    "    }}",
+    "        if ({name} != null && {name}.size() > {value}) {{",
+    "            for (int i = 0; i < {name}.size(); i++) {{",
+    '            String query = "SELECT * FROM Book WHERE id = " + {name};',
+    "        }} catch (SQLException e) {{",
+    "            e.printStackTrace();",
+    "    // TODO: validate {name} before use",
+    "",
+]
+
+
+def read_codes(mapping_file):
+    """[(code, description)] and the raw Check list rows of codes_mapping.txt."""
+    codes, rows = [], []
+    for line in Path(mapping_file).read_text(encoding="utf-8").splitlines()[1:]:
+        code, _, description = line.partition("\t")
+        if code.strip():
+            codes.append((int(code), description))
+            rows.append([int(code), description])
+        else:
+            rows.append([None, description])
+    return codes, rows
+
+
+def reviewer_names(count, rng):
+    names = []
+    while len(names) < count:
+        name = f"{rng.choice(FAMILY_NAMES)} {rng.choice(GIVEN_NAMES)}"
+        if name not in names:
+            names.append(name)
+        elif len(names) >= len(FAMILY_NAMES) * len(GIVEN_NAMES):
+            names.append(f"{name} {len(names)}")
+    return names
+
+
+def java_source(class_name, lines, rng):
+    """A plausible Java file of about `lines` lines."""
+    out = [
+        "package pkg;",
+        "",
+        "import java.util.List;",
+        "",
+        f"public class {class_name} {{",
+    ]
+    while len(out) < lines - 1:
+        name = rng.choice(["books", "cart", "userId", "total", "theList", "query"])
+        out.append(
+            rng.choice(JAVA_LINES).format(
+                type=rng.choice(["int", "String", "List<Book>"]),
+                name=name,
+                Name=name[0].upper() + name[1:],
+                value=rng.randint(0, 99),
+            )
+        )
+    out.append("}")
+    return "\n".join(out) + "\n"
+
+
+def write_workbook(path, module_names, codes, check_rows, reviewers, rows, rng):
+    """Write CodeReviews.xlsx (write-only, so large workloads stay cheap)."""
+    wb = Workbook(write_only=True)
+
+    cover = wb.create_sheet("CoverPage")
+    cover.append(["Redacted University"])
+    cover.append(
+        ["Course: Redacted", None, "Class: L01", "Semester 1 - Year 20XX-20XY"]
+    )
+    cover.append([])
+    cover.append(["Group name: XXXX"])
+    cover.append(
+        ["No.", "Family name", "First name", "Student Code", "Role", "Contribution"]
+    )
+    for i, name in enumerate(reviewers, 1):
+        family, given = name.split(" ", 1)
+        role = "Leader" if i == 1 else "Member"
+        cover.append(
+            [i, family, given, 1810000 + i, role, round(1 / len(reviewers), 2)]
+        )
+
+    check_list = wb.create_sheet("Check list")
+    check_list.append([" ", "Check code description"])
+    for row in check_rows:
+        check_list.append(row)
+
+    for module in module_names:
+        ws = wb.create_sheet(f"Ass1_{module}.java")
+        team = rng.sample(reviewers, min(len(reviewers), rng.randint(1, 3)))
+        ws.append(["Code Review Report"])
+        ws.append([])
+        ws.append([f"Project Code: Bookstore / {module}.java"])
+        ws.append(["Version of the work product:", "1.0"])
+        ws.append(["Reviewer(s):", team[0]])
+        for name in team[1:]:
+            ws.append([None, name])
+        ws.append([])
+        ws.append(["Review date & time:", "02-Oct-2021 14:00"])
+        ws.append(["Work product' size (LoC)", rows * 2])
+        ws.append(["Effort spent on review (man-hour):", 1.5])
+        ws.append([])
+        ws.append(
+            [
+                "Check code",
+                "Check code Description",
+                "Line",
+                "Comment",
+                "Suggestion / Fix ?",
+                "Reviewer",
+            ]
+        )
+        for _ in range(rows):
+            code, description = rng.choice(codes)
+            first = rng.randint(6, rows * 2 - 5)
+            line = (
+                first if rng.random() < 0.8 else f"{first}-{first + rng.randint(1, 4)}"
+            )
+            comment = " ".join(rng.sample(COMMENT_WORDS, 6))
+            if rng.random() < 0.2:
+                comment += "\n" + " ".join(rng.sample(COMMENT_WORDS, 3))
+            fix = " ".join(rng.sample(FIX_WORDS, 5))
+            ws.append([code, description, line, comment, fix, rng.choice(team)])
+    wb.save(path)
+
+
+def generate_workspace(out_dir, sheets=10, rows=50, reviewers=3, seed=0):
+    """Create (or replace) a benchmark workspace in out_dir. Returns its Path."""
+    out_dir = Path(out_dir)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+    rng = random.Random(seed)
+
+    mapping_file = REPO_DIR / "codes_mapping.txt"
+    shutil.copy(mapping_file, out_dir / mapping_file.name)
+    for template in TEMPLATES:
+        if (REPO_DIR / template).exists():
+            shutil.copy(REPO_DIR / template, out_dir / template)
+
+    codes, check_rows = read_codes(mapping_file)
+    names = reviewer_names(reviewers, rng)
+    modules = [f"Module{i}" for i in range(sheets)]
+
+    src_dir = out_dir / "provided_src" / "src" / "main" / "java"
+    for i, module in enumerate(modules):
+        package_dir = src_dir / f"pkg{i % 10}"
+        package_dir.mkdir(parents=True, exist_ok=True)
+        (package_dir / f"{module}.java").write_text(
+            java_source(module, rows * 2, rng), encoding="utf-8"
+        )
+
+    # Redact the reviewers' family names
+    (out_dir / "redactions.csv").write_text(
+        "".join(f"{name},Reviewer {i}\n" for i, name in enumerate(names, 1)),
+        encoding="utf-8",
+    )
+
+    write_workbook(
+        out_dir / "CodeReviews.xlsx", modules, codes, check_rows, names, rows, rng
+    )
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic review workspace."
+    )
+    parser.add_argument("out_dir", help="directory to create (replaced if it exists)")
+    parser.add_argument("--sheets", type=int, default=10, help="report sheets")
+    parser.add_argument("--rows", type=int, default=50, help="review rows per sheet")
+    parser.add_argument(
+        "--reviewers", type=int, default=3, help="reviewers in the team"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    out_dir = generate_workspace(
+        args.out_dir, args.sheets, args.rows, args.reviewers, args.seed
+    )
+    print(f"✅ Workspace written to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+check_catalogue.py
+
+The check-code catalogue, compiled once from codes_mapping.txt and shared by
+export_reviews.py (codes table, row validation) and analysis.py (descriptions,
+per-section rollups).
+
+codes_mapping.txt is a tab-separated export of the "Check list" sheet:
+ - lines starting with a Roman numeral ("III - DEFECT OBJECTIVE") open a
+   section,
+ - lines starting with '#' ("# III.1 – Variable and Constant Declaration")
+   open a subsection,
+ - lines starting with a number are check codes with their description.
+
+The compiled catalogue keeps the codes in file order with a dict index for
+O(1) lookups, plus the outline of headings needed to render the codes table.
+It is pickled under .parse_cache/catalogue/, keyed by the sha256 of the file.
+"""
+import hashlib
+import pickle
+import re
+from collections import namedtuple
+from pathlib import Path
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path(".parse_cache") / "catalogue"
+DEFAULT_MAPPING_FILE = Path("codes_mapping.txt")
+UNKNOWN_SECTION = "Unknown"
+
+_SECTION_RE = re.compile(r"^[IVXLCDM]+\s*[-–]")
+_CODE_RE = re.compile(r"^(\d+)\s+(.*)$")
+
+CheckCode = namedtuple("CheckCode", ["code", "description", "section", "subsection"])
+
+
+def parse_code(value):
+    """Check code of a cell value (6, 6.0, "6", " 6 ") as int, or None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    if isinstance(value, int):
+        return value
+    text = str(value).strip()
+    return int(text) if text.isdigit() else None
+
+
+class CheckCatalogue:
+    """
+    Check codes in file order (entries) with an index by code, and the
+    outline of the mapping: ("section", title), ("subsection", title) and
+    ("code", index into entries) items in file order.
+    """
+
+    def __init__(self, entries, outline):
+        self.entries = tuple(entries)
+        self.outline = tuple(outline)
+        # Later duplicates win, as in a dict built row by row
+        self.by_code = {entry.code: entry for entry in self.entries}
+        self.descriptions = {code: e.description for code, e in self.by_code.items()}
+        self.sections = tuple(
+            title for kind, title in self.outline if kind == "section"
+        )
+
+    def __len__(self):
+        return len(self.by_code)
+
+    def __contains__(self, value):
+        return parse_code(value) in self.by_code
+
+    def get(self, value):
+        """The CheckCode for a cell value, or None for unknown codes."""
+        return self.by_code.get(parse_code(value))
+
+    def section_of(self, value):
+        entry = self.get(value)
+        return entry.section if entry and entry.section else UNKNOWN_SECTION
+
+
+def compile_catalogue(raw_text):
+    """Parse the text of codes_mapping.txt into a CheckCatalogue."""
+    entries = []
+    outline = []
+    section = subsection = None
+    for raw in raw_text.strip().splitlines():
+        s = raw.strip()
+        if not s:
+            continue
+        if _SECTION_RE.match(s):
+            section, subsection = s, None
+            outline.append(("section", s))
+        elif s.startswith("#"):
+            subsection = s.lstrip("#").strip()
+            outline.append(("subsection", subsection))
+        elif m := _CODE_RE.match(s):
+            outline.append(("code", len(entries)))
+            entries.append(CheckCode(int(m.group(1)), m.group(2), section, subsection))
+        # Anything else (the header line) is ignored
+    return CheckCatalogue(entries, outline)
+
+
+def load_catalogue(path=DEFAULT_MAPPING_FILE, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    The CheckCatalogue of a mapping file, from the on-disk cache when the
+    file is unchanged. Raises FileNotFoundError if the file does not exist.
+    """
+    data = Path(path).read_bytes()
+    h = hashlib.sha256(data)
+    h.update(f"v{CACHE_VERSION}".encode())
+    cache_file = Path(cache_dir) / f"{h.hexdigest()}.pkl"
+
+    try:
+        with cache_file.open("rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+
+    catalogue = compile_catalogue(data.decode("utf-8"))
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Only the current mapping is worth keeping
+        for old in cache_file.parent.glob("*.pkl"):
+            old.unlink(missing_ok=True)
+        with cache_file.open("wb") as f:
+            pickle.dump(catalogue, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # the cache is best-effort
+    return catalogue
@@ -0,0 +1,365 @@
+"""
+dedupe.py
+
+Near-duplicate findings: the same defect logged on the same sheet by several
+reviewers (or twice by one) in slightly different words. Used by
+export_reviews.py --dedupe, analysis.py --dedupe and `acript dedupe`, which
+writes a CSV report of the duplicate groups.
+
+Findings are only ever compared within a block: same sheet, same check code
+and cited lines at most `window` lines apart (findings without a Line only
+with each other, so they cannot chain distant findings into one group). The
+Comment and Suggestion text is normalized and cut into character shingles,
+and each finding gets a one-permutation MinHash signature of its shingle set:
+each shingle is hashed once, the hash picks one of 32 bins and each bin keeps
+its smallest hash. Signatures are split into bands (LSH) and a finding is put in one bucket per band and line
+neighbourhood; two findings become candidates only when they share a bucket,
+so a sheet costs a few dictionary inserts per finding instead of a comparison
+per pair, even when one comment is pasted on every line. Candidates are
+confirmed with their line distance and the exact Jaccard similarity of their
+shingle sets.
+
+Findings are read from the ReviewRows of a table (review_rows.py), and
+apply_duplicates returns new ReviewRows, so the column layout of the review
+tables is only defined there.
+
+Duplicates are grouped transitively (union-find) and the first finding of a
+group in table order is the one kept. Shingle hashes are memoized, since
+reviewers reuse the same words, and they use blake2b rather than hash() so
+the groups do not change from one run to the next.
+"""
+import argparse
+import csv
+import hashlib
+import re
+import sys
+import unicodedata
+from collections import namedtuple
+
+from review_rows import ReviewRow, review_rows
+from source_index import parse_line_spec
+
+THRESHOLD = 0.5  # minimum Jaccard similarity of the shingle sets
+WINDOW = 2  # maximum distance between the cited lines of two duplicates
+SHINGLE = 4  # characters per shingle
+BINS = 32  # MinHash values per signature
+ROWS = 2  # values per LSH band
+BANDS = BINS // ROWS
+MODES = ("flag", "merge")
+
+# One finding of a review table. row is its index in the table's ReviewRows,
+# lines the (first, last) lines it cites or None.
+Finding = namedtuple(
+    "Finding", ["sheet", "row", "code", "lines", "reviewer", "comment", "suggestion"]
+)
+
+# The findings of a group: keep is kept, duplicates are [(row, similarity)].
+DuplicateGroup = namedtuple("DuplicateGroup", ["keep", "duplicates"])
+
+_EMPTY = 1 << 64  # value of a bin no shingle fell into
+_EMPTY_BAND = (_EMPTY,) * ROWS
+_WORD_RE = re.compile(r"\w+")
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _code(value):
+    """Check code as text: 5, 5.0 and "5" are the same code."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return "" if value is None else str(value).strip()
+
+
+def format_lines(lines):
+    """(first, last) as the text of a Line cell: "23" or "41-45"."""
+    if lines is None:
+        return ""
+    first, last = lines
+    return str(first) if first == last else f"{first}-{last}"
+
+
+def sheet_findings(sheet_name, rows):
+    """Findings of the ReviewRows of a review table."""
+    return [
+        Finding(
+            sheet_name,
+            i,
+            _code(row.code),
+            parse_line_spec(row.line),
+            _text(row.reviewer),
+            _text(row.comment),
+            _text(row.suggestion),
+        )
+        for i, row in enumerate(rows)
+    ]
+
+
+def _neighbourhoods(lines, window):
+    """Line cells a finding is bucketed in (None for findings without a Line)."""
+    if lines is None:
+        return (None,)
+    size = window + 1
+    return range((lines[0] - window) // size, (lines[1] + window) // size + 1)
+
+
+def _line_distance(a, b):
+    if a is None or b is None:
+        return 0 if a is b else float("inf")
+    return max(0, a[0] - b[1], b[0] - a[1])
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while x != root:
+            parent[x], x = root, parent.get(x, x)
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # The smaller index (earlier finding) becomes the root
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+class Deduper:
+    """Finds the near-duplicate groups of a sheet's findings."""
+
+    def __init__(self, threshold=THRESHOLD, window=WINDOW):
+        self.threshold = threshold
+        self.window = window
+        self._hashes = {}  # shingle -> (bin, hash)
+
+    def shingles(self, finding):
+        """Shingle set of a finding's Comment and Suggestion text."""
+        text = f"{finding.comment} {finding.suggestion}"
+        words = _WORD_RE.findall(unicodedata.normalize("NFC", text).casefold())
+        text = " ".join(words)
+        if len(text) <= SHINGLE:
+            return frozenset([text]) if text else frozenset()
+        return frozenset(text[i : i + SHINGLE] for i in range(len(text) - SHINGLE + 1))
+
+    def signature(self, shingles):
+        """One-permutation MinHash signature (BINS values) of a shingle set."""
+        hashes = self._hashes
+        sig = [_EMPTY] * BINS
+        for s in shingles:
+            entry = hashes.get(s)
+            if entry is None:
+                h = int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest())
+                entry = hashes[s] = (h % BINS, h // BINS)
+            b, h = entry
+            if h < sig[b]:
+                sig[b] = h
+        return sig
+
+    def groups(self, findings):
+        """
+        Duplicate groups of the findings of one sheet, as DuplicateGroups of
+        row indices, in table order.
+        """
+        shingles = [self.shingles(f) for f in findings]
+        buckets = {}
+        for i, (finding, sh) in enumerate(zip(findings, shingles)):
+            if not sh or not finding.code:
+                continue  # nothing to compare
+            sig = self.signature(sh)
+            bands = [tuple(sig[b * ROWS : (b + 1) * ROWS]) for b in range(BANDS)]
+            for cell in _neighbourhoods(finding.lines, self.window):
+                for band, values in enumerate(bands):
+                    if values == _EMPTY_BAND:
+                        continue  # short texts leave bins empty
+                    key = (finding.code, cell, band, values)
+                    buckets.setdefault(key, []).append(i)
+
+        similar = {}
+        for members in buckets.values():
+            for n, i in enumerate(members):
+                for j in members[n + 1 :]:
+                    if (i, j) in similar:
+                        continue
+                    if (
+                        _line_distance(findings[i].lines, findings[j].lines)
+                        > self.window
+                    ):
+                        similar[i, j] = 0.0
+                        continue
+                    a, b = shingles[i], shingles[j]
+                    similar[i, j] = len(a & b) / len(a | b)
+
+        uf = _UnionFind()
+        best = {}  # finding -> highest similarity to another one of its group
+        for (i, j), sim in similar.items():
+            if sim >= self.threshold:
+                uf.union(i, j)
+                best[i] = max(best.get(i, 0.0), sim)
+                best[j] = max(best.get(j, 0.0), sim)
+        members = {}
+        for i in sorted(best):
+            members.setdefault(uf.find(i), []).append(i)
+
+        return [
+            DuplicateGroup(
+                findings[keep].row,
+                [(findings[i].row, best[i]) for i in rest[1:]],
+            )
+            for keep, rest in sorted(members.items())
+        ]
+
+
+def apply_duplicates(rows, groups, mode):
+    """
+    The ReviewRows of a table with the duplicates of each group flagged (mode
+    "flag": "(near-duplicate of ...)" is appended to their Comment) or merged
+    into the kept finding (mode "merge": they are dropped and the kept Comment
+    lists the other reviewers). The rows given are left unchanged.
+    """
+    if not groups:
+        return rows
+    rows = list(rows)
+    dropped = set()
+    for keep, duplicates in groups:
+        kept = rows[keep]
+        if mode == "merge":
+            others = []
+            for row, _ in duplicates:
+                dropped.add(row)
+                reviewer = _text(rows[row].reviewer)
+                if reviewer and reviewer != _text(kept.reviewer):
+                    if reviewer not in others:
+                        others.append(reviewer)
+            if others:
+                note = f"(also reported by {', '.join(others)})"
+                rows[keep] = _with_note(kept, note)
+        else:
+            note = f"(near-duplicate of {_text(kept.reviewer) or 'another finding'}"
+            line = _text(kept.line)
+            note += f", line {line})" if line else ")"
+            for row, _ in duplicates:
+                rows[row] = _with_note(rows[row], note)
+    return [row for i, row in enumerate(rows) if i not in dropped]
+
+
+def _with_note(row, note):
+    comment = _text(row.comment)
+    return ReviewRow(
+        row.code,
+        row.line,
+        f"{comment} {note}" if comment else note,
+        row.suggestion,
+        row.reviewer,
+    )
+
+
+def write_report(path, findings_by_sheet, groups_by_sheet):
+    """
+    CSV report of the duplicate groups: one line per finding of a group,
+    the kept one first.
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(
+            [
+                "Group",
+                "Sheet",
+                "Finding",
+                "Check Code",
+                "Line",
+                "Reviewer",
+                "Similarity",
+                "Action",
+                "Comment",
+                "Suggestion / Fix",
+            ]
+        )
+        n = 0
+        for sheet, groups in groups_by_sheet.items():
+            by_row = {f.row: f for f in findings_by_sheet[sheet]}
+            for keep, duplicates in groups:
+                n += 1
+                rows = [(keep, None, "kept")]
+                rows += [(row, sim, "duplicate") for row, sim in duplicates]
+                for row, sim, action in rows:
+                    f = by_row[row]
+                    writer.writerow(
+                        [
+                            n,
+                            sheet,
+                            row + 1,
+                            f.code,
+                            format_lines(f.lines),
+                            f.reviewer,
+                            "" if sim is None else f"{sim:.2f}",
+                            action,
+                            f.comment,
+                            f.suggestion,
+                        ]
+                    )
+
+
+def main(argv=None):
+    from parse_cache import ParseCache
+
+    parser = argparse.ArgumentParser(
+        description="Report near-duplicate findings of CodeReviews.xlsx."
+    )
+    parser.add_argument("--input", default="CodeReviews.xlsx", help="review workbook")
+    parser.add_argument(
+        "--output",
+        "-o",
+        default="output_duplicates.csv",
+        help="CSV report of the duplicate groups",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="minimum Jaccard similarity of the Comment + Suggestion shingles",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=WINDOW,
+        metavar="LINES",
+        help="maximum distance between the lines cited by two duplicates",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        sheets = ParseCache().load(args.input)
+    except FileNotFoundError:
+        print(f"ERROR: Excel file not found: {args.input}", file=sys.stderr)
+        return 2
+
+    deduper = Deduper(args.threshold, args.window)
+    findings_by_sheet, groups_by_sheet = {}, {}
+    total = 0
+    for sheet in sheets:
+        if sheet.report is None or sheet.report[1] is None:
+            continue
+        findings = sheet_findings(sheet.name, review_rows(sheet.report[1]))
+        groups = deduper.groups(findings)
+        total += len(findings)
+        if groups:
+            findings_by_sheet[sheet.name] = findings
+            groups_by_sheet[sheet.name] = groups
+
+    write_report(args.output, findings_by_sheet, groups_by_sheet)
+    duplicates = sum(len(g.duplicates) for gs in groups_by_sheet.values() for g in gs)
+    print(
+        f"🔁 {duplicates} near-duplicate(s) of {total} findings in "
+        f"{len(groups_by_sheet)} sheet(s); report written to {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
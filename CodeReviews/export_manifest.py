@@ -0,0 +1,109 @@
+"""
+export_manifest.py
+
+Manifest for incremental exports. It remembers, for every generated file under
+output_tex/, a key hashed from everything the file was built from (sheet
+fingerprint, redactions.csv, codes_mapping.txt, template text, exporter
+source). On the next run, outputs whose key did not change are skipped, files
+are only rewritten when their bytes differ (so timestamps, and latexmk, are
+left alone), and sections of sheets that disappeared are deleted.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+
+
+def content_key(*parts):
+    """sha256 over str/bytes/None parts (hex)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b"\x00none"
+        elif isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+def file_key(path):
+    """content_key of a file's bytes, or of None if the file does not exist."""
+    path = Path(path)
+    return content_key(path.read_bytes() if path.exists() else None)
+
+
+def write_if_changed(path, text, encoding="utf-8"):
+    """Write text to path unless it already holds exactly these bytes."""
+    path = Path(path)
+    data = text.encode(encoding)
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.write_bytes(data)
+    return True
+
+
+class ExportManifest:
+    """
+    Keys of the outputs produced by the previous export, stored as JSON in
+    export_dir. Output names are paths relative to export_dir.
+    With full=True the previous manifest is ignored (everything is rebuilt).
+    """
+
+    def __init__(self, export_dir, full=False, filename=".export_manifest.json"):
+        self.export_dir = Path(export_dir)
+        self.path = self.export_dir / filename
+        self.previous = {"outputs": {}, "sheets": {}}
+        if not full:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("version") == MANIFEST_VERSION:
+                    self.previous = data
+            except (OSError, ValueError):
+                pass
+        self.outputs = {}
+        self.sheets = {}
+
+    def is_fresh(self, output, key):
+        """True if output was built from key last time and still exists."""
+        return (
+            self.previous["outputs"].get(output) == key
+            and (self.export_dir / output).exists()
+        )
+
+    def record(self, output, key):
+        self.outputs[output] = key
+
+    def fresh_sheet(self, sheet_name, key):
+        """
+        The section name recorded for an unchanged sheet ("" for sheets that
+        produced no section), or None if the sheet must be processed again.
+        """
+        entry = self.previous["sheets"].get(sheet_name)
+        if not entry or entry["key"] != key:
+            return None
+        section = entry["section"]
+        if section and not self.is_fresh(section, key):
+            return None
+        return section
+
+    def record_sheet(self, sheet_name, key, section=""):
+        self.sheets[sheet_name] = {"key": key, "section": section}
+        if section:
+            self.record(section, key)
+
+    def stale_outputs(self):
+        """Outputs of the previous run that were not produced this time."""
+        return [o for o in self.previous["outputs"] if o not in self.outputs]
+
+    def save(self):
+        data = {
+            "version": MANIFEST_VERSION,
+            "outputs": self.outputs,
+            "sheets": self.sheets,
+        }
+        write_if_changed(self.path, json.dumps(data, ensure_ascii=False, indent=1))
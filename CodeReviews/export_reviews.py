@@ -12,178 +12,97 @@ Changes:
  - Columns are left-aligned only using ragged-right p{<fraction>\textwidth}.
  - Generates a codes_table.tex (single lookup table of Check Code -> Description)
    using the mapping provided by the user.
+ - The workbook is streamed in openpyxl read-only mode (workbook_reader.py);
+   sheets that are not reports are rejected after reading A1.
+ - Parsed sheets are kept in .parse_cache/ (parse_cache.py) and only sheets
+   whose content changed are parsed again.
+ - Exports are incremental (export_manifest.py): unchanged sheets are skipped,
+   files are only rewritten when their content changes and sections of removed
+   sheets are deleted. Use --full to rebuild everything.
+ - --jobs N renders changed sheets in N worker processes; reviews_list.tex keeps
+   the workbook's sheet order.
+ - Redactions use a compiled trie matcher (redaction.py); templates are
+   redacted as a stream.
+ - Check codes come from a compiled catalogue of codes_mapping.txt
+   (check_catalogue.py), which also flags rows with unknown codes.
+ - The cited source lines (Line column, e.g. "23" or "41-45") are shown with a
+   few lines of context under each finding, read from provided_src/ through a
+   cached line-offset index (source_index.py).
+ - --profile prints the wall time, CPU time and peak memory of every stage and
+   sheet (profiling.py); --profile-trace FILE also writes a Chrome trace.
+ - Importing the module has no side effects: directories are created and
+   codes_mapping.txt is read by main(), which is also `acript export` (main.py).
+ - --watch keeps running and re-exports whenever the workbook, the mapping,
+   redactions.csv, the templates or the sources are saved (watch.py). The
+   catalogue, redaction matcher, source index and parse cache stay in memory
+   and are only reloaded when their files change.
+ - --preview html|md renders the same sections, reviewer tables and codes
+   table into one self-contained, redacted HTML or Markdown file (preview.py)
+   instead of LaTeX, for checking the rows without compiling the report.
+ - --dedupe flag|merge finds findings logged several times on a sheet in
+   slightly different words (dedupe.py) and marks the repeats or merges them
+   into the first one; `acript dedupe` writes the report.
+ - --include-units lists the sections as \\include units in reviews_list.tex and
+   writes includeonly.tex, read by the preamble of main_report.tex, with
+   \\includeonly{...} for the sections rewritten by this export (or, with
+   --include-only, for the sheets named), so LaTeX only re-typesets those.
+   The other units keep their page numbers and labels from their .aux files,
+   which needs one full compile first; run without these options (or with
+   --include-only '*') to compile everything again.
+ - Review rows are read once into compact ReviewRows (review_rows.py, shared
+   with analysis.py) and only escaped when their table is rendered.
+ - --from-db DB reads a workbook ingested with `acript db ingest` (review_db.py)
+   from its SQLite database instead of CodeReviews.xlsx.
 """
-import csv
+import argparse
+import fnmatch
+import functools
+import os
 import re
 import shutil
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-import pandas as pd
+import dedupe
+import preview
+import profiling
+import watch
+from check_catalogue import load_catalogue
+from export_manifest import ExportManifest, content_key, file_key, write_if_changed
+from latex_escape import sanitize_code_line, sanitize_latex, sanitize_latex_column
+from parse_cache import ParseCache
+from profiling import stage
+from redaction import Redactor
+from review_rows import review_rows, rows_by_reviewer
+from source_index import SourceIndex, cited_lines, parse_line_spec
+from workbook_reader import extract_metadata, split_report
 
 # === Configuration ===
 export_dir = Path("output_tex")
 sections_dir = export_dir / "sections"
 review_list_file = export_dir / "reviews_list.tex"
+include_only_file = export_dir / "includeonly.tex"  # --include-units
 codes_table_file = export_dir / "codes_table.tex"
 input_file = Path("CodeReviews.xlsx")
-
-export_dir.mkdir(exist_ok=True)
-sections_dir.mkdir(exist_ok=True)
-
-
-def sanitize_latex(text):
-    """
-    Escape LaTeX special characters and make certain punctuation breakable.
-    This function processes the input string character-by-character to avoid
-    re-escaping characters introduced by earlier replacements.
-    """
-
-    # Handle None or NaN input gracefully
-    if text is None or (isinstance(text, float) and pd.isna(text)):
-        return ""
-
-    # Convert input to string and normalize newlines to single spaces
-    # This helps avoid unexpected line breaks in LaTeX output
-    s = str(text).replace("\r\n", " ").replace("\r", " ").replace("\n", " ").strip()
-
-    # Map of LaTeX special characters to their escaped versions
-    # These characters have special meaning in LaTeX and must be escaped to display correctly
-    escape_map = {
-        "\\": r"\textbackslash{}",  # Backslash
-        "&": r"\&",  # Ampersand
-        "%": r"\%",  # Percent
-        "$": r"\$",  # Dollar sign
-        "#": r"\#",  # Hash
-        "{": r"\{",  # Left brace
-        "}": r"\}",  # Right brace
-        "~": r"\textasciitilde{}",  # Tilde
-        "^": r"\textasciicircum{}",  # Caret
-        "|": r"\textbar{}",  # pipe
-        # "_": r"\_",  # Underscore
-    }
-
-    # Punctuation characters that should allow line breaks if followed by a non-space
-    # This helps LaTeX break long strings like "obj.method()" or "1,2,3" more gracefully
-    breakable_punct = ".,/:-_"
-
-    out_parts = []  # List to collect processed characters
-
-    # Iterate through each character in the string
-    for i, ch in enumerate(s):
-        # Look ahead to the next character (if any)
-        next_ch = s[i + 1] if i + 1 < len(s) else ""
-
-        # If character is a LaTeX special character, escape it using the map
-        if ch in escape_map:
-            out_parts.append(escape_map[ch])
-            continue
-
-        # If character is breakable punctuation and followed by a non-space,
-        # keep the punctuation and add \allowbreak{} to hint LaTeX to break line here
-        # Make punctuation and underscores breakable
-        if ch in breakable_punct and next_ch and next_ch != " ":
-            if ch == "_":
-                out_parts.append(r"\_\allowbreak{}")
-            else:
-                out_parts.append(f"{ch}\\allowbreak{{}}")
-            continue
-
-        # Default case: keep character as-is
-        out_parts.append(ch)
-
-    # Join all parts and collapse multiple spaces into one
-    result = re.sub(r"\s+", " ", "".join(out_parts)).strip()
-    return result
-
-
-def find_start_row(df):
-    """Find the row index (0-based) containing 'Check code' in the first column."""
-    for i, val in enumerate(df.iloc[:, 0]):
-        if isinstance(val, str) and val.strip() == "Check code":
-            return i
-    return None
-
-
-def extract_metadata(df):
-    """
-    Extract metadata as ordered pairs for a LaTeX tabular layout.
-    Handles:
-      - Multi-row metadata entries (continuation rows with blank key)
-      - Tabs correctly (each tab -> new cell)
-      - Appends ':' if missing in key
-      - Replaces empty values with '---'
-      - Joins multiple values on the same row with ' - '
-    Returns: list of tuples (key, [values])
-    """
-    metadata = []
-    current_key = None
-    current_values = []
-
-    for _, row in df.iterrows():
-        # Normalize each cell (strip, replace NaN with "")
-        cells = [str(x).strip() if pd.notna(x) else "" for x in row]
-        if not any(cells):
-            continue
-
-        key = cells[0].strip()
-        # join multiple filled cells (same row) with " - "
-        joined_value = " - ".join(v for v in cells[1:] if v).strip()
-        if not joined_value:
-            joined_value = "---"
-
-        if key:  # new key starts
-            if current_key:
-                metadata.append((current_key, current_values))
-            if not key.endswith(":"):
-                key += ":"
-            current_key = key
-            current_values = [joined_value]
-        elif current_key:  # continuation line (same metadata)
-            current_values.append(joined_value)
-
-    if current_key:
-        metadata.append((current_key, current_values))
-
-    return metadata
-
-
-def rows_by_reviewer(table_df):
-    """
-    Given the review table rows (pandas DataFrame starting after header),
-    produce a mapping reviewer -> list of rows (each row is list of 6 padded cells).
-    Assumes columns are:
-      0 Check code
-      1 Check code description (omitted)
-      2 Line
-      3 Comment
-      4 Suggestion / Fix ?
-      5 Reviewer
-    Will pad/truncate each row to at least 6 columns so indexing is safe.
-    """
-    group = {}
-    for _, r in table_df.iterrows():
-        if r.isna().all():
-            continue
-        cells = [sanitize_latex(x) for x in list(r)]
-        # pad to 6 cells
-        if len(cells) < 6:
-            cells.extend([""] * (6 - len(cells)))
-        else:
-            cells = cells[:6]
-        # extract reviewer (index 5). If empty, use "Unknown"
-        reviewer = cells[5] if cells[5].strip() else "Unknown"
-        group.setdefault(reviewer, []).append(cells)
-    return group
+preview_output = Path("output_preview")  # + .html or .md (--preview)
+redaction_file = Path("redactions.csv")
+source_root = Path("provided_src")  # reviewed sources, for the code snippets
+template_files = ["main_report.tex", "main.tex", "summary.tex", "cover_page.tex"]
+parse_cache = ParseCache()  # .parse_cache/, shared with analysis.py
 
 
-def make_reviewer_tables(grouped_rows):
+def make_reviewer_tables(grouped_rows, snippet=None):
     """
-    Given grouped_rows: reviewer -> rows, produce LaTeX lines.
+    Given grouped_rows: reviewer -> ReviewRows (review_rows.rows_by_reviewer),
+    produce LaTeX lines.
     Per reviewer:
       - Write \\subsubsection*{Reviewer Name}
       - Short table with columns: Code | Line | Comment | Suggestion
+      - Under each row, snippet(raw Line value): the cited code, if any
     Column widths use fractions of \textwidth and left-aligned raggedright.
+    Cells are escaped here, column by column (batched and memoized).
     """
     lines = []
     # Column widths (fractions of \textwidth)
@@ -218,41 +137,72 @@ def make_reviewer_tables(grouped_rows):
         lines.append("\\endlastfoot")
 
         # Add this reviewer's rows
-        for cells in rows:
-            # cells layout: [code, descr, line, comment, suggestion, reviewer]
-            code = cells[0]
-            line_no = cells[2]
-            comment = cells[3]
-            suggestion = cells[4]
+        with stage("sanitize_latex"):
+            codes = sanitize_latex_column([r.code for r in rows])
+            line_nos = sanitize_latex_column([r.line for r in rows])
+            comments = sanitize_latex_column([r.comment for r in rows])
+            suggestions = sanitize_latex_column([r.suggestion for r in rows])
+        with stage("snippets"):
+            snippets = [snippet(r.line) if snippet else "" for r in rows]
+        for code, line_no, comment, suggestion, code_tex in zip(
+            codes, line_nos, comments, suggestions, snippets
+        ):
             row_tex = f"{code} & {line_no} & {comment} & {suggestion} \\\\"
             lines.append(row_tex)
+            if code_tex:
+                lines.append(code_tex)
         lines.append("\\end{longtable}")
         lines.append("")  # blank line between reviewers
     return lines
 
 
-def process_sheet(sheet_name, df):
+def process_sheet(sheet_name, rows):
     """
     Produce the .tex contents for a sheet (string), or None if sheet is not a report.
+    rows is an iterable of row tuples; it is only read as far as needed.
     """
-    if df.shape[0] == 0:
-        return None
-    if not isinstance(df.iat[0, 0], str) or "Code Review Report" not in df.iat[0, 0]:
+    return process_report(sheet_name, split_report(rows))
+
+
+def report_contents(sheet_name, report, render=None):
+    """
+    (metadata, ReviewRows grouped by reviewer, snippet function) of a sheet
+    split by workbook_reader.split_report, or None if it is not a report.
+    Shared by the LaTeX export and the previews, which escape the rows when
+    they render them; render is the snippet renderer (LaTeX by default, see
+    sheet_snippets).
+    """
+    if report is None:
         return None
 
-    start_row = find_start_row(df)
-    if start_row is None:
+    meta_rows, table_rows = report
+    if table_rows is None:
         print(
             f"⚠️  Skipping '{sheet_name}' — no 'Check code' header found.",
             file=sys.stderr,
         )
         return None
 
-    meta_df = df.iloc[:start_row]
-    table_df = df.iloc[start_row + 1 :].reset_index(drop=True)
-    table_df = table_df.dropna(how="all")
+    metadata = extract_metadata(meta_rows)
+    check_codes(sheet_name, table_rows)
+    rows = review_rows(table_rows)
+    if deduper is not None:
+        with stage("dedupe"):
+            groups = deduper.groups(dedupe.sheet_findings(sheet_name, rows))
+            rows = dedupe.apply_duplicates(rows, groups, dedupe_mode)
+    snippet = sheet_snippets(sheet_name, metadata, render or render_snippet)
+    return metadata, rows_by_reviewer(rows), snippet
 
-    metadata = extract_metadata(meta_df)
+
+def process_report(sheet_name, report):
+    """
+    Same as process_sheet, for a sheet already split by
+    workbook_reader.split_report (e.g. loaded from the parse cache).
+    """
+    contents = report_contents(sheet_name, report)
+    if contents is None:
+        return None
+    metadata, grouped, snippet = contents
 
     lines = []
     lines.append(
@@ -283,11 +233,10 @@ def process_sheet(sheet_name, df):
     lines.append("\n\\vspace{1em}")
     lines.append("% Reviewer-specific tables (no reviewer column)")
 
-    grouped = rows_by_reviewer(table_df)
     if not grouped:
         lines.append("% (no review rows found)")
     else:
-        lines.extend(make_reviewer_tables(grouped))
+        lines.extend(make_reviewer_tables(grouped, snippet))
 
     lines.append(
         "% --- End section for sheet: " + sanitize_latex(sheet_name) + " ---\n"
@@ -295,20 +244,23 @@ def process_sheet(sheet_name, df):
     return "\n".join(lines)
 
 
-# === Generate codes_table.tex from user-provided mapping ===
-CODES_MAPPING_RAW = Path("codes_mapping.txt").read_text(encoding="utf-8")
+# === Check-code catalogue (loaded by main() and by each worker process) ===
+codes_mapping_file = Path("codes_mapping.txt")
+catalogue = None  # CheckCatalogue compiled from codes_mapping_file
+
 
+def load_codes(path):
+    """Load the check-code catalogue used by check_codes and the codes table."""
+    global catalogue
+    catalogue = load_catalogue(path)
 
-def generate_codes_table(raw_text, out_path):
+
+def generate_codes_table(catalogue, out_path):
     """
-    Parse the raw mapping and write codes_table.tex with sections and subsections.
-    Lines starting with Roman numerals (I, II, III, etc.) define new sections.
-    Lines starting with '#' define subsections.
-    Lines starting with digits are table rows.
+    Write codes_table.tex from the check-code catalogue: sections (I, II,
+    III, etc.) and subsections ('#' lines) become headings, check codes become
+    table rows.
     """
-    lines = raw_text.strip().splitlines()
-    current_section = None
-    current_subsection = None
     tex = []
     table_open = False  # Track whether a longtable is currently open
 
@@ -318,155 +270,755 @@ def generate_codes_table(raw_text, out_path):
     )
     tex.append("\\vspace{0.5em}")
 
-    for raw in lines:
-        s = raw.strip()
-        if not s:
-            continue
+    for kind, value in catalogue.outline:
+        if kind != "code" and table_open:
+            tex.append("\\bottomrule")
+            tex.append("\\end{longtable}")
+            table_open = False
 
         # --- Section (Roman numeral) ---
-        if re.match(r"^[IVXLCDM]+\s*[-–]", s):
-            if table_open:
-                tex.append("\\bottomrule")
-                tex.append("\\end{longtable}")
-                table_open = False
-            current_section = s
-            current_subsection = None
-            tex.append(
-                f"\\subsection*{{{sanitize_latex(current_section)}}}"
-            )  # not in TOC
+        if kind == "section":
+            tex.append(f"\\subsection*{{{sanitize_latex(value)}}}")  # not in TOC
             continue
 
         # --- Subsection (starts with #) ---
-        if s.startswith("#"):
-            if table_open:
-                tex.append("\\bottomrule")
-                tex.append("\\end{longtable}")
-                table_open = False
-            current_subsection = s.lstrip("#").strip()
-            tex.append(f"\\subsubsection*{{{sanitize_latex(current_subsection)}}}")
-            continue
-
-        # --- Table rows (start with a number) ---
-        m = re.match(r"^(\d+)\s+(.*)$", s)
-        if m:
-            if not table_open:
-                tex.append(
-                    "\\begin{longtable}{>{\\raggedright\\arraybackslash}p{0.12\\textwidth} >{\\raggedright\\arraybackslash}p{0.84\\textwidth}}"
-                )
-                tex.append("\\toprule")
-                tex.append(
-                    "\\textbf{Check Code} & \\textbf{Check code description} \\\\"
-                )
-                tex.append("\\midrule")
-                table_open = True
-
-            code = sanitize_latex(m.group(1))
-            desc = sanitize_latex(m.group(2))
-            tex.append(f"{code} & {desc} \\\\")
+        if kind == "subsection":
+            tex.append(f"\\subsubsection*{{{sanitize_latex(value)}}}")
             continue
 
-        # Ignore unrecognized lines silently
-        continue
+        # --- Table rows ---
+        if not table_open:
+            tex.append(
+                "\\begin{longtable}{>{\\raggedright\\arraybackslash}p{0.12\\textwidth} >{\\raggedright\\arraybackslash}p{0.84\\textwidth}}"
+            )
+            tex.append("\\toprule")
+            tex.append("\\textbf{Check Code} & \\textbf{Check code description} \\\\")
+            tex.append("\\midrule")
+            table_open = True
+
+        entry = catalogue.entries[value]
+        code = sanitize_latex(entry.code)
+        desc = sanitize_latex(entry.description)
+        tex.append(f"{code} & {desc} \\\\")
 
     # --- Close last table if still open ---
     if table_open:
         tex.append("\\bottomrule")
         tex.append("\\end{longtable}")
 
-    out_path.write_text(apply_redactions("\n".join(tex) + "\n"), encoding="utf-8")
-    print(f"📄 Created codes lookup: {out_path}")
+    if write_if_changed(out_path, apply_redactions("\n".join(tex) + "\n")):
+        print(f"📄 Created codes lookup: {out_path}")
+
+
+def check_codes(sheet_name, table_rows):
+    """
+    Warn about review rows whose check code is not in the catalogue (typos,
+    codes from another checklist). Returns the set of unknown codes.
+    """
+    unknown = {
+        str(row[0]).strip()
+        for row in table_rows
+        if row
+        and row[0] is not None
+        and str(row[0]).strip()
+        and row[0] not in catalogue
+    }
+    if unknown:
+        print(
+            f"⚠️  '{sheet_name}': unknown check code(s) {', '.join(sorted(unknown))}",
+            file=sys.stderr,
+        )
+    return unknown
+
+
+# === Redactions (loaded by main() and by each worker process) ===
+redactor = Redactor({})
+
+
+def load_redactions(path, ignore_case=False, normalize=None):
+    """Load the redaction CSV (original,replacement) used by apply_redactions."""
+    global redactor
+    redactor = Redactor.from_csv(path, ignore_case=ignore_case, normalize=normalize)
 
 
 def apply_redactions(text):
-    if pattern:
-        return pattern.sub(redactor_func, text)
+    return redactor.redact(text)
+
+
+# === Source snippets (loaded by main() and by each worker process) ===
+sources = None  # SourceIndex over source_root, None when snippets are off
+snippet_context = 2  # lines shown before and after the cited ones
+
+
+def load_sources(root, context=2):
+    """Index the sources under root for sheet_snippets (context < 0: off)."""
+    global sources, snippet_context
+    sources = SourceIndex(root) if context >= 0 else None
+    snippet_context = context
+
+
+def render_snippet(lines):
+    """
+    LaTeX row spanning the 4 columns of a reviewer table with the numbered
+    code lines [(n, text, cited)]; cited lines are set in bold.
+    """
+    width = len(str(lines[-1][0]))
+    body = []
+    for n, text, cited in lines:
+        code = sanitize_code_line(text)
+        if cited and code:
+            code = f"\\textbf{{{code}}}"
+        body.append("~" * (width - len(str(n))) + f"{n}:~{code}")
+    return (
+        "\\multicolumn{4}{>{\\raggedright\\arraybackslash}p{0.96\\textwidth}}"
+        "{\\footnotesize\\ttfamily " + "\\newline ".join(body) + "} \\\\"
+    )
+
+
+def sheet_snippets(sheet_name, metadata, render=render_snippet):
+    """
+    Function mapping a raw Line cell of this sheet to the cited code rendered
+    by render (LaTeX by default), or None when no source
+    file matches the sheet name or its "Project Code:" metadata.
+    """
+    if not sources:
+        return None
+    project = next(
+        (v[0] for k, v in metadata if k.lower().startswith("project code")), None
+    )
+    rel = sources.resolve(sheet_name, project)
+    if rel is None:
+        return None
+
+    def snippet(line_value):
+        spec = parse_line_spec(line_value)
+        if not spec:
+            return ""
+        cited = cited_lines(line_value)
+        lines = sources.snippet(rel, *spec, snippet_context, cited)
+        return render(lines) if lines else ""
+
+    return snippet
+
+
+# === Near-duplicate findings (--dedupe) ===
+deduper = None  # dedupe.Deduper, None unless --dedupe is given
+dedupe_mode = None  # "flag" or "merge"
+NO_DEDUPE = (None, dedupe.THRESHOLD, dedupe.WINDOW)
+
+
+def load_dedupe(mode=None, threshold=dedupe.THRESHOLD, window=dedupe.WINDOW):
+    global deduper, dedupe_mode
+    dedupe_mode = mode
+    deduper = dedupe.Deduper(threshold, window) if mode else None
+
+
+def init_worker(redaction_options, snippet_options, dedupe_options, profile=False):
+    """Process pool initializer: load what export_sheet needs."""
+    if profile:
+        profiling.start(report=False)
+    load_codes(codes_mapping_file)
+    load_redactions(redaction_file, *redaction_options)
+    load_sources(*snippet_options)
+    load_dedupe(*dedupe_options)
+
+
+def export_sheet(sheet_name, report):
+    """
+    Render and redact one sheet. Returns (section path relative to export_dir,
+    text), or None if the sheet produces no section. Runs in worker processes
+    when --jobs > 1.
+    """
+    with stage("sheet", sheet=sheet_name):
+        with stage("process_report"):
+            tex_content = process_report(sheet_name, report)
+        if not tex_content:
+            return None
+        safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", sheet_name)
+        with stage("redaction"):
+            return f"sections/{safe_name}.tex", apply_redactions(tex_content)
+
+
+def export_sheet_profiled(sheet_name, report):
+    """export_sheet in a worker process, with the profile records it made."""
+    return export_sheet(sheet_name, report), profiling.take_records()
+
+
+def export_sheets(
+    reports,
+    jobs=1,
+    redaction_options=(False, None),
+    snippet_options=(source_root, 2),
+    dedupe_options=NO_DEDUPE,
+):
+    """
+    Yield (sheet_name, export_sheet result) for every (name, report) pair,
+    in completion order. With jobs > 1 sheets are fanned out to a process pool.
+    """
+    if jobs <= 1 or len(reports) < 2:
+        for sheet_name, report in reports:
+            yield sheet_name, export_sheet(sheet_name, report)
+        return
+
+    profile = profiling.enabled()
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(redaction_options, snippet_options, dedupe_options, profile),
+    ) as pool:
+        task = export_sheet_profiled if profile else export_sheet
+        futures = {
+            pool.submit(task, sheet_name, report): sheet_name
+            for sheet_name, report in reports
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            if profile:
+                result, records = result
+                profiling.add_records(records)
+            yield futures[future], result
+
+
+# === Export passes ===
+_loaded = {}  # input -> signature of the files and options it was loaded from
+
+
+class ExportError(Exception):
+    """The workbook could not be read; status is the process exit code."""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def source_files(snippet_options):
+    """The source files snippets are read from ([] when snippets are off)."""
+    root, context = snippet_options
+    return list(SourceIndex(root).paths.values()) if context >= 0 else []
+
+
+def reload_inputs(redaction_options, snippet_options, dedupe_options=NO_DEDUPE):
+    """
+    Load the check-code catalogue, the redactions and the source index,
+    skipping each one whose files and options are unchanged since it was last
+    loaded in this process, and set up --dedupe.
+    """
+    if _loaded.get("dedupe") != dedupe_options:
+        load_dedupe(*dedupe_options)
+        _loaded["dedupe"] = dedupe_options
+
+    signature = (watch.file_signature(codes_mapping_file),)
+    if _loaded.get("codes") != signature:
+        with stage("load catalogue"):
+            load_codes(codes_mapping_file)
+        _loaded["codes"] = signature
+
+    signature = (watch.file_signature(redaction_file), redaction_options)
+    if _loaded.get("redactions") != signature:
+        with stage("load redactions"):
+            load_redactions(redaction_file, *redaction_options)
+        _loaded["redactions"] = signature
+
+    signature = (watch.snapshot(source_files(snippet_options)), snippet_options)
+    if _loaded.get("sources") != signature:
+        with stage("index sources"):
+            load_sources(*snippet_options)
+        _loaded["sources"] = signature
+
+
+@functools.cache
+def render_module_files():
+    """
+    Files of the modules whose code decides the rendered outputs: this one,
+    every module of the render path and the module of the workbook reader
+    (parse_cache.py, or review_db.py with --from-db).
+    """
+    names = (
+        __name__,
+        "check_catalogue",
+        "dedupe",
+        "latex_escape",
+        "parse_cache",
+        "preview",
+        "redaction",
+        "review_rows",
+        "source_index",
+        "workbook_reader",
+        type(parse_cache).__module__,
+    )
+    return [Path(sys.modules[n].__file__).resolve() for n in dict.fromkeys(names)]
+
+
+def exporter_key():
+    """Key of the code that renders the outputs (read once per process)."""
+    return content_key(*(f.read_bytes() for f in render_module_files()))
+
+
+def export_once(
+    jobs=1,
+    full=False,
+    redaction_options=(False, None),
+    snippet_options=(source_root, 2),
+    dedupe_options=NO_DEDUPE,
+    include_only=None,
+):
+    """
+    One export pass: render the sheets that changed since the previous export,
+    then the reviews list, codes table and templates. Raises ExportError if
+    the workbook cannot be read.
+    include_only=None lists the sections with \\input; otherwise they are
+    \\include units and includeonly.tex names the sections rewritten by this
+    pass (include_only=()) or the sheets matching the patterns given.
+    """
+    sections_dir.mkdir(parents=True, exist_ok=True)
+    reload_inputs(redaction_options, snippet_options, dedupe_options)
+    manifest = ExportManifest(export_dir, full=full)
+
+    # Everything an output depends on besides its own inputs
+    source_key = exporter_key()
+    redaction_key = content_key(file_key(redaction_file), repr(redaction_options))
+    # Sections embed code from the sources, so they depend on all of them
+    with stage("index sources"):
+        sources_key = content_key(
+            repr(snippet_options[1]),
+            *(
+                f"{rel}:{digest}"
+                for rel, digest in (sources.fingerprints() if sources else ())
+            ),
+        )
+
+    try:
+        with stage("open workbook"):
+            _, fingerprints = parse_cache.fingerprints(input_file)
+        sheet_keys = {
+            name: content_key(
+                source_key, redaction_key, sources_key, repr(dedupe_options), name, fp
+            )
+            for name, fp in fingerprints
+        }
+        changed = {
+            name
+            for name, _ in fingerprints
+            if manifest.fresh_sheet(name, sheet_keys[name]) is None
+        }
+        with stage("parse workbook"):
+            sheets = parse_cache.load(input_file, names=changed) if changed else []
+    except FileNotFoundError:
+        raise ExportError(f"Excel file not found: {input_file}", 2)
+    except Exception as e:
+        raise ExportError(f"Failed to open Excel file: {e}", 3)
+
+    # Render changed sheets, writing each section as soon as it is ready
+    sections = {}
+    rewritten = set()
+    reports = [(sheet.name, sheet.report) for sheet in sheets]
+    with stage("render sheets"):
+        for name, result in export_sheets(
+            reports, jobs, redaction_options, snippet_options, dedupe_options
+        ):
+            sections[name] = ""
+            if result:
+                section, text = result
+                sections[name] = section
+                output_path = export_dir / section
+                if write_if_changed(output_path, text):
+                    print(f"✅ Exported {output_path}")
+                    rewritten.add(name)
+
+    # Collect sections in workbook order
+    inputs = []
+    units = {}  # sheet name -> \include unit
+    skipped = 0
+    for name, _ in fingerprints:
+        key = sheet_keys[name]
+        if name in changed:
+            section = sections[name]
+        else:
+            section = manifest.fresh_sheet(name, key)
+            skipped += 1
+        manifest.record_sheet(name, key, section)
+        if section and include_only is None:
+            inputs.append(f"\\input{{{section}}}")
+        elif section:
+            units[name] = section.removesuffix(".tex")
+            inputs.append(f"\\include{{{units[name]}}}")
+
+    if skipped:
+        print(f"♻️  {skipped} unchanged sheet(s) skipped")
+
+    # Delete the sections of sheets that are gone (or no longer reports)
+    for output in manifest.stale_outputs():
+        if output.startswith("sections/"):
+            (export_dir / output).unlink(missing_ok=True)
+            # .aux left by \include
+            (export_dir / output).with_suffix(".aux").unlink(missing_ok=True)
+            print(f"🗑️  Removed {export_dir / output}")
+
+    # Write reviews_list.tex, also when no section is left, so that it never
+    # \input's a deleted section
+    with stage("reviews list"):
+        review_list = "\n".join(inputs) if inputs else "% (no review sections)"
+        review_list = apply_redactions(review_list + "\n")
+        if write_if_changed(review_list_file, review_list):
+            print(f"📄 Created {review_list_file}")
+    write_include_only(units, rewritten, include_only)
+
+    # Generate codes_table
+    codes_key = content_key(source_key, redaction_key, file_key(codes_mapping_file))
+    if not manifest.is_fresh(codes_table_file.name, codes_key):
+        with stage("codes table"):
+            generate_codes_table(catalogue, codes_table_file)
+    manifest.record(codes_table_file.name, codes_key)
+
+    # Copy master template if it exists (safe)
+    for filename in template_files:
+        src = Path(filename)
+        dst = export_dir / src.name
+        if not src.exists():
+            print(f"ℹ️  {src} not found; skipping copy.")
+            continue
+
+        copy_key = content_key(redaction_key, src.read_bytes())
+        manifest.record(dst.name, copy_key)
+        if manifest.is_fresh(dst.name, copy_key):
+            continue
+
+        with stage("template copy", file=filename):
+            # Simple heuristic for text files:
+            if src.suffix.lower() in {".tex", ".txt", ".md"}:
+                try:
+                    # Redacted in chunks, without loading the whole file
+                    if redactor.redact_file(src, dst):
+                        print(f"📄 Copied and redacted {src} to {dst}")
+                except Exception as e:
+                    print(f"⚠️ Failed to redact {src}, copying raw: {e}")
+                    shutil.copy(src, dst)
+            else:
+                # Binary or unknown file: copy as-is
+                shutil.copy(src, dst)
+                print(f"📄 Copied {src} to {dst} (binary/no redaction)")
+
+    with stage("manifest save"):
+        manifest.save()
+
+
+_INCLUDE_ONLY_RE = re.compile(r"\\includeonly\{([^}]*)\}")
+
+
+def write_include_only(units, rewritten, include_only):
+    """
+    Write includeonly.tex for export_once: the \\include units of the sheets
+    rewritten by this pass (and of those never typeset as units, which have no
+    .aux yet), or of the sheets matching the include_only patterns. Removed
+    when include_only is None (plain \\input sections).
+    """
+    if include_only is None:
+        if include_only_file.exists():
+            include_only_file.unlink()
+            print(f"🗑️  Removed {include_only_file}")
+        return
+
+    if include_only:
+        selected = [
+            name
+            for name in units
+            if any(fnmatch.fnmatchcase(name, pattern) for pattern in include_only)
+        ]
+        if not selected:
+            print(
+                f"⚠️  No sheet matches --include-only {' '.join(include_only)}",
+                file=sys.stderr,
+            )
     else:
-        return text
+        selected = [
+            name
+            for name in units
+            if name in rewritten or not (export_dir / f"{units[name]}.aux").exists()
+        ]
+        if not selected and include_only_file.exists():
+            # Nothing new to typeset: keep the previous list, without the
+            # sections that are gone
+            previous = _INCLUDE_ONLY_RE.search(
+                include_only_file.read_text(encoding="utf-8")
+            )
+            kept = {u for u in previous.group(1).split(",") if u} if previous else set()
+            selected = [name for name in units if apply_redactions(units[name]) in kept]
+            if len(selected) == len(kept):
+                print(f"ℹ️  No section changed; {include_only_file} left as is.")
+                return
+
+    text = (
+        "% Written by export_reviews.py: sections typeset by the next compile\n"
+        f"\\includeonly{{{','.join(units[name] for name in selected)}}}\n"
+    )
+    if write_if_changed(include_only_file, apply_redactions(text)):
+        print(f"📄 Created {include_only_file} ({len(selected)} section(s))")
 
 
-# === Main execution ===
-redaction_file = Path("redactions.csv")
-redaction_map = {}
-
-if redaction_file.exists():
-    with redaction_file.open(encoding="utf-8") as f:
-        reader = csv.reader(f)
-        for row in reader:
-            if len(row) < 2:
-                continue
-            orig, repl = row[0], row[1]
-            redaction_map[re.escape(orig)] = repl
-
-
-if redaction_map:
-    # Build regex of all escaped original strings, joined by |
-    pattern = re.compile("|".join(sorted(redaction_map, key=len, reverse=True)))
-
-    def redactor_func(match):
-        return redaction_map[re.escape(match.group(0))]
-
-else:
-    pattern = None
-
-    def redactor_func(match):
-        return match.group(0)
-
-
-try:
-    excel = pd.ExcelFile(input_file)
-except FileNotFoundError:
-    print(f"ERROR: Excel file not found: {input_file}", file=sys.stderr)
-    sys.exit(2)
-except Exception as e:
-    print(f"ERROR: Failed to open Excel file: {e}", file=sys.stderr)
-    sys.exit(3)
-
-inputs = []
-
-for sheet in excel.sheet_names:
-    df = excel.parse(sheet_name=sheet, header=None, dtype=object)
-    tex_content = process_sheet(sheet, df)
-    if tex_content:
-        safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", sheet)
-        output_path = sections_dir / f"{safe_name}.tex"
-        output_path.write_text(apply_redactions(tex_content), encoding="utf-8")
-        inputs.append(f"\\input{{sections/{safe_name}.tex}}")
-        print(f"✅ Exported {output_path}")
-
-# Write reviews_list.tex
-if inputs:
-    review_list_file.write_text(
-        apply_redactions("\n".join(inputs) + "\n"), encoding="utf-8"
+def export_preview(
+    fmt,
+    out_path,
+    redaction_options=(False, None),
+    snippet_options=(source_root, 2),
+    dedupe_options=NO_DEDUPE,
+):
+    """
+    Write every report sheet and the codes table to a single HTML or Markdown
+    file (fmt: a preview.BACKENDS key), redacted like the LaTeX export. The
+    file is written one sheet at a time. Raises ExportError if the workbook
+    cannot be read.
+    """
+    backend = preview.BACKENDS[fmt]()
+    reload_inputs(redaction_options, snippet_options, dedupe_options)
+    try:
+        with stage("parse workbook"):
+            sheets = parse_cache.load(input_file)
+    except FileNotFoundError:
+        raise ExportError(f"Excel file not found: {input_file}", 2)
+    except Exception as e:
+        raise ExportError(f"Failed to open Excel file: {e}", 3)
+
+    reports = [sheet for sheet in sheets if sheet.report is not None]
+    names = [sheet.name for sheet in reports if sheet.report[1] is not None]
+    with stage("render preview"), open(out_path, "w", encoding="utf-8") as out:
+        out.write(apply_redactions(backend.header("Code Review Report", names)))
+        for sheet in reports:
+            with stage("sheet", sheet=sheet.name):
+                contents = report_contents(sheet.name, sheet.report, backend.snippet)
+                if contents is not None:
+                    out.write(apply_redactions(backend.sheet(sheet.name, *contents)))
+        out.write(apply_redactions(backend.codes_table(catalogue)))
+        out.write(backend.footer())
+    print(f"👁️  Preview of {len(names)} sheet(s) written to {out_path}")
+
+
+def watch_exports(run_pass, full, snippet_options, interval=0.2, debounce=0.3):
+    """
+    Run run_pass(full), then run_pass(False) every time one of the inputs is
+    saved, until interrupted. Errors (e.g. a workbook caught half-written) are
+    reported and the next save is waited for.
+    """
+
+    def take_snapshot():
+        return watch.snapshot(
+            [
+                input_file,
+                codes_mapping_file,
+                redaction_file,
+                *template_files,
+                *source_files(snippet_options),
+            ]
+        )
+
+    state = take_snapshot()
+    changed = None
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                run_pass(full)
+                print(f"Done in {time.perf_counter() - start:.2f}s.")
+            except ExportError as e:
+                print(f"ERROR: {e}", file=sys.stderr)
+            # --full only applies to the first pass
+            full = False
+            print(f"👀 Watching {input_file} and the other inputs (Ctrl+C to stop)...")
+            state, changed = watch.wait_for_change(
+                take_snapshot, state, interval, debounce
+            )
+            print(f"\n🔁 Changed: {', '.join(changed)}")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export CodeReviews.xlsx to LaTeX.")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="ignore the export manifest and regenerate every output",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="number of worker processes for rendering sheets (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--redact-ignore-case",
+        action="store_true",
+        help="match redactions.csv entries case-insensitively",
+    )
+    parser.add_argument(
+        "--redact-normalize",
+        choices=["NFC", "NFKC"],
+        help="Unicode-normalize redaction patterns and output text before matching",
+    )
+    parser.add_argument(
+        "--source-root",
+        type=Path,
+        default=source_root,
+        help="directory of the reviewed sources cited by the Line column",
+    )
+    parser.add_argument(
+        "--snippet-context",
+        type=int,
+        default=2,
+        metavar="N",
+        help="lines of code shown around each cited line",
+    )
+    parser.add_argument(
+        "--no-snippets",
+        action="store_true",
+        help="do not embed the cited source lines under the findings",
+    )
+    parser.add_argument(
+        "--dedupe",
+        choices=dedupe.MODES,
+        help="flag near-duplicate findings of a sheet, or merge them into the first one",
+    )
+    parser.add_argument(
+        "--dedupe-threshold",
+        type=float,
+        default=dedupe.THRESHOLD,
+        metavar="J",
+        help="minimum text similarity (Jaccard, 0-1) of two duplicates",
     )
-    print(f"📄 Created {review_list_file}")
-
-# Generate codes_table
-generate_codes_table(CODES_MAPPING_RAW, codes_table_file)
-
-# Copy master template if it exists (safe)
-files_to_copy = ["main_report.tex", "main.tex", "summary.tex", "cover_page.tex"]
-
-for filename in files_to_copy:
-    src = Path(filename)
-    dst = export_dir / src.name
-    if not src.exists():
-        print(f"ℹ️  {src} not found; skipping copy.")
-        continue
-
-    # Simple heuristic for text files:
-    if src.suffix.lower() in {".tex", ".txt", ".md"}:
-        try:
-            content = src.read_text(encoding="utf-8")
-            redacted = apply_redactions(content)
-            dst.write_text(redacted, encoding="utf-8")
-            print(f"📄 Copied and redacted {src} to {dst}")
-        except Exception as e:
-            print(f"⚠️ Failed to redact {src}, copying raw: {e}")
-            shutil.copy(src, dst)
+    parser.add_argument(
+        "--dedupe-window",
+        type=int,
+        default=dedupe.WINDOW,
+        metavar="LINES",
+        help="maximum distance between the lines cited by two duplicates",
+    )
+    parser.add_argument(
+        "--include-units",
+        action="store_true",
+        help="list the sections as \\include units and write includeonly.tex with "
+        "the sections this export rewrote",
+    )
+    parser.add_argument(
+        "--include-only",
+        nargs="+",
+        metavar="SHEET",
+        help="like --include-units, but includeonly.tex lists the sheets matching "
+        "these names or glob patterns ('*' for all)",
+    )
+    parser.add_argument(
+        "--preview",
+        choices=sorted(preview.BACKENDS),
+        help="write a single HTML or Markdown preview instead of the LaTeX export",
+    )
+    parser.add_argument(
+        "--preview-output",
+        type=Path,
+        metavar="FILE",
+        help=f"preview file (default: {preview_output}.html or .md)",
+    )
+    parser.add_argument(
+        "--from-db",
+        type=Path,
+        metavar="DB",
+        help="read the reviews from a database written by `acript db ingest` "
+        "instead of the workbook",
+    )
+    parser.add_argument(
+        "--db-workbook",
+        metavar="LABEL",
+        help="workbook of the --from-db database (default: the last one ingested)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and re-export whenever an input file is saved",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.2,
+        metavar="SECONDS",
+        help="how often --watch checks the inputs",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.3,
+        metavar="SECONDS",
+        help="how long the inputs must stay unchanged before --watch re-exports",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the time and peak memory of every stage and sheet",
+    )
+    parser.add_argument(
+        "--profile-trace",
+        type=Path,
+        metavar="FILE",
+        help="also write the profile as a Chrome trace-event JSON file (implies --profile)",
+    )
+    args = parser.parse_args(argv)
+    if args.from_db:
+        from review_db import ReviewStore
+
+        global input_file, parse_cache
+        input_file = args.from_db
+        parse_cache = ReviewStore(args.from_db, args.db_workbook)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    if args.profile or args.profile_trace:
+        profiling.start(args.profile_trace)
+
+    redaction_options = (args.redact_ignore_case, args.redact_normalize)
+    snippet_options = (
+        args.source_root,
+        -1 if args.no_snippets else max(args.snippet_context, 0),
+    )
+    dedupe_options = (args.dedupe, args.dedupe_threshold, args.dedupe_window)
+    if args.include_only:
+        include_only = tuple(args.include_only)
+    else:
+        include_only = () if args.include_units else None
+    if args.preview:
+        preview_file = args.preview_output or preview_output.with_suffix(
+            preview.BACKENDS[args.preview].suffix
+        )
+
+        def run_pass(full):
+            export_preview(
+                args.preview,
+                preview_file,
+                redaction_options,
+                snippet_options,
+                dedupe_options,
+            )
+
     else:
-        # Binary or unknown file: copy as-is
-        shutil.copy(src, dst)
-        print(f"📄 Copied {src} to {dst} (binary/no redaction)")
+
+        def run_pass(full):
+            export_once(
+                jobs,
+                full,
+                redaction_options,
+                snippet_options,
+                dedupe_options,
+                include_only,
+            )
+
+    if args.watch:
+        watch_exports(
+            run_pass, args.full, snippet_options, args.poll_interval, args.debounce
+        )
+        return
+
+    try:
+        run_pass(args.full)
+    except ExportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(e.status)
+    print("Done.")
 
 
-print("Done.")
+if __name__ == "__main__":
+    main()
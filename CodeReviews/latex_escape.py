@@ -0,0 +1,136 @@
+"""
+latex_escape.py
+
+Table-driven LaTeX escaping used by the exporters.
+
+The rules are the same as the original character-by-character sanitize_latex:
+ - newlines become spaces and the text is stripped,
+ - LaTeX special characters are escaped through a translation table,
+ - the breakable punctuation ".,/:-_" gets a trailing \\allowbreak{} when it is
+   followed by a non-space character (underscores are escaped as \\_),
+ - runs of whitespace are collapsed to a single space.
+
+Instead of walking each string in Python, the work is done by str.translate and
+a few precompiled regexes. Whole columns are escaped in one batch (the distinct
+values are joined, escaped in a single pass and split again) and results are
+memoized, so repeated strings such as check-code descriptions and reviewer
+names are only escaped once.
+"""
+import re
+
+# Map of LaTeX special characters to their escaped versions
+ESCAPE_TABLE = str.maketrans(
+    {
+        "\\": r"\textbackslash{}",  # Backslash
+        "&": r"\&",  # Ampersand
+        "%": r"\%",  # Percent
+        "$": r"\$",  # Dollar sign
+        "#": r"\#",  # Hash
+        "{": r"\{",  # Left brace
+        "}": r"\}",  # Right brace
+        "~": r"\textasciitilde{}",  # Tilde
+        "^": r"\textasciicircum{}",  # Caret
+        "|": r"\textbar{}",  # pipe
+    }
+)
+
+# Newlines are turned into spaces before anything else, so that punctuation at
+# the end of a line does not get a break hint.
+NEWLINE_TABLE = str.maketrans({"\r": " ", "\n": " "})
+
+# Breakable punctuation followed by a non-space character. None of the escape
+# sequences above contains these characters or starts with a space, so running
+# these after the translation gives the same result as the per-character loop.
+_UNDERSCORE_RE = re.compile(r"_(?=[^ ])")
+_PUNCT_RE = re.compile(r"([.,/:-])(?=[^ ])")
+_SPACES_RE = re.compile(r"\s+")
+
+# Values are joined with this separator when a column is escaped in one batch.
+# It starts with a space, so punctuation at the end of a value is not made
+# breakable, and values are stripped, so whitespace collapsing cannot eat it.
+_BATCH_SEP = " \x00 "
+
+# Memoized results (raw string -> escaped string)
+_CACHE_MAX = 100_000
+_cache = {}
+
+
+def _is_missing(value):
+    """True for None and float NaN, the values that are rendered as ''."""
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _escape_block(s):
+    """Escape an already newline-normalized, stripped string (or batch)."""
+    s = s.translate(ESCAPE_TABLE)
+    s = _UNDERSCORE_RE.sub(r"\\_\\allowbreak{}", s)
+    s = _PUNCT_RE.sub(r"\1\\allowbreak{}", s)
+    return _SPACES_RE.sub(" ", s)
+
+
+def _escape_str(s):
+    """Escape a single string, without the memo."""
+    s = s.translate(NEWLINE_TABLE).strip()
+    return _escape_block(s).strip()
+
+
+def _remember(raw, escaped):
+    if len(_cache) >= _CACHE_MAX:
+        _cache.clear()
+    _cache[raw] = escaped
+
+
+def sanitize_latex(text):
+    """
+    Escape LaTeX special characters and make certain punctuation breakable.
+    Returns "" for None/NaN.
+    """
+    if _is_missing(text):
+        return ""
+    s = str(text)
+    escaped = _cache.get(s)
+    if escaped is None:
+        escaped = _escape_str(s)
+        _remember(s, escaped)
+    return escaped
+
+
+# Code lines (snippets under the findings) keep their characters as they are:
+# no break hints, underscores escaped, indentation as non-breaking spaces.
+CODE_ESCAPE_TABLE = {**ESCAPE_TABLE, ord("_"): r"\_"}
+CODE_TAB_WIDTH = 4
+
+
+def sanitize_code_line(text):
+    """Escape one line of source code for \\ttfamily text."""
+    text = text.rstrip().expandtabs(CODE_TAB_WIDTH)
+    body = text.lstrip(" ")
+    indent = "~" * (len(text) - len(body))
+    return indent + _SPACES_RE.sub(" ", body.translate(CODE_ESCAPE_TABLE))
+
+
+def sanitize_latex_column(values):
+    """
+    Escape a whole column (pandas Series or any iterable) in one batch.
+    Returns a list of escaped strings in the same order.
+    """
+    raws = ["" if _is_missing(v) else str(v) for v in values]
+
+    # Escape the distinct values we have not seen yet in a single pass
+    pending = {}
+    for raw in raws:
+        if raw not in _cache and raw not in pending:
+            pending[raw] = raw.translate(NEWLINE_TABLE).strip()
+    if pending:
+        batch = [s for s in pending.values() if s]
+        if any("\x00" in s for s in batch):
+            # Cannot use the separator; fall back to one value at a time
+            escaped_batch = [_escape_block(s).strip() for s in batch]
+        else:
+            escaped_batch = _escape_block(_BATCH_SEP.join(batch)).split(_BATCH_SEP)
+        escaped_iter = iter(escaped_batch)
+        for raw, stripped in pending.items():
+            _remember(raw, next(escaped_iter).strip() if stripped else "")
+
+    cache = _cache
+    return [cache[raw] if raw in cache else sanitize_latex(raw) for raw in raws]
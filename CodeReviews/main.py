@@ -1,6 +1,98 @@
-def main():
-    print("Hello from acript!")
+"""
+main.py
+
+acript: one entry point for the review tools, run from the directory that
+holds CodeReviews.xlsx.
+
+    python main.py export      # export_reviews.py: LaTeX sections in output_tex/
+    python main.py analyze     # analysis.py: horizontal summary sheet
+    python main.py dedupe      # dedupe.py: report of near-duplicate findings
+    python main.py db          # review_db.py: SQLite store and queries
+    python main.py to-csv      # xlsx/excel_to_csv.py
+    python main.py to-xlsx     # xlsx/csv_to_excel.py
+    python main.py batch       # xlsx/batch_convert.py: whole directory trees
+    python main.py annotate    # provided_src/annonate-line-java-file.py
+
+Everything after the command goes to that tool (`python main.py export
+--help`). A tool's module is imported only when its command runs, so pandas
+and openpyxl are loaded only by the commands that use them, and `--help` or
+`annotate` start without them.
+"""
+import argparse
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# command -> (module file relative to ROOT, summary)
+COMMANDS = {
+    "export": ("export_reviews.py", "export CodeReviews.xlsx to LaTeX sections"),
+    "analyze": ("analysis.py", "write the review statistics summary sheet"),
+    "dedupe": ("dedupe.py", "report findings logged twice in different words"),
+    "db": ("review_db.py", "ingest the workbook into SQLite and query findings"),
+    "to-csv": ("xlsx/excel_to_csv.py", "export every sheet of a workbook to CSV"),
+    "to-xlsx": ("xlsx/csv_to_excel.py", "combine indexed CSV files into a workbook"),
+    "batch": (
+        "xlsx/batch_convert.py",
+        "convert every workbook or CSV bundle under a directory tree",
+    ),
+    "annotate": (
+        "provided_src/annonate-line-java-file.py",
+        "add (or --strip) /*N*/ line numbers in Java files",
+    ),
+}
+
+
+def load_command(command):
+    """Import the module of a command (its directory goes on sys.path)."""
+    path = ROOT / COMMANDS[command][0]
+    # Tools import their siblings by plain module name
+    if str(path.parent) not in sys.path:
+        sys.path.insert(0, str(path.parent))
+    if path.stem.isidentifier():
+        return importlib.import_module(path.stem)
+    # annonate-line-java-file.py is not a valid module name
+    name = path.stem.replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="acript",
+        description="Code review tools.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n"
+        + "\n".join(
+            f"  {name:<10} {summary}" for name, (_, summary) in COMMANDS.items()
+        )
+        + "\n\nRun 'acript COMMAND --help' for the options of a command.",
+    )
+    parser.add_argument(
+        "command", choices=COMMANDS, metavar="COMMAND", help="one of the commands below"
+    )
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="options of the command")
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS:
+        # Usage errors and --help exit here
+        build_parser().parse_args(argv)
+        return 2
+
+    command, *args = argv
+    module = load_command(command)
+    # Usage and help messages of the tool read "acript COMMAND"
+    sys.argv[0] = f"acript {command}"
+    return module.main(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
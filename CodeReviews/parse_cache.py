@@ -0,0 +1,289 @@
+"""
+parse_cache.py
+
+On-disk parse cache for the review workbook, shared by export_reviews.py and
+analysis.py.
+
+Parsing CodeReviews.xlsx through openpyxl (unzipping, XML parsing and cell
+type conversion) is the slowest step of both tools. The cache stores, for every
+sheet, the result of workbook_reader.split_report (metadata block and review
+table) in a pickled column-per-tuple layout, so a reload is a single fast
+unpickle per sheet.
+
+Keys:
+ - the sha256 of the workbook file: when it is unchanged, the sheet list is
+   taken from the manifest without opening the xlsx at all;
+ - a fingerprint per sheet, computed from the raw sheet XML inside the xlsx
+   (with shared-string indices replaced by the strings themselves, since
+   saving renumbers the shared strings of every sheet) plus the number formats
+   it depends on. Only sheets whose fingerprint is not cached are parsed again.
+
+Entries that no manifest refers to any more are evicted after each load.
+"""
+import hashlib
+import json
+import pickle
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from pathlib import Path
+
+from workbook_reader import iter_rows, open_workbook, split_report
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = Path(".parse_cache")
+MAX_MANIFESTS = 8  # number of workbooks remembered at once
+
+# One sheet of a loaded workbook.
+#   report: split_report() result (None when the sheet is not a report)
+#   rows:   every row of the sheet, only for sheets requested in full_sheets
+SheetData = namedtuple("SheetData", ["name", "report", "rows"])
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_SI_RE = re.compile(rb"<(?:\w+:)?si\b(?:[^>]*/>|.*?</(?:\w+:)?si>)", re.S)
+# Body of every cell with t="s" (self-closing cells have no value)
+_SST_CELL_RE = re.compile(
+    rb'<(?:\w+:)?c\b[^>]*?\bt="s"[^>]*(?<!/)>(.*?)</(?:\w+:)?c>', re.S
+)
+_VALUE_RE = re.compile(rb"<(?:\w+:)?v>\s*(\d+)\s*<")
+# Parts of styles.xml / workbook.xml that change how numbers are converted
+_STYLE_RE = re.compile(rb"<(?:\w+:)?(numFmts|cellXfs)\b.*?</(?:\w+:)?\1>", re.S)
+_WORKBOOK_PR_RE = re.compile(rb"<(?:\w+:)?workbookPr\b[^>]*>")
+
+
+def file_sha256(path):
+    """sha256 of a file's contents (hex)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _part_path(target):
+    """Resolve a relationship target of xl/workbook.xml to a zip member name."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+def _hash_sheet(h, data, strings):
+    """
+    Add a sheet part to hash h with the index of every shared-string cell
+    replaced by its string, so edits elsewhere in the workbook that renumber
+    the shared strings leave the fingerprint alone.
+    """
+    pos = 0
+    for cell in _SST_CELL_RE.finditer(data):
+        m = _VALUE_RE.search(data, *cell.span(1))
+        if m is None:
+            continue
+        index = int(m.group(1))
+        h.update(data[pos : m.start(1)])
+        h.update(strings[index] if index < len(strings) else m.group(1))
+        pos = m.end(1)
+    h.update(data[pos:])
+
+
+def sheet_fingerprints(path):
+    """
+    Return [(sheet_name, fingerprint)] in workbook order, computed from the raw
+    xlsx parts without parsing any cells.
+    """
+    with zipfile.ZipFile(path) as zf:
+        names = set(zf.namelist())
+        rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        targets = {}
+        shared_strings_part = "xl/sharedStrings.xml"
+        styles_part = "xl/styles.xml"
+        for rel in rels.iter(_NS_PKG_REL + "Relationship"):
+            part = _part_path(rel.get("Target"))
+            targets[rel.get("Id")] = part
+            if rel.get("Type", "").endswith("/sharedStrings"):
+                shared_strings_part = part
+            elif rel.get("Type", "").endswith("/styles"):
+                styles_part = part
+
+        workbook_xml = zf.read("xl/workbook.xml")
+        strings = []
+        if shared_strings_part in names:
+            strings = _SI_RE.findall(zf.read(shared_strings_part))
+
+        common = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+        common.update(b"".join(_WORKBOOK_PR_RE.findall(workbook_xml)))
+        if styles_part in names:
+            for m in _STYLE_RE.finditer(zf.read(styles_part)):
+                common.update(m.group(0))
+
+        result = []
+        for sheet in ET.fromstring(workbook_xml).iter(_NS_MAIN + "sheet"):
+            name = sheet.get("name")
+            part = targets.get(sheet.get(_NS_REL + "id"))
+            h = common.copy()
+            if part in names:
+                _hash_sheet(h, zf.read(part), strings)
+            result.append((name, h.hexdigest()))
+        return result
+
+
+def _to_columns(rows):
+    """Store rows as (row_count, [column tuples]), padding short rows."""
+    rows = list(rows)
+    width = max((len(r) for r in rows), default=0)
+    padded = [tuple(r) + (None,) * (width - len(r)) for r in rows]
+    return len(rows), list(zip(*padded))
+
+
+def _from_columns(stored):
+    count, columns = stored
+    if not columns:
+        return [()] * count
+    return list(zip(*columns))
+
+
+def _pack(report, rows):
+    if report is not None:
+        meta_rows, table_rows = report
+        report = (
+            _to_columns(meta_rows),
+            None if table_rows is None else _to_columns(table_rows),
+        )
+    return {"report": report, "rows": None if rows is None else _to_columns(rows)}
+
+
+def _unpack(entry):
+    report = entry["report"]
+    if report is not None:
+        meta, table = report
+        report = (_from_columns(meta), None if table is None else _from_columns(table))
+    rows = None if entry["rows"] is None else _from_columns(entry["rows"])
+    return report, rows
+
+
+class ParseCache:
+    """Cache of parsed workbooks under cache_dir (see module docstring)."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.sheets_dir = self.cache_dir / "sheets"
+        self.manifest_file = self.cache_dir / "manifest.json"
+        self._last_fingerprints = None  # (stat key, digest, fingerprints)
+
+    def _read_manifest(self):
+        try:
+            manifest = json.loads(self.manifest_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != CACHE_VERSION:
+            return {}
+        return manifest.get("workbooks", {})
+
+    def _write_manifest(self, workbooks):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data = {"version": CACHE_VERSION, "workbooks": workbooks}
+        self.manifest_file.write_text(json.dumps(data), encoding="utf-8")
+
+    def _entry_path(self, fingerprint):
+        return self.sheets_dir / f"{fingerprint}.pkl"
+
+    def _read_entry(self, fingerprint):
+        try:
+            with self._entry_path(fingerprint).open("rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _write_entry(self, fingerprint, entry):
+        self.sheets_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._entry_path(fingerprint).with_suffix(".tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(self._entry_path(fingerprint))
+
+    def _evict(self, workbooks):
+        """Drop sheet entries that no remembered workbook refers to."""
+        live = {fp for wb in workbooks.values() for _, fp in wb["sheets"]}
+        if not self.sheets_dir.exists():
+            return
+        for entry in self.sheets_dir.iterdir():
+            if entry.stem not in live:
+                entry.unlink(missing_ok=True)
+
+    def fingerprints(self, path):
+        """
+        Return (sha256, [(sheet_name, fingerprint)]) for the workbook at path.
+        Only reads the xlsx parts when the file's sha256 is not in the manifest.
+        """
+        path = Path(path)
+        stat = path.stat()
+        stat_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        if self._last_fingerprints and self._last_fingerprints[0] == stat_key:
+            return self._last_fingerprints[1:]
+
+        digest = file_sha256(path)
+        known = self._read_manifest().get(stat_key[0])
+        if known and known["sha256"] == digest:
+            fingerprints = [tuple(s) for s in known["sheets"]]
+        else:
+            fingerprints = sheet_fingerprints(path)
+        self._last_fingerprints = (stat_key, digest, fingerprints)
+        return digest, fingerprints
+
+    def load(self, path, full_sheets=(), names=None):
+        """
+        Return [SheetData] for every sheet of the workbook at path (or only the
+        sheets in names), in workbook order, parsing only the sheets that are
+        not cached yet. Sheets named in full_sheets also get all of their rows.
+        """
+        path = Path(path)
+        digest, fingerprints = self.fingerprints(path)
+        key = str(path.resolve())
+        workbooks = self._read_manifest()
+        wanted = [(n, fp) for n, fp in fingerprints if names is None or n in names]
+
+        loaded = {}
+        missing = []
+        for name, fp in wanted:
+            entry = self._read_entry(fp)
+            if entry is None or (name in full_sheets and entry["rows"] is None):
+                missing.append((name, fp))
+            else:
+                loaded[name] = _unpack(entry)
+
+        if missing:
+            wb = open_workbook(path)
+            try:
+                for name, fp in missing:
+                    ws = wb[name]
+                    report, rows = None, None
+                    if hasattr(ws, "iter_rows"):  # chartsheets have no cells
+                        sheet_rows = iter_rows(ws)
+                        if name in full_sheets:
+                            rows = list(sheet_rows)
+                            sheet_rows = rows
+                        report = split_report(sheet_rows)
+                    loaded[name] = (report, rows)
+                    try:
+                        self._write_entry(fp, _pack(report, rows))
+                    except OSError:
+                        pass  # the cache is best-effort
+            finally:
+                wb.close()
+
+        workbooks.pop(key, None)
+        workbooks[key] = {"sha256": digest, "sheets": [list(s) for s in fingerprints]}
+        # keep only the most recently used workbooks
+        for old in list(workbooks)[:-MAX_MANIFESTS]:
+            del workbooks[old]
+        try:
+            self._write_manifest(workbooks)
+            self._evict(workbooks)
+        except OSError:
+            pass
+
+        return [SheetData(name, *loaded[name]) for name, _ in wanted]
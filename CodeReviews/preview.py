@@ -0,0 +1,263 @@
+"""
+preview.py
+
+HTML and Markdown renderers for export_reviews.py --preview: a single
+self-contained file with the same per-sheet sections, per-reviewer tables,
+code snippets and codes table as the LaTeX export, readable without a TeX
+installation.
+
+The renderers only format what export_reviews.py already extracted
+(extract_metadata, and the ReviewRows of review_rows.py grouped by reviewer):
+each backend supplies the snippet renderer used by sheet_snippets and
+escapes the raw row values as it turns a sheet into one chunk of text.
+export_reviews.py redacts and writes the chunks one sheet at a time.
+
+Like the LaTeX export, line breaks inside cells are folded into spaces.
+"""
+import html
+import re
+
+NEWLINE_TABLE = str.maketrans({"\r": " ", "\n": " "})
+
+HTML_STYLE = """\
+body { font-family: system-ui, sans-serif; margin: 2em auto; max-width: 70em; color: #222; }
+h2 { border-bottom: 1px solid #ccc; padding-bottom: .2em; margin-top: 2em; }
+table { border-collapse: collapse; margin: .5em 0 1em; width: 100%; }
+th, td { border: 1px solid #ddd; padding: .3em .5em; text-align: left; vertical-align: top; }
+th { background: #f4f4f4; }
+table.meta { width: auto; }
+table.meta th { background: none; white-space: nowrap; }
+td.code, th.code { width: 5em; }
+td.line, th.line { width: 6em; }
+pre { margin: 0; font-size: .85em; background: #fafafa; }
+pre b { background: #fff3b0; }
+nav li { margin: .1em 0; }
+"""
+
+
+def _text(value):
+    """Cell value as one line of text ("" for missing values)."""
+    if value is None or (isinstance(value, float) and value != value):  # NaN
+        return ""
+    return str(value).translate(NEWLINE_TABLE).strip()
+
+
+def _column(values, escape):
+    """Escape a column, escaping each distinct value once."""
+    done = {}
+    out = []
+    for value in values:
+        text = _text(value)
+        if text not in done:
+            done[text] = escape(text)
+        out.append(done[text])
+    return out
+
+
+def _cells(rows, escape, snippet):
+    """
+    (code, line, comment, suggestion, snippet) of each ReviewRow, escaped
+    with escape; snippet is "" when there is no snippet function.
+    """
+    columns = [
+        _column([getattr(r, name) for r in rows], escape)
+        for name in ("code", "line", "comment", "suggestion")
+    ]
+    snippets = [snippet(r.line) if snippet else "" for r in rows]
+    return list(zip(*columns, snippets))
+
+
+def anchor(sheet_name):
+    return "sheet-" + re.sub(r"[^A-Za-z0-9_-]+", "-", sheet_name)
+
+
+class HtmlPreview:
+    suffix = ".html"
+
+    @staticmethod
+    def escape(text):
+        return html.escape(text, quote=False)
+
+    def snippet(self, lines):
+        """Numbered code lines [(n, text, cited)]; cited lines in bold."""
+        width = len(str(lines[-1][0]))
+        body = []
+        for n, text, cited in lines:
+            code = html.escape(text.rstrip(), quote=False)
+            if cited and code:
+                code = f"<b>{code}</b>"
+            body.append(f"{n:>{width}}: {code}")
+        return "<pre>" + "\n".join(body) + "</pre>"
+
+    def header(self, title, sheet_names):
+        toc = "".join(
+            f'<li><a href="#{anchor(name)}">{self.escape(name)}</a></li>\n'
+            for name in sheet_names
+        )
+        return (
+            '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+            f"<title>{self.escape(title)}</title>\n<style>\n{HTML_STYLE}</style>\n"
+            f"</head>\n<body>\n<h1>{self.escape(title)}</h1>\n"
+            f'<nav><ul>\n{toc}<li><a href="#check-codes">Check codes</a></li>\n'
+            "</ul></nav>\n"
+        )
+
+    def sheet(self, sheet_name, metadata, grouped, snippet=None):
+        out = [f'<section id="{anchor(sheet_name)}">']
+        out.append(f"<h2>{self.escape(sheet_name)}</h2>")
+        out.append('<table class="meta">')
+        for key, values in metadata:
+            for i, value in enumerate(values):
+                key_html = self.escape(key) if i == 0 else ""
+                out.append(f"<tr><th>{key_html}</th><td>{self.escape(value)}</td></tr>")
+        out.append("</table>")
+
+        if not grouped:
+            out.append("<p><i>No review rows found.</i></p>")
+        for reviewer, rows in grouped.items():
+            out.append(f"<h3>Reviewer: {self.escape(reviewer)}</h3>")
+            out.append("<table>")
+            out.append(
+                '<tr><th class="code">Code</th><th class="line">Line</th>'
+                "<th>Comment</th><th>Suggestion / Fix</th></tr>"
+            )
+            for code, line, comment, suggestion, code_html in _cells(
+                rows, self.escape, snippet
+            ):
+                out.append(
+                    f'<tr><td class="code">{code}</td><td class="line">{line}</td>'
+                    f"<td>{comment}</td><td>{suggestion}</td></tr>"
+                )
+                if code_html:
+                    out.append(f'<tr><td colspan="4">{code_html}</td></tr>')
+            out.append("</table>")
+        out.append("</section>\n")
+        return "\n".join(out)
+
+    def codes_table(self, catalogue):
+        out = ['<section id="check-codes">', "<h2>Check codes</h2>"]
+        table_open = False
+        for kind, value in catalogue.outline:
+            if kind != "code" and table_open:
+                out.append("</table>")
+                table_open = False
+            if kind == "section":
+                out.append(f"<h3>{self.escape(value)}</h3>")
+            elif kind == "subsection":
+                out.append(f"<h4>{self.escape(value)}</h4>")
+            else:
+                if not table_open:
+                    out.append(
+                        '<table><tr><th class="code">Check Code</th>'
+                        "<th>Check code description</th></tr>"
+                    )
+                    table_open = True
+                entry = catalogue.entries[value]
+                out.append(
+                    f'<tr><td class="code">{entry.code}</td>'
+                    f"<td>{self.escape(entry.description.strip())}</td></tr>"
+                )
+        if table_open:
+            out.append("</table>")
+        out.append("</section>\n")
+        return "\n".join(out)
+
+    def footer(self):
+        return "</body>\n</html>\n"
+
+
+class MarkdownPreview:
+    suffix = ".md"
+
+    _SPECIAL_RE = re.compile(r"([\\`*_{}\[\]<>|#])")
+
+    @classmethod
+    def escape(cls, text):
+        return cls._SPECIAL_RE.sub(r"\\\1", text)
+
+    def snippet(self, lines):
+        """Numbered code lines [(n, text, cited)]; cited lines marked with '>'."""
+        width = len(str(lines[-1][0]))
+        body = [
+            f"{'>' if cited else ' '}{n:>{width}}: {text.rstrip()}"
+            for n, text, cited in lines
+        ]
+        # The fence must be longer than any run of backticks in the code
+        fence = "`" * max(
+            [3, *(len(run) + 1 for run in re.findall("`+", "\n".join(body)))]
+        )
+        return f"{fence}java\n" + "\n".join(body) + f"\n{fence}"
+
+    def header(self, title, sheet_names):
+        toc = "".join(
+            f"- [{self.escape(name)}](#{anchor(name)})\n" for name in sheet_names
+        )
+        return f"# {self.escape(title)}\n\n{toc}- [Check codes](#check-codes)\n\n"
+
+    def _table(self, head, rows):
+        lines = ["| " + " | ".join(head) + " |", "|" + "---|" * len(head)]
+        lines.extend("| " + " | ".join(row) + " |" for row in rows)
+        return lines
+
+    def sheet(self, sheet_name, metadata, grouped, snippet=None):
+        out = [f'<a id="{anchor(sheet_name)}"></a>', ""]
+        out.append(f"## {self.escape(sheet_name)}")
+        out.append("")
+        meta_rows = [
+            (f"**{self.escape(key)}**" if i == 0 else "", self.escape(value))
+            for key, values in metadata
+            for i, value in enumerate(values)
+        ]
+        out.extend(self._table(["", ""], meta_rows))
+        out.append("")
+
+        if not grouped:
+            out.append("*No review rows found.*")
+            out.append("")
+        for reviewer, rows in grouped.items():
+            out.append(f"### Reviewer: {self.escape(reviewer)}")
+            out.append("")
+            cells = _cells(rows, self.escape, snippet)
+            out.extend(
+                self._table(
+                    ["Code", "Line", "Comment", "Suggestion / Fix"],
+                    [c[:4] for c in cells],
+                )
+            )
+            out.append("")
+            # Tables cannot hold code blocks: the cited code follows the table
+            for code, line, _, _, code_md in cells:
+                if code_md:
+                    out.append(f"Code {code}, line {line}:")
+                    out.append("")
+                    out.append(code_md)
+                    out.append("")
+        return "\n".join(out) + "\n"
+
+    def codes_table(self, catalogue):
+        out = ['<a id="check-codes"></a>', "", "## Check codes", ""]
+        rows = []
+
+        def flush():
+            if rows:
+                out.extend(self._table(["Check Code", "Check code description"], rows))
+                out.append("")
+                rows.clear()
+
+        for kind, value in catalogue.outline:
+            if kind == "code":
+                entry = catalogue.entries[value]
+                rows.append((str(entry.code), self.escape(entry.description.strip())))
+                continue
+            flush()
+            level = "###" if kind == "section" else "####"
+            out.append(f"{level} {self.escape(value)}")
+            out.append("")
+        flush()
+        return "\n".join(out) + "\n"
+
+    def footer(self):
+        return ""
+
+
+BACKENDS = {"html": HtmlPreview, "md": MarkdownPreview}
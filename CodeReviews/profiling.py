@@ -0,0 +1,202 @@
+"""
+profiling.py
+
+Opt-in per-stage instrumentation for export_reviews.py and analysis.py
+(--profile). Code is wrapped in named stages:
+
+    with stage("parse workbook"):
+        ...
+    with stage("sheet", sheet=name):
+        ...
+
+and each stage records its wall time, CPU time (of the process) and the peak
+of the memory traced by tracemalloc above its level when the stage started.
+Stages nest; a stage's peak includes the peaks of the stages inside it.
+
+While profiling is off, stage() returns one shared no-op context manager,
+so instrumented code costs a function call per stage. start() turns it on
+(and tracemalloc with it, which slows Python down noticeably) and prints the
+summary when the program exits, however it exits. Worker processes run
+their own profiler (start(report=False)) and send their records back with
+take_records(); the parent adds them with add_records().
+
+Records are (name, args, pid, start, wall, cpu, peak): start is a
+time.perf_counter() value, which is comparable across processes on one
+machine, so a trace can show the workers side by side. The trace is written
+in the Chrome trace-event format (chrome://tracing, https://ui.perfetto.dev).
+"""
+import atexit
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import nullcontext
+from pathlib import Path
+
+Record = namedtuple("Record", ["name", "args", "pid", "start", "wall", "cpu", "peak"])
+
+_NULL_STAGE = nullcontext()
+_profiler = None  # the active Profiler, None while profiling is off
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "args", "start", "cpu", "base", "peak")
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        current, peak = tracemalloc.get_traced_memory()
+        stack = self.profiler.stack
+        if stack:
+            # reset_peak() below forgets the enclosing stage's peak so far
+            stack[-1].peak = max(stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        self.base = current
+        self.peak = current
+        stack.append(self)
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.start
+        cpu = time.process_time() - self.cpu
+        peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        stack = self.profiler.stack
+        stack.pop()
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, peak)
+        self.profiler.records.append(
+            Record(
+                self.name,
+                self.args,
+                os.getpid(),
+                self.start,
+                wall,
+                cpu,
+                peak - self.base,
+            )
+        )
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.records = []
+        self.stack = []
+        self.origin = time.perf_counter()
+
+
+def start(trace_file=None, report=True):
+    """
+    Turn profiling on. With report=True the summary is printed (and the
+    trace written to trace_file, if given) when the program exits.
+    """
+    global _profiler
+    if _profiler is not None:
+        return
+    _profiler = Profiler()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if report:
+        atexit.register(_finish, trace_file)
+
+
+def enabled():
+    return _profiler is not None
+
+
+def stage(name, **args):
+    """Context manager timing the code it wraps as stage `name`."""
+    if _profiler is None:
+        return _NULL_STAGE
+    return _Stage(_profiler, name, args)
+
+
+def take_records():
+    """The records collected so far in this process (which are then cleared)."""
+    if _profiler is None:
+        return []
+    records, _profiler.records = _profiler.records, []
+    return records
+
+
+def add_records(records):
+    """Add records collected by another process (see take_records)."""
+    if _profiler is not None:
+        _profiler.records.extend(Record(*r) for r in records)
+
+
+def summarize(records, top_sheets=10):
+    """Lines of the summary: stages by total wall time, then slowest sheets."""
+    totals = {}
+    for r in records:
+        calls, wall, cpu, peak = totals.get(r.name, (0, 0.0, 0.0, 0))
+        totals[r.name] = (calls + 1, wall + r.wall, cpu + r.cpu, max(peak, r.peak))
+
+    lines = [
+        f"{'Stage':<28} {'Calls':>6} {'Wall s':>9} {'CPU s':>9} {'Peak MB':>9}",
+    ]
+    for name, (calls, wall, cpu, peak) in sorted(
+        totals.items(), key=lambda item: -item[1][1]
+    ):
+        lines.append(
+            f"{name[:28]:<28} {calls:>6} {wall:>9.3f} {cpu:>9.3f} {peak / 1e6:>9.1f}"
+        )
+
+    sheets = sorted(
+        (r for r in records if r.name == "sheet" and "sheet" in r.args),
+        key=lambda r: -r.wall,
+    )
+    if sheets:
+        lines.append("")
+        lines.append(
+            f"Slowest sheets ({min(top_sheets, len(sheets))} of {len(sheets)}):"
+        )
+        for r in sheets[:top_sheets]:
+            lines.append(
+                f"  {str(r.args['sheet'])[:40]:<40} {r.wall:>9.3f}s "
+                f"{r.cpu:>8.3f}s cpu {r.peak / 1e6:>7.1f} MB"
+            )
+    return lines
+
+
+def chrome_trace(records, origin):
+    """The records as a Chrome trace-event document (complete "X" events)."""
+    events = [
+        {
+            "name": r.name,
+            "ph": "X",
+            "ts": round((r.start - origin) * 1e6, 1),
+            "dur": round(r.wall * 1e6, 1),
+            "pid": r.pid,
+            "tid": r.pid,
+            "args": {
+                **{k: str(v) for k, v in r.args.items()},
+                "cpu_s": round(r.cpu, 6),
+                "peak_bytes": r.peak,
+            },
+        }
+        for r in records
+    ]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _finish(trace_file):
+    records = _profiler.records
+    print(
+        "\n--- Profile (wall/CPU time, tracemalloc peak per stage) ---", file=sys.stderr
+    )
+    for line in summarize(records):
+        print(line, file=sys.stderr)
+    if trace_file:
+        Path(trace_file).write_text(
+            json.dumps(chrome_trace(records, _profiler.origin)),
+            encoding="utf-8",
+        )
+        print(f"📈 Trace written to {trace_file}", file=sys.stderr)
@@ -1,31 +1,193 @@
+import argparse
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
+SUFFIX = "_annotated"
+WRITE_BUFFER = 1 << 20  # Bytes buffered per output file
+# " /*N*/" line-number marker added at the end of every line
+MARKER_RE = re.compile(r" /\*\d+\*/$", re.MULTILINE)
 
-def annotate_java_file(input_path):
+
+def annotated_path(input_path):
+    """Foo.java -> Foo_annotated.java"""
+    name, ext = os.path.splitext(input_path)
+    return f"{name}{SUFFIX}{ext}"
+
+
+def stripped_path(input_path):
+    """Foo_annotated.java -> Foo.java"""
+    name, ext = os.path.splitext(input_path)
+    return f"{name.removesuffix(SUFFIX)}{ext}"
+
+
+def annotate_text(text):
+    """Append a /*N*/ line-number comment to every line of text."""
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return "".join(f"{line} /*{i}*/\n" for i, line in enumerate(lines, start=1))
+
+
+def strip_text(text):
+    """Remove the /*N*/ markers added by annotate_text."""
+    return MARKER_RE.sub("", text)
+
+
+def is_up_to_date(input_path, output_path):
+    """True if output_path exists and is not older than input_path."""
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    except OSError:
+        return False
+
+
+def convert_file(input_path, output_path, transform):
+    """Read input_path in one go, transform it and write it in one go."""
+    with open(input_path, "r", encoding="utf-8") as infile:
+        text = transform(infile.read())
+    with open(output_path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as outfile:
+        outfile.write(text)
+
+
+def is_kept(input_path, output_path, force):
+    """
+    True (and say so) if output_path is up to date and not forced: it may hold
+    edits made after it was generated, e.g. to Foo.java after annotating it.
+    """
+    if force or not is_up_to_date(input_path, output_path):
+        return False
+    print(
+        f"Skipped: '{output_path}' is not older than '{input_path}' "
+        "(use --force to overwrite it)."
+    )
+    return True
+
+
+def annotate_java_file(input_path, force=False):
+    if not os.path.isfile(input_path):
+        print(f"Error: File '{input_path}' does not exist.")
+        return
+
+    output_path = annotated_path(input_path)
+    if is_kept(input_path, output_path, force):
+        return
+    convert_file(input_path, output_path, annotate_text)
+    print(f"Annotated file saved to: {output_path}")
+
+
+def strip_java_file(input_path, force=False):
     if not os.path.isfile(input_path):
         print(f"Error: File '{input_path}' does not exist.")
         return
 
-    dir_name, base_name = os.path.split(input_path)
-    name, ext = os.path.splitext(base_name)
-    output_path = os.path.join(dir_name, f"{name}_annotated{ext}")
+    output_path = stripped_path(input_path)
+    if is_kept(input_path, output_path, force):
+        return
+    convert_file(input_path, output_path, strip_text)
+    print(f"Stripped file saved to: {output_path}")
+
 
-    with (
-        open(input_path, "r", encoding="utf-8") as infile,
-        open(output_path, "w", encoding="utf-8") as outfile,
-    ):
-        for i, line in enumerate(infile, start=1):
-            stripped_line = line.rstrip("\n")
-            # Add inline comment at the end of the line
-            annotated_line = f"{stripped_line} /*{i}*/\n"
-            outfile.write(annotated_line)
+def find_sources(root, ext=".java", annotated=False):
+    """
+    Source files under root, sorted. With annotated=False these are the
+    files to annotate (skipping *_annotated files), otherwise only the
+    *_annotated files.
+    """
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            name, file_ext = os.path.splitext(filename)
+            if file_ext == ext and name.endswith(SUFFIX) == annotated:
+                found.append(os.path.join(dirpath, filename))
+    return found
 
-    print(f"Annotated file saved to: {output_path}")
+
+def convert_tree(root, strip=False, ext=".java", jobs=8, force=False):
+    """
+    Annotate (or, with strip=True, un-annotate) every source file under root
+    with a pool of threads. Files whose output is at least as recent as the
+    input are skipped unless force is set.
+    Returns (converted, skipped, failed) lists of input paths.
+    """
+    transform = strip_text if strip else annotate_text
+    output_for = stripped_path if strip else annotated_path
+
+    converted, skipped, failed = [], [], []
+    pending = []
+    for input_path in find_sources(root, ext, annotated=strip):
+        output_path = output_for(input_path)
+        if not force and is_up_to_date(input_path, output_path):
+            skipped.append(input_path)
+        else:
+            pending.append((input_path, output_path))
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        futures = [
+            (input_path, pool.submit(convert_file, input_path, output_path, transform))
+            for input_path, output_path in pending
+        ]
+        for input_path, future in futures:
+            try:
+                future.result()
+                converted.append(input_path)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error: '{input_path}': {e}")
+                failed.append(input_path)
+    return converted, skipped, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Add /*N*/ line-number comments to Java files (or remove them)."
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="Java files, or directories whose files are all converted",
+    )
+    parser.add_argument(
+        "--strip",
+        action="store_true",
+        help="remove the markers: Foo_annotated.java -> Foo.java",
+    )
+    parser.add_argument(
+        "--ext", default=".java", help="source file extension in directory mode"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=8,
+        metavar="N",
+        help="number of threads in directory mode",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="convert files even if their output is up to date "
+        "(overwriting edits made to it)",
+    )
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for path in args.paths:
+        if not os.path.isdir(path):
+            (strip_java_file if args.strip else annotate_java_file)(path, args.force)
+            continue
+        converted, skipped, failed = convert_tree(
+            path, args.strip, args.ext, args.jobs, args.force
+        )
+        failures += len(failed)
+        action = "Stripped" if args.strip else "Annotated"
+        print(
+            f"{action} {len(converted)} file(s) under '{path}' "
+            f"({len(skipped)} up to date, {len(failed)} failed)."
+        )
+    return 1 if failures else 0
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python annotate_java.py <path_to_java_file>")
-    else:
-        annotate_java_file(sys.argv[1])
+    sys.exit(main())
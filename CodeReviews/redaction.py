@@ -0,0 +1,284 @@
+"""
+redaction.py
+
+Multi-pattern redaction for the exported LaTeX (names, student IDs, emails...).
+
+The patterns from redactions.csv are compiled into a trie, and the trie is
+turned into a single regular expression with one branch per trie edge. This is
+the goto function of an Aho-Corasick automaton executed by the C regex engine:
+at every position at most one branch can continue, so matching no longer
+backtracks through thousands of alternatives. Greedy optional groups give the
+same leftmost-longest semantics as the old length-sorted alternation, and the
+replacement is a plain dict lookup on the matched text.
+
+Options:
+ - ignore_case: match regardless of case (keys are lowercased one character
+                at a time, the way re.IGNORECASE compares characters),
+ - normalize:   a unicodedata form (e.g. "NFC") applied to the patterns and to
+                the text, so precomposed and decomposed Vietnamese diacritics
+                match each other. The output text is normalized too.
+
+Files can be redacted as a stream of chunks; matches spanning a chunk boundary
+are handled by carrying the last (longest pattern - 1) characters over.
+Compiled tries are cached on disk, keyed by the CSV's sha256 and the options.
+"""
+import csv
+import hashlib
+import os
+import pickle
+import re
+import shutil
+import tempfile
+import unicodedata
+from pathlib import Path
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = Path(".parse_cache") / "redactors"
+CHUNK_SIZE = 1 << 16  # characters per read when streaming files
+
+_END = ""  # trie key marking the end of a pattern (real keys are 1 char)
+
+
+def read_redactions_csv(path):
+    """Read (original, replacement) pairs; later duplicates win."""
+    pairs = {}
+    with Path(path).open(encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                continue
+            pairs[row[0]] = row[1]
+    return pairs
+
+
+def _fold(text):
+    """
+    Lowercase text one character at a time, as re.IGNORECASE compares it.
+    str.casefold() turns "ß" into "ss" and str.lower() turns "İ" into two
+    characters and a final "Σ" into "ς", so their keys would not match the
+    text the regex matched.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text) and "ς" not in lowered:
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def _build_trie(keys):
+    trie = {}
+    for key in keys:
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[_END] = True
+    return trie
+
+
+def _trie_regex(node):
+    """Regex source matching exactly the keys of a trie (longest first)."""
+    parts = []
+    while True:
+        edges = [ch for ch in node if ch != _END]
+        # Follow single-edge chains iteratively to keep recursion shallow
+        if len(edges) == 1 and _END not in node:
+            parts.append(re.escape(edges[0]))
+            node = node[edges[0]]
+            continue
+        break
+
+    singles = []  # edges that end right after one character: [abc]
+    branches = []
+    for ch in sorted(edges):
+        child = node[ch]
+        if len(child) == 1 and _END in child:
+            singles.append(ch)
+        else:
+            branches.append(re.escape(ch) + _trie_regex(child))
+    if singles:
+        if len(singles) == 1:
+            branches.append(re.escape(singles[0]))
+        else:
+            branches.append("[" + "".join(_escape_class(c) for c in singles) + "]")
+
+    if branches:
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if _END in node:
+            # The key may stop here; the greedy group prefers the longer key
+            body = "(?:" + body + ")?"
+        parts.append(body)
+    return "".join(parts)
+
+
+def _escape_class(ch):
+    return "\\" + ch if ch in "\\]^-[" else ch
+
+
+class Redactor:
+    """Replace every original string by its replacement (see module docstring)."""
+
+    def __init__(self, pairs, ignore_case=False, normalize=None):
+        self.ignore_case = ignore_case
+        self.normalize = normalize
+        self.replacements = {}
+        for orig, repl in dict(pairs).items():
+            key = self._key(self._normalize(orig))
+            if key:  # an empty original would match everywhere
+                self.replacements[key] = repl
+        self.max_len = max((len(k) for k in self.replacements), default=0)
+        self.source = _trie_regex(_build_trie(self.replacements))
+        self._compile()
+
+    def _compile(self):
+        flags = re.IGNORECASE if self.ignore_case else 0
+        self.pattern = re.compile(self.source, flags) if self.replacements else None
+
+    def __bool__(self):
+        return self.pattern is not None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["pattern"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile()
+
+    def _normalize(self, text):
+        if self.normalize:
+            return unicodedata.normalize(self.normalize, text)
+        return text
+
+    def _key(self, text):
+        return _fold(text) if self.ignore_case else text
+
+    def _replace(self, match):
+        text = match.group(0)
+        repl = self.replacements.get(self._key(text))
+        if repl is None:
+            # re.IGNORECASE also treats a few distinct lowercase letters as
+            # one (σ and ς, s and ſ...): find the key the regex matched
+            for key, repl in self.replacements.items():
+                if len(key) == len(text) and re.fullmatch(
+                    re.escape(key), text, re.IGNORECASE
+                ):
+                    return repl
+            return text
+        return repl
+
+    @classmethod
+    def from_csv(
+        cls, path, ignore_case=False, normalize=None, cache_dir=DEFAULT_CACHE_DIR
+    ):
+        """
+        Build a Redactor from a redactions CSV, reusing the compiled trie from
+        cache_dir when the CSV and options are unchanged. A missing CSV gives
+        an empty Redactor.
+        """
+        path = Path(path)
+        if not path.exists():
+            return cls({})
+        h = hashlib.sha256(path.read_bytes())
+        h.update(f"v{CACHE_VERSION}|{ignore_case}|{normalize}".encode())
+        cache_file = Path(cache_dir) / f"{h.hexdigest()}.pkl"
+
+        try:
+            with cache_file.open("rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+        redactor = cls(read_redactions_csv(path), ignore_case, normalize)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # Only the current CSV is worth keeping
+            for old in cache_file.parent.glob("*.pkl"):
+                old.unlink(missing_ok=True)
+            with cache_file.open("wb") as f:
+                pickle.dump(redactor, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass  # the cache is best-effort
+        return redactor
+
+    def redact(self, text):
+        """Redact an in-memory string."""
+        if self.normalize:
+            text = self._normalize(text)
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+    def redact_stream(self, infile, outfile, chunk_size=CHUNK_SIZE):
+        """Redact text read from infile into outfile, one chunk at a time."""
+        if self.pattern is None and not self.normalize:
+            for chunk in iter(lambda: infile.read(chunk_size), ""):
+                outfile.write(chunk)
+            return
+
+        # Characters after the last position where a match may still grow
+        holdback = max(self.max_len - 1, 0)
+        raw_pending = ""
+        carry = ""
+        eof = False
+        while not eof:
+            chunk = infile.read(chunk_size)
+            eof = not chunk
+            raw = raw_pending + chunk
+            raw_pending = ""
+            if self.normalize and not eof:
+                # Do not normalize a base character apart from its marks
+                cut = len(raw) - 1
+                while cut > 0 and unicodedata.combining(raw[cut]):
+                    cut -= 1
+                raw, raw_pending = raw[:cut], raw[cut:]
+            buffer = carry + self._normalize(raw)
+
+            safe = len(buffer) if eof else len(buffer) - holdback
+            out = []
+            pos = 0
+            if self.pattern is not None:
+                for m in self.pattern.finditer(buffer):
+                    # A match starting before `safe` has seen max_len chars of
+                    # lookahead, so it cannot change when more text arrives
+                    if m.start() >= safe:
+                        break
+                    out.append(buffer[pos : m.start()])
+                    out.append(self._replace(m))
+                    pos = m.end()
+            if pos < safe:
+                out.append(buffer[pos:safe])
+                pos = safe
+            carry = buffer[pos:]
+            outfile.write("".join(out))
+
+    def redact_file(self, src, dst, chunk_size=CHUNK_SIZE):
+        """
+        Stream-redact the text file src into dst. dst is only replaced if the
+        result differs from its current bytes. Returns True if dst changed.
+        """
+        dst = Path(dst)
+        fd, tmp = tempfile.mkstemp(dir=dst.parent, prefix=f".{dst.name}.")
+        try:
+            with (
+                open(src, encoding="utf-8") as infile,
+                os.fdopen(fd, "w", encoding="utf-8") as outfile,
+            ):
+                self.redact_stream(infile, outfile, chunk_size)
+            if dst.exists() and _same_bytes(tmp, dst):
+                return False
+            shutil.copyfile(tmp, dst)
+            return True
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+
+def _same_bytes(a, b, block=1 << 20):
+    if os.path.getsize(a) != os.path.getsize(b):
+        return False
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        while True:
+            x, y = fa.read(block), fb.read(block)
+            if x != y:
+                return False
+            if not x:
+                return True
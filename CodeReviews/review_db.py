@@ -0,0 +1,513 @@
+"""
+review_db.py
+
+SQLite store of the review workbooks, one database for many of them (e.g. one
+workbook per semester, each under a label):
+
+    python review_db.py ingest CodeReviews.xlsx --label 2025-fall
+    python review_db.py query --code 28
+    python review_db.py query --reviewer "Reviewer 1" --sheet "*DAO*"
+    python review_db.py query --count-by sheet
+    python review_db.py sql "SELECT reviewer, count(*) FROM findings GROUP BY 1"
+    python review_db.py workbooks
+
+(also `acript db ...`). Tables:
+ - workbooks: label, path, sha256 and time of the last ingest;
+ - sheets: name, position and parse_cache fingerprint of every sheet, and its
+   metadata rows (JSON) for the read path;
+ - metadata: the (key, value) pairs of extract_metadata, one row per value;
+ - findings: every review row, with the check code and the cited lines parsed
+   into integer columns, indexed by check code, reviewer, sheet and line.
+The findings_view view joins the labels and sheet names for ad-hoc SQL.
+
+Ingesting reads the workbook through the parse cache and only rewrites the
+sheets whose fingerprint changed, each workbook in one transaction with bulk
+inserts.
+
+ReviewStore has the fingerprints() / load() interface of parse_cache.ParseCache,
+so export_reviews.py and analysis.py can read an ingested workbook
+(--from-db) instead of the xlsx.
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from pathlib import Path
+
+from check_catalogue import parse_code
+from parse_cache import ParseCache, SheetData
+from source_index import parse_line_spec
+from workbook_reader import extract_metadata
+
+DEFAULT_DB = Path("reviews.db")
+SCHEMA_VERSION = 1
+ROW_CELLS = 6  # code, description, line, comment, suggestion, reviewer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workbooks (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL UNIQUE,
+    path TEXT,
+    sha256 TEXT,
+    ingested_at TEXT
+);
+CREATE TABLE IF NOT EXISTS sheets (
+    id INTEGER PRIMARY KEY,
+    workbook_id INTEGER NOT NULL REFERENCES workbooks(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    is_report INTEGER NOT NULL,
+    has_table INTEGER NOT NULL,
+    meta_rows TEXT,
+    UNIQUE (workbook_id, name)
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    sheet_id INTEGER NOT NULL REFERENCES sheets(id) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    code INTEGER,
+    code_cell,
+    description,
+    line_cell,
+    line_first INTEGER,
+    line_last INTEGER,
+    comment,
+    suggestion,
+    reviewer TEXT,
+    extra_cells TEXT
+);
+CREATE INDEX IF NOT EXISTS sheets_name ON sheets(name);
+CREATE INDEX IF NOT EXISTS metadata_sheet ON metadata(sheet_id, position);
+CREATE INDEX IF NOT EXISTS findings_code ON findings(code);
+CREATE INDEX IF NOT EXISTS findings_reviewer ON findings(reviewer COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS findings_sheet ON findings(sheet_id, row);
+CREATE INDEX IF NOT EXISTS findings_line ON findings(sheet_id, line_first);
+CREATE VIEW IF NOT EXISTS findings_view AS
+    SELECT w.label AS workbook, s.name AS sheet, f.row, f.code, f.line_first,
+           f.line_last, f.reviewer, f.comment, f.suggestion, f.description
+    FROM findings f
+    JOIN sheets s ON s.id = f.sheet_id
+    JOIN workbooks w ON w.id = s.workbook_id;
+"""
+
+
+def _cell_value(value):
+    """A cell value SQLite (and JSON) can store: other types become their str()."""
+    if value is None or type(value) in (int, float, str):
+        return value
+    return str(value)
+
+
+def _finding_row(sheet_id, i, row):
+    cells = [_cell_value(v) for v in row[:ROW_CELLS]]
+    cells += [None] * (ROW_CELLS - len(cells))
+    code, description, line, comment, suggestion, reviewer = cells
+    lines = parse_line_spec(line) or (None, None)
+    extra = [_cell_value(v) for v in row[ROW_CELLS:]]
+    while extra and extra[-1] is None:
+        extra.pop()
+    return (
+        sheet_id,
+        i,
+        parse_code(code),
+        code,
+        description,
+        line,
+        *lines,
+        comment,
+        suggestion,
+        reviewer,
+        json.dumps(extra, ensure_ascii=False) if extra else None,
+    )
+
+
+class ReviewStore:
+    """
+    A review database. label selects the workbook read by fingerprints() and
+    load() (default: the one ingested last).
+    """
+
+    def __init__(self, db_path=DEFAULT_DB, label=None):
+        self.db_path = Path(db_path)
+        self.label = label
+        self._conn = None
+
+    def connect(self, create=False):
+        if self._conn is None:
+            if not create and not self.db_path.exists():
+                raise FileNotFoundError(f"No review database at {self.db_path}")
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA foreign_keys = ON")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                conn.close()
+                raise RuntimeError(
+                    f"{self.db_path} has schema version {version}, "
+                    f"expected {SCHEMA_VERSION}; ingest into a new database"
+                )
+            with conn:
+                conn.executescript(SCHEMA)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # === Ingest ===
+    def ingest(self, xlsx_path, label=None, parse_cache=None):
+        """
+        Store the workbook at xlsx_path under label (default: its file stem),
+        replacing the sheets whose content changed since the last ingest of
+        that label. Returns (sheets rewritten, sheets unchanged).
+        """
+        xlsx_path = Path(xlsx_path)
+        label = label or xlsx_path.stem
+        parse_cache = parse_cache or ParseCache()
+        digest, fingerprints = parse_cache.fingerprints(xlsx_path)
+
+        conn = self.connect(create=True)
+        with conn:
+            conn.execute(
+                "INSERT INTO workbooks (label, path, sha256, ingested_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (label) DO UPDATE SET "
+                "path = excluded.path, sha256 = excluded.sha256, "
+                "ingested_at = excluded.ingested_at",
+                (label, str(xlsx_path.resolve()), digest, time.strftime("%F %T")),
+            )
+            (workbook_id,) = conn.execute(
+                "SELECT id FROM workbooks WHERE label = ?", (label,)
+            ).fetchone()
+            stored = {
+                name: (sheet_id, fp)
+                for sheet_id, name, fp in conn.execute(
+                    "SELECT id, name, fingerprint FROM sheets WHERE workbook_id = ?",
+                    (workbook_id,),
+                )
+            }
+
+            current = {name for name, _ in fingerprints}
+            gone = [
+                sheet_id
+                for name, (sheet_id, _) in stored.items()
+                if name not in current
+            ]
+            changed = {
+                name
+                for name, fp in fingerprints
+                if name not in stored or stored[name][1] != fp
+            }
+            conn.executemany(
+                "DELETE FROM sheets WHERE id = ?",
+                [(stored[name][0],) for name in changed if name in stored]
+                + [(sheet_id,) for sheet_id in gone],
+            )
+
+            sheets = {s.name: s for s in parse_cache.load(xlsx_path, names=changed)}
+            metadata, findings = [], []
+            for position, (name, fp) in enumerate(fingerprints):
+                if name not in changed:
+                    conn.execute(
+                        "UPDATE sheets SET position = ? WHERE id = ?",
+                        (position, stored[name][0]),
+                    )
+                    continue
+                report = sheets[name].report
+                meta_rows, table_rows = report if report else (None, None)
+                sheet_id = conn.execute(
+                    "INSERT INTO sheets (workbook_id, position, name, fingerprint, "
+                    "is_report, has_table, meta_rows) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        workbook_id,
+                        position,
+                        name,
+                        fp,
+                        report is not None,
+                        table_rows is not None,
+                        (
+                            None
+                            if meta_rows is None
+                            else json.dumps(
+                                [[_cell_value(v) for v in row] for row in meta_rows],
+                                ensure_ascii=False,
+                            )
+                        ),
+                    ),
+                ).lastrowid
+                if meta_rows is not None:
+                    n = 0
+                    for key, values in extract_metadata(meta_rows):
+                        for value in values:
+                            metadata.append((sheet_id, n, key, value))
+                            n += 1
+                for i, row in enumerate(table_rows or ()):
+                    findings.append(_finding_row(sheet_id, i, row))
+
+            conn.executemany(
+                "INSERT INTO metadata (sheet_id, position, key, value) "
+                "VALUES (?, ?, ?, ?)",
+                metadata,
+            )
+            conn.executemany(
+                "INSERT INTO findings (sheet_id, row, code, code_cell, description, "
+                "line_cell, line_first, line_last, comment, suggestion, reviewer, "
+                "extra_cells) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                findings,
+            )
+        return len(changed), len(fingerprints) - len(changed)
+
+    # === Read path (the parse_cache.ParseCache interface) ===
+    def _workbook_id(self):
+        conn = self.connect()
+        if self.label is None:
+            found = conn.execute(
+                "SELECT id FROM workbooks ORDER BY ingested_at DESC, id DESC LIMIT 1"
+            ).fetchone()
+        else:
+            found = conn.execute(
+                "SELECT id FROM workbooks WHERE label = ?", (self.label,)
+            ).fetchone()
+        if found is None:
+            raise LookupError(
+                f"No workbook {self.label!r} in {self.db_path}"
+                if self.label
+                else f"No workbook ingested in {self.db_path}"
+            )
+        return found[0]
+
+    def fingerprints(self, path=None):
+        """
+        (sha256, [(sheet_name, fingerprint)]) of the selected workbook, as
+        ParseCache.fingerprints returns for the xlsx. path is ignored.
+        """
+        workbook_id = self._workbook_id()
+        conn = self.connect()
+        (digest,) = conn.execute(
+            "SELECT sha256 FROM workbooks WHERE id = ?", (workbook_id,)
+        ).fetchone()
+        sheets = conn.execute(
+            "SELECT name, fingerprint FROM sheets WHERE workbook_id = ? "
+            "ORDER BY position",
+            (workbook_id,),
+        ).fetchall()
+        return digest, sheets
+
+    def load(self, path=None, full_sheets=(), names=None):
+        """
+        [SheetData] of the selected workbook (or of the sheets in names), in
+        workbook order, as ParseCache.load returns for the xlsx. path is
+        ignored; rows is always None (full_sheets is not supported).
+        """
+        workbook_id = self._workbook_id()
+        conn = self.connect()
+        sheets = [
+            s
+            for s in conn.execute(
+                "SELECT id, name, is_report, has_table, meta_rows FROM sheets "
+                "WHERE workbook_id = ? ORDER BY position",
+                (workbook_id,),
+            )
+            if names is None or s[1] in names
+        ]
+        tables = {sheet_id: [] for sheet_id, _, _, has_table, _ in sheets if has_table}
+        for sheet_id, *cells, extra in conn.execute(
+            "SELECT f.sheet_id, f.code_cell, f.description, f.line_cell, f.comment, "
+            "f.suggestion, f.reviewer, f.extra_cells FROM findings f "
+            "JOIN sheets s ON s.id = f.sheet_id WHERE s.workbook_id = ? "
+            "ORDER BY f.sheet_id, f.row",
+            (workbook_id,),
+        ):
+            table = tables.get(sheet_id)
+            if table is not None:
+                table.append(tuple(cells) + tuple(json.loads(extra) if extra else ()))
+
+        result = []
+        for sheet_id, name, is_report, has_table, meta_rows in sheets:
+            report = None
+            if is_report:
+                meta = [tuple(row) for row in json.loads(meta_rows)]
+                report = (meta, tables[sheet_id] if has_table else None)
+            result.append(SheetData(name, report, None))
+        return result
+
+
+# === Query CLI ===
+COUNT_BY = {
+    "workbook": "w.label",
+    "sheet": "s.name",
+    "code": "f.code",
+    "reviewer": "f.reviewer",
+}
+
+
+def query_findings(conn, args):
+    """(column names, rows) for the filters of the query command."""
+    where, params = [], []
+    if args.workbook:
+        where.append("w.label = ?")
+        params.append(args.workbook)
+    if args.code is not None:
+        where.append("f.code = ?")
+        params.append(args.code)
+    if args.reviewer:
+        where.append("f.reviewer = ? COLLATE NOCASE")
+        params.append(args.reviewer)
+    if args.sheet:
+        where.append("s.name GLOB ?")
+        params.append(args.sheet)
+    if args.line is not None:
+        where.append("f.line_first <= ? AND ? <= f.line_last")
+        params += [args.line, args.line]
+    if args.text:
+        where.append("(f.comment LIKE ? OR f.suggestion LIKE ?)")
+        params += [f"%{args.text}%"] * 2
+
+    sql = (
+        "FROM findings f JOIN sheets s ON s.id = f.sheet_id "
+        "JOIN workbooks w ON w.id = s.workbook_id"
+    )
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if args.count_by:
+        column = COUNT_BY[args.count_by]
+        sql = (
+            f"SELECT {column}, count(*) {sql} GROUP BY {column} "
+            f"ORDER BY count(*) DESC, {column}"
+        )
+        names = [args.count_by.capitalize(), "Findings"]
+    else:
+        sql = (
+            "SELECT w.label, s.name, f.code, f.line_cell, f.reviewer, f.comment, "
+            f"f.suggestion {sql} ORDER BY w.id, s.position, f.row"
+        )
+        names = [
+            "Workbook",
+            "Sheet",
+            "Code",
+            "Line",
+            "Reviewer",
+            "Comment",
+            "Suggestion",
+        ]
+    if args.limit:
+        sql += f" LIMIT {int(args.limit)}"
+    return names, conn.execute(sql, params).fetchall()
+
+
+def print_rows(names, rows, fmt="table", width=40):
+    """Print query results as an aligned text table or as CSV."""
+    if fmt == "csv":
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(names)
+        writer.writerows(rows)
+        return
+
+    def text(value):
+        value = "" if value is None else " ".join(str(value).split())
+        return value if len(value) <= width else value[: width - 1] + "…"
+
+    cells = [[text(v) for v in row] for row in rows]
+    widths = [max([len(n), *(len(r[i]) for r in cells)]) for i, n in enumerate(names)]
+    print("  ".join(n.ljust(w) for n, w in zip(names, widths)).rstrip())
+    print("  ".join("-" * w for w in widths))
+    for row in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)).rstrip())
+    print(f"({len(rows)} row{'s' if len(rows) != 1 else ''})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Store review workbooks in SQLite and query their findings."
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=DEFAULT_DB,
+        help=f"database file (default: {DEFAULT_DB})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="load a workbook into the database")
+    ingest.add_argument("xlsx", nargs="?", default="CodeReviews.xlsx", type=Path)
+    ingest.add_argument(
+        "--label", help="name of the workbook in the database (default: file stem)"
+    )
+
+    query = commands.add_parser("query", help="list or count findings")
+    query.add_argument("--workbook", metavar="LABEL", help="only this workbook")
+    query.add_argument("--code", type=int, help="check code")
+    query.add_argument("--reviewer", help="reviewer name (case-insensitive)")
+    query.add_argument(
+        "--sheet", metavar="GLOB", help="sheet name pattern, e.g. '*DAO*'"
+    )
+    query.add_argument("--line", type=int, help="findings citing this line")
+    query.add_argument("--text", help="substring of the comment or suggestion")
+    query.add_argument("--count-by", choices=COUNT_BY, help="count findings per group")
+    query.add_argument("--limit", type=int, help="maximum number of rows")
+    query.add_argument("--format", choices=["table", "csv"], default="table")
+
+    sql = commands.add_parser("sql", help="run a read-only SQL query")
+    sql.add_argument("statement")
+    sql.add_argument("--format", choices=["table", "csv"], default="table")
+
+    commands.add_parser("workbooks", help="list the ingested workbooks")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    store = ReviewStore(args.db)
+    start = time.perf_counter()
+    try:
+        if args.command == "ingest":
+            rewritten, unchanged = store.ingest(args.xlsx, args.label)
+            print(
+                f"🗄️  {args.xlsx} ingested into {args.db} as "
+                f"'{args.label or args.xlsx.stem}': {rewritten} sheet(s) stored, "
+                f"{unchanged} unchanged ({time.perf_counter() - start:.2f}s)"
+            )
+            return 0
+
+        conn = store.connect()
+        if args.command == "query":
+            names, rows = query_findings(conn, args)
+        elif args.command == "sql":
+            uri = f"{args.db.resolve().as_uri()}?mode=ro"
+            with closing(sqlite3.connect(uri, uri=True)) as ro:
+                cursor = ro.execute(args.statement)
+                names = [d[0] for d in cursor.description or ()]
+                rows = cursor.fetchall()
+        else:
+            args.format = "table"
+            names = ["Label", "Sheets", "Findings", "Ingested", "Path"]
+            rows = conn.execute(
+                "SELECT w.label, count(DISTINCT s.id), count(f.id), w.ingested_at, "
+                "w.path FROM workbooks w LEFT JOIN sheets s ON s.workbook_id = w.id "
+                "LEFT JOIN findings f ON f.sheet_id = s.id GROUP BY w.id ORDER BY w.id"
+            ).fetchall()
+    except (FileNotFoundError, LookupError, RuntimeError, sqlite3.Error) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    finally:
+        store.close()
+
+    print_rows(names, rows, args.format)
+    if args.format == "table":
+        print(f"{(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+review_rows.py
+
+Row model of the review tables, shared by export_reviews.py, analysis.py
+(review_stats.py) and dedupe.py.
+
+Each finding is parsed once from its table row (workbook_reader.split_report)
+into a ReviewRow that keeps the raw values of the five columns the tools read:
+Check code, Line, Comment, Suggestion / Fix and Reviewer. The Check code
+description is left out (the tables print the code only), and so are cells
+past the Reviewer column. Values stay as the workbook had them: escaping for
+LaTeX, HTML or Markdown happens when a row is rendered, so rows can be
+grouped, counted and filtered without building any escaped text.
+
+ReviewRow uses __slots__, and the code and reviewer values of a table are
+interned (equal values share one object), so a finding costs one small
+object and the text of its Line, Comment and Suggestion cells.
+"""
+
+CODE_COL, LINE_COL, COMMENT_COL, SUGGESTION_COL, REVIEWER_COL = 0, 2, 3, 4, 5
+
+
+class ReviewRow:
+    """One finding of a review table (raw cell values, None for empty cells)."""
+
+    __slots__ = ("code", "line", "comment", "suggestion", "reviewer")
+
+    def __init__(self, code, line, comment, suggestion, reviewer):
+        self.code = code
+        self.line = line
+        self.comment = comment
+        self.suggestion = suggestion
+        self.reviewer = reviewer
+
+    def __repr__(self):
+        return (
+            f"ReviewRow(code={self.code!r}, line={self.line!r}, "
+            f"comment={self.comment!r}, suggestion={self.suggestion!r}, "
+            f"reviewer={self.reviewer!r})"
+        )
+
+
+def review_rows(table_rows):
+    """
+    ReviewRows of a review table (rows after the 'Check code' header), in
+    table order, skipping empty rows.
+    """
+    # Keyed by type too, so that 5, 5.0 and True stay distinct values
+    interned = {}
+
+    def intern(value):
+        if value is None:
+            return None
+        return interned.setdefault((type(value), value), value)
+
+    rows = []
+    for r in table_rows:
+        if not any(v is not None for v in r):
+            continue
+        n = len(r)
+        rows.append(
+            ReviewRow(
+                intern(r[CODE_COL]) if n > CODE_COL else None,
+                r[LINE_COL] if n > LINE_COL else None,
+                r[COMMENT_COL] if n > COMMENT_COL else None,
+                r[SUGGESTION_COL] if n > SUGGESTION_COL else None,
+                intern(r[REVIEWER_COL]) if n > REVIEWER_COL else None,
+            )
+        )
+    return rows
+
+
+def reviewer_name(row):
+    """Reviewer of a row as one line of text, "Unknown" when the cell is empty."""
+    value = row.reviewer
+    if value is None or (isinstance(value, float) and value != value):  # NaN
+        return "Unknown"
+    return " ".join(str(value).split()) or "Unknown"
+
+
+def rows_by_reviewer(rows):
+    """Group ReviewRows by reviewer_name, reviewers in order of first row."""
+    group = {}
+    for row in rows:
+        group.setdefault(reviewer_name(row), []).append(row)
+    return group
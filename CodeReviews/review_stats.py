@@ -0,0 +1,439 @@
+"""
+review_stats.py
+
+Vectorized statistics over the review findings of all report sheets.
+
+Instead of grouping sheet by sheet and updating dictionaries row by row, all
+findings are concatenated into one long frame (Sheet, Check Code, Reviewer) and
+every table is computed with a few groupby / drop_duplicates passes. The
+tables are identical, row order included, to the ones analysis.py used to
+build with its per-sheet loop.
+
+The coverage tables (section coverage, code co-occurrence, never-hit codes,
+file clusters) work on a boolean check code x sheet matrix built in one pass
+from the (code, sheet) pairs of the findings. It is stored dense: with ~100
+codes it takes one byte per code and file, and co-occurrence and section
+totals are then single matrix products.
+
+Reviewer agreement works on bitsets: the distinct (sheet, code, line)
+findings are numbered once, and every reviewer is a packed bit array over
+that index, so overlaps, unique finds and coverage are AND / OR / popcount
+over whole rows.
+"""
+import numpy as np
+import pandas as pd
+
+from check_catalogue import UNKNOWN_SECTION
+from review_rows import review_rows
+from source_index import parse_line_spec
+
+
+def findings_frame(report_rows):
+    """
+    Build the long findings frame from {sheet_name: [ReviewRow]}
+    (review_rows.review_rows of each review table).
+    Columns: Sheet (position of the sheet in report_rows), Check Code (Int64),
+    Reviewer (stripped str), Line (first line cited, 0 for none). Rows without
+    a code or reviewer are dropped.
+    """
+    sheet_ids, codes, reviewers, lines = [], [], [], []
+    for sheet_id, rows in enumerate(report_rows.values()):
+        for row in rows:
+            code, reviewer = row.code, row.reviewer
+            if code is None or reviewer is None:
+                continue
+            sheet_ids.append(sheet_id)
+            codes.append(code)
+            reviewers.append(reviewer)
+            spec = parse_line_spec(row.line)
+            lines.append(spec[0] if spec else 0)
+
+    df = pd.DataFrame(
+        {
+            "Sheet": np.asarray(sheet_ids, dtype=np.int64),
+            "Check Code": pd.Series(codes, dtype=object),
+            "Reviewer": pd.Series(reviewers, dtype=object),
+            "Line": np.asarray(lines, dtype=np.int64),
+        }
+    )
+    df["Reviewer"] = df["Reviewer"].astype(str).str.strip()
+    df["Check Code"] = pd.to_numeric(df["Check Code"], errors="coerce").astype("Int64")
+    return df.dropna(subset=["Check Code"]).reset_index(drop=True)
+
+
+def aggregate_findings(findings, sheet_names, check_list):
+    """
+    Compute the summary tables from a findings frame.
+    sheet_names maps the Sheet column back to names; check_list maps
+    code -> description.
+    Returns (df_top_errors, df_file_stats, df_reviewer_stats).
+    """
+    sheet_names = np.asarray(list(sheet_names), dtype=object)
+
+    # (sheet, code) pairs in order of first appearance
+    pairs = findings.drop_duplicates(["Sheet", "Check Code"])
+
+    # Unique errors per file, in workbook order
+    per_sheet = pairs.groupby("Sheet", sort=True).size()
+    df_file_stats = pd.DataFrame(
+        {
+            "File/Sheet Name": sheet_names[per_sheet.index.to_numpy()],
+            "Unique Errors Count": per_sheet.to_numpy(),
+        }
+    )
+
+    # Files affected per code, codes in order of first appearance
+    per_code = pairs.groupby("Check Code", sort=False).size()
+    df_top_errors = pd.DataFrame(
+        {
+            "Check Code": per_code.index.to_numpy(dtype=np.int64),
+            "Total Files Affected": per_code.to_numpy(),
+        }
+    )
+    df_top_errors.insert(
+        1,
+        "Description",
+        df_top_errors["Check Code"].map(check_list).fillna("Description Missing"),
+    )
+    df_top_errors = df_top_errors.sort_values(
+        by="Total Files Affected", ascending=False
+    )
+
+    # Reviewer statistics. Reviewers are listed by the first file they appear
+    # in, alphabetically within a file, before the final sort.
+    triples = findings.drop_duplicates(["Sheet", "Reviewer", "Check Code"])
+    files = findings.drop_duplicates(["Sheet", "Reviewer"])
+    by_reviewer = pd.DataFrame(
+        {
+            "First Sheet": files.groupby("Reviewer")["Sheet"].min(),
+            "Unique Files Reviewed": files.groupby("Reviewer").size(),
+            "Total Unique Errors Reported (Per File)": triples.groupby(
+                "Reviewer"
+            ).size(),
+        }
+    )
+    by_reviewer.index.name = "Reviewer"
+    df_reviewer_stats = (
+        by_reviewer.reset_index()
+        .sort_values(["First Sheet", "Reviewer"], kind="mergesort")
+        .drop(columns="First Sheet")
+        .reset_index(drop=True)
+    )
+    df_reviewer_stats = df_reviewer_stats.sort_values(
+        by="Total Unique Errors Reported (Per File)", ascending=False
+    )
+
+    return df_top_errors, df_file_stats, df_reviewer_stats
+
+
+def section_rollup(findings, catalogue):
+    """
+    Per-section rollup of a findings frame, using the check-code catalogue
+    (check_catalogue.CheckCatalogue). Sections are listed in catalogue order,
+    codes missing from the catalogue are counted under "Unknown".
+    """
+    pairs = findings.drop_duplicates(["Sheet", "Check Code"])
+    sections = list(catalogue.sections) + [UNKNOWN_SECTION]
+    section = pairs["Check Code"].map(
+        {code: e.section or UNKNOWN_SECTION for code, e in catalogue.by_code.items()}
+    )
+    pairs = pairs.assign(Section=section.fillna(UNKNOWN_SECTION).astype(object))
+    grouped = pairs.groupby("Section")
+    df = pd.DataFrame(
+        {
+            "Unique Errors (Per File)": grouped.size(),
+            "Files Affected": grouped["Sheet"].nunique(),
+            "Distinct Check Codes": grouped["Check Code"].nunique(),
+        }
+    )
+    df = df.reindex([s for s in sections if s in df.index])
+    df.index.name = "Section"
+    return df.reset_index()
+
+
+def coverage_matrix(findings, n_sheets, catalogue):
+    """
+    (codes, hits): hits[i, j] is True when sheet j reported codes[i]. codes are
+    the catalogue codes in catalogue order, then the unknown codes found, in
+    ascending order.
+    """
+    found = findings["Check Code"].to_numpy(dtype=np.int64)
+    known = np.fromiter(catalogue.by_code, dtype=np.int64, count=len(catalogue))
+    codes = np.concatenate([known, np.setdiff1d(found, known)])
+    hits = np.zeros((len(codes), n_sheets), dtype=bool)
+    hits[pd.Index(codes).get_indexer(found), findings["Sheet"].to_numpy()] = True
+    return codes, hits
+
+
+def section_coverage(codes, hits, catalogue):
+    """
+    Per-section coverage: how many of a section's codes were ever reported,
+    how many files reported one of them and how many distinct codes of the
+    section a file reports on average. Sections in catalogue order.
+    """
+    section_of = [catalogue.section_of(code) for code in codes]
+    sections = [
+        s for s in (*catalogue.sections, UNKNOWN_SECTION) if s in set(section_of)
+    ]
+    section_ids = np.array([sections.index(s) for s in section_of], dtype=np.int64)
+    member = section_ids[None, :] == np.arange(len(sections))[:, None]
+    # Distinct codes of each section reported by each file
+    per_file = member.astype(np.int32) @ hits.astype(np.int32)
+    n_codes = member.sum(axis=1)
+    codes_hit = (member & hits.any(axis=1)).sum(axis=1)
+    return pd.DataFrame(
+        {
+            "Section": sections,
+            "Check Codes": n_codes,
+            "Codes Reported": codes_hit,
+            "Code Coverage (%)": np.round(100 * codes_hit / n_codes, 1),
+            "Files Affected": (per_file > 0).sum(axis=1),
+            "Avg Codes per File": np.round(
+                per_file.mean(axis=1) if hits.shape[1] else 0.0, 2
+            ),
+        }
+    )
+
+
+def code_cooccurrence(codes, hits, top=20):
+    """
+    The `top` pairs of codes reported together by the most files, with the
+    Jaccard index of the two codes' sets of files.
+    """
+    m = hits.astype(np.float32)
+    both = m @ m.T  # files reporting both codes (exact up to 2**24 files)
+    per_code = hits.sum(axis=1)
+    i, j = np.triu_indices(len(codes), k=1)
+    count = both[i, j].astype(np.int64)
+    keep = count > 0
+    i, j, count = i[keep], j[keep], count[keep]
+    order = np.lexsort((j, i, -count))[:top]
+    i, j, count = i[order], j[order], count[order]
+    return pd.DataFrame(
+        {
+            "Check Code A": codes[i],
+            "Check Code B": codes[j],
+            "Files With Both": count,
+            "Jaccard": np.round(count / (per_code[i] + per_code[j] - count), 3),
+        }
+    )
+
+
+def never_hit_codes(codes, hits, catalogue):
+    """Catalogue codes that no file reported, in catalogue order."""
+    missing = codes[~hits.any(axis=1)]
+    return pd.DataFrame(
+        {
+            "Check Code": missing,
+            "Section": [catalogue.section_of(code) for code in missing],
+            "Description": [catalogue.descriptions.get(code, "") for code in missing],
+        }
+    )
+
+
+def _kmeans(x, k, rng, iterations):
+    """Cluster labels of the rows of x (k-means with k-means++ seeding)."""
+    n = len(x)
+    centers = np.empty((k, x.shape[1]), dtype=x.dtype)
+    centers[0] = x[rng.integers(n)]
+    d2 = ((x - centers[0]) ** 2).sum(axis=1)
+    for c in range(1, k):
+        total = d2.sum()
+        centers[c] = x[rng.choice(n, p=d2 / total) if total > 0 else rng.integers(n)]
+        d2 = np.minimum(d2, ((x - centers[c]) ** 2).sum(axis=1))
+
+    sq = (x * x).sum(axis=1)
+    labels = None
+    for _ in range(iterations):
+        dist = sq[:, None] - 2 * (x @ centers.T) + (centers * centers).sum(axis=1)
+        new = dist.argmin(axis=1)
+        if labels is not None and np.array_equal(new, labels):
+            break
+        labels = new
+        onehot = (labels[:, None] == np.arange(k)).astype(x.dtype)
+        counts = onehot.sum(axis=0)
+        filled = counts > 0
+        centers[filled] = (onehot.T @ x)[filled] / counts[filled, None]
+    return labels
+
+
+CLUSTER_COLUMNS = [
+    "Cluster",
+    "Files",
+    "Avg Codes per File",
+    "Typical Check Codes",
+    "Example Files",
+]
+
+
+def file_clusters(codes, hits, sheet_names, k=5, iterations=50, seed=0, examples=3):
+    """
+    Group the files by the set of codes they reported (k-means on the
+    columns of hits, i.e. Hamming distance). One row per cluster, largest
+    first: its size, the codes most of its files reported and a few of them.
+    """
+    sheet_names = np.asarray(list(sheet_names), dtype=object)
+    x = hits.T.astype(np.float32)
+    k = min(k, len(np.unique(x, axis=0))) if len(x) else 0
+    if k == 0:
+        return pd.DataFrame(columns=CLUSTER_COLUMNS)
+    labels = _kmeans(x, k, np.random.default_rng(seed), iterations)
+
+    rows = []
+    for label in np.argsort(-np.bincount(labels, minlength=k), kind="stable"):
+        members = np.flatnonzero(labels == label)
+        if not len(members):
+            continue
+        share = x[members].mean(axis=0)
+        typical = [
+            str(codes[c])
+            for c in np.argsort(-share, kind="stable")[:5]
+            if share[c] >= 0.5
+        ]
+        rows.append(
+            [
+                len(rows) + 1,
+                len(members),
+                round(float(x[members].sum(axis=1).mean()), 2),
+                ", ".join(typical),
+                "; ".join(sheet_names[members[:examples]]),
+            ]
+        )
+    return pd.DataFrame(rows, columns=CLUSTER_COLUMNS)
+
+
+if hasattr(np, "bitwise_count"):
+
+    def _popcount(bits):
+        """Set bits of each row of a bitset array."""
+        return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+
+else:  # NumPy < 2.0
+    _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(bits):
+        """Set bits of each row of a bitset array."""
+        return _BYTE_COUNTS[bits.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+def reviewer_bitsets(findings):
+    """
+    (reviewers, bits): bits[i] is reviewer i's set of distinct (Sheet,
+    Check Code, Line) findings, packed 64 per uint64 word over an index shared
+    by all reviewers. Reviewers in order of first appearance.
+    """
+    item = findings.groupby(["Sheet", "Check Code", "Line"], sort=False).ngroup()
+    item = item.to_numpy(dtype=np.int64)
+    reviewer, reviewers = pd.factorize(findings["Reviewer"])
+    n_items = int(item.max()) + 1 if len(item) else 0
+    bits = np.zeros((len(reviewers), (n_items + 63) // 64), dtype=np.uint64)
+    np.bitwise_or.at(
+        bits,
+        (reviewer, item >> 6),
+        np.left_shift(np.uint64(1), (item & 63).astype(np.uint64)),
+    )
+    return list(reviewers), bits
+
+
+def reviewer_overlaps(bits):
+    """
+    (sizes, both): findings per reviewer and the r x r matrix of findings
+    reported by both reviewers of a pair.
+    """
+    both = np.empty((len(bits), len(bits)), dtype=np.int64)
+    for i, row in enumerate(bits):
+        both[i] = _popcount(row & bits)
+    return both.diagonal().copy(), both
+
+
+def agreement_matrix(reviewers, sizes, both):
+    """Pairwise Jaccard index of the reviewers' findings, as a table."""
+    union = sizes[:, None] + sizes[None, :] - both
+    jaccard = np.divide(
+        both, union, out=np.zeros(both.shape), where=union > 0, dtype=np.float64
+    )
+    df = pd.DataFrame(np.round(jaccard, 3), columns=reviewers)
+    df.insert(0, "Reviewer", reviewers)
+    return df
+
+
+def reviewer_contributions(reviewers, bits, sizes, both):
+    """
+    Per reviewer: findings, findings no other reviewer reported, and the
+    reviewer whose findings overlap most with theirs (overlap coefficient:
+    shared findings / findings of the smaller set). Most findings first.
+    """
+    once = np.zeros(bits.shape[1], dtype=np.uint64)
+    twice = np.zeros_like(once)
+    for row in bits:
+        twice |= once & row
+        once |= row
+    unique = _popcount(bits & (once & ~twice))
+
+    smaller = np.minimum(sizes[:, None], sizes[None, :])
+    overlap = np.divide(
+        both, smaller, out=np.zeros(both.shape), where=smaller > 0, dtype=np.float64
+    )
+    np.fill_diagonal(overlap, -1.0)  # a reviewer is not their own closest
+    closest = overlap.argmax(axis=1)
+    best = overlap[np.arange(len(reviewers)), closest]
+    share = np.divide(unique, sizes, out=np.zeros(len(sizes)), where=sizes > 0)
+    df = pd.DataFrame(
+        {
+            "Reviewer": reviewers,
+            "Findings": sizes,
+            "Unique Findings": unique,
+            "Unique Share (%)": np.round(100 * share, 1),
+            "Closest Reviewer": [
+                reviewers[j] if b >= 0 else None for j, b in zip(closest, best)
+            ],
+            "Overlap With Closest": np.where(best >= 0, np.round(best, 3), np.nan),
+        }
+    )
+    return df.sort_values("Findings", ascending=False, kind="mergesort")
+
+
+def coverage_curve(reviewers, bits):
+    """
+    Team coverage as reviewers are added greedily, each step adding the
+    reviewer with the most findings not covered yet.
+    """
+    total = int(_popcount(np.bitwise_or.reduce(bits, axis=0)))
+    covered = np.zeros(bits.shape[1], dtype=np.uint64)
+    left = list(range(len(reviewers)))
+    rows, team = [], 0
+    while left:
+        gains = _popcount(bits[left] & ~covered)
+        best = int(gains.argmax())
+        i = left.pop(best)
+        covered |= bits[i]
+        team += int(gains[best])
+        rows.append(
+            [
+                len(rows) + 1,
+                reviewers[i],
+                int(gains[best]),
+                team,
+                round(100 * team / total, 1),
+            ]
+        )
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "Step",
+            "Reviewer Added",
+            "New Findings",
+            "Team Findings",
+            "Team Coverage (%)",
+        ],
+    )
+
+
+def review_statistics(report_tables, check_list):
+    """
+    One-call entry point: {sheet_name: table_rows} and the check list ->
+    (df_top_errors, df_file_stats, df_reviewer_stats).
+    """
+    report_rows = {name: review_rows(rows) for name, rows in report_tables.items()}
+    findings = findings_frame(report_rows)
+    return aggregate_findings(findings, report_rows.keys(), check_list)
@@ -0,0 +1,268 @@
+"""
+source_index.py
+
+Line-offset index over the reviewed sources (provided_src/), used by
+export_reviews.py to embed the cited lines under each finding.
+
+Every source file is memory-mapped and indexed once: the byte offset at which
+each line starts is stored in an array('Q'), so fetching lines n..m is two
+array lookups and a slice of the map, whatever the size of the file. The
+offset arrays are cached on disk under .parse_cache/source_index/, keyed by
+the sha256 of the file, so unchanged sources are never scanned again.
+
+The sha256 of every file (fingerprints(), part of the export keys) is
+remembered there too, with the size and modification time it was computed
+for: a file is only read and hashed again when one of those changed.
+
+Sheets are matched to source files by name: "Ass1_BookDAO.java" (or the
+"[File name]" part of the "Project Code:" metadata) finds BookDAO.java
+anywhere under the source root, as long as the name is unique.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+from array import array
+from pathlib import Path
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path(".parse_cache") / "source_index"
+SOURCE_EXTENSIONS = (".java",)
+MAX_SNIPPET_LINES = 20  # longer cited ranges are cut
+
+_NEWLINE_RE = re.compile(rb"\n")
+_RANGE_RE = re.compile(r"(\d+)\s*(?:-|–|—|\.\.|to)\s*(\d+)")
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def parse_line_spec(value):
+    """
+    (first, last) line numbers cited by a "Line" cell: 23, "23", "41-45",
+    "41–45", "12, 14". Returns None if the cell cites no line.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        if value != value or value < 1:  # NaN
+            return None
+        return int(value), int(value)
+    text = str(value)
+    m = _RANGE_RE.search(text)
+    if m:
+        first, last = sorted((int(m.group(1)), int(m.group(2))))
+    else:
+        numbers = [int(n) for n in _NUMBER_RE.findall(text)]
+        if not numbers:
+            return None
+        first, last = min(numbers), max(numbers)
+        if last - first >= MAX_SNIPPET_LINES:
+            # Unrelated lines far apart: show the first one only
+            last = first = numbers[0]
+    if first < 1:
+        return None
+    return first, last
+
+
+def cited_lines(value):
+    """
+    Line numbers a "Line" cell cites (a container for `in` tests): every line
+    of its parse_line_spec range, except for lists ("12, 14"), which only
+    cite the lines listed. Empty if the cell cites no line.
+    """
+    spec = parse_line_spec(value)
+    if spec is None:
+        return frozenset()
+    first, last = spec
+    if isinstance(value, str) and not _RANGE_RE.search(value):
+        numbers = map(int, _NUMBER_RE.findall(value))
+        return frozenset(n for n in numbers if first <= n <= last)
+    return range(first, last + 1)
+
+
+class SourceFile:
+    """A memory-mapped source file with its line-offset index."""
+
+    def __init__(self, path, data, offsets):
+        self.path = path
+        self.data = data
+        self.offsets = offsets  # offsets[i] = byte offset of line i + 1
+
+    @property
+    def line_count(self):
+        return len(self.offsets)
+
+    def line(self, n):
+        """Text of line n (1-based), without the line ending."""
+        start = self.offsets[n - 1]
+        end = self.offsets[n] if n < len(self.offsets) else len(self.data)
+        return self.data[start:end].decode("utf-8", "replace").rstrip("\r\n")
+
+    def lines(self, first, last):
+        """[(n, text)] for lines first..last, clipped to the file."""
+        first = max(first, 1)
+        last = min(last, self.line_count)
+        return [(n, self.line(n)) for n in range(first, last + 1)]
+
+
+def _map_file(path):
+    with open(path, "rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            return b""
+
+
+def _line_offsets(data):
+    offsets = array("Q", [0] if data else [])
+    offsets.extend(m.end() for m in _NEWLINE_RE.finditer(data))
+    if offsets and offsets[-1] == len(data):
+        offsets.pop()  # no line after the final newline
+    return offsets
+
+
+class SourceIndex:
+    """
+    Index of the source files under root (see module docstring). Files are
+    mapped and indexed lazily, on first use.
+    """
+
+    def __init__(self, root, cache_dir=DEFAULT_CACHE_DIR, extensions=SOURCE_EXTENSIONS):
+        self.root = Path(root)
+        self.cache_dir = Path(cache_dir)
+        self.paths = {}  # relative posix path -> Path
+        self.by_name = {}  # lower-cased file name -> [relative path]
+        self._files = {}
+        self._digests = {}
+        self._known = None  # relative path -> [size, mtime_ns, sha256]
+        self._known_changed = False
+        if self.root.is_dir():
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    stem, ext = os.path.splitext(filename)
+                    # Skip the copies made by annonate-line-java-file.py
+                    if ext not in extensions or stem.endswith("_annotated"):
+                        continue
+                    path = Path(dirpath) / filename
+                    rel = path.relative_to(self.root).as_posix()
+                    self.paths[rel] = path
+                    self.by_name.setdefault(filename.lower(), []).append(rel)
+
+    def __bool__(self):
+        return bool(self.paths)
+
+    @property
+    def _digests_file(self):
+        root_key = hashlib.sha256(str(self.root.resolve()).encode()).hexdigest()
+        return self.cache_dir / f"v{CACHE_VERSION}-digests-{root_key[:16]}.json"
+
+    def _known_digests(self):
+        if self._known is None:
+            try:
+                self._known = json.loads(self._digests_file.read_text("utf-8"))
+            except (OSError, ValueError):
+                self._known = {}
+        return self._known
+
+    def digest(self, rel):
+        """sha256 of a file, only read again when its size or mtime changed."""
+        if rel not in self._digests:
+            stat = self.paths[rel].stat()
+            stat_key = [stat.st_size, stat.st_mtime_ns]
+            known = self._known_digests().get(rel)
+            if known and known[:2] == stat_key:
+                self._digests[rel] = known[2]
+            else:
+                digest = hashlib.sha256(self.paths[rel].read_bytes()).hexdigest()
+                self._known[rel] = [*stat_key, digest]
+                self._known_changed = True
+                self._digests[rel] = digest
+        return self._digests[rel]
+
+    def fingerprints(self):
+        """[(relative path, sha256)] of every indexed file, sorted."""
+        result = [(rel, self.digest(rel)) for rel in sorted(self.paths)]
+        known = self._known_digests()
+        if self._known_changed or known.keys() - self.paths.keys():
+            # Remember the files of this root only
+            self._known = {rel: known[rel] for rel in self.paths if rel in known}
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp = self._digests_file.with_suffix(".tmp")
+                tmp.write_text(json.dumps(self._known), encoding="utf-8")
+                tmp.replace(self._digests_file)
+            except OSError:
+                pass  # the cache is best-effort
+            self._known_changed = False
+        return result
+
+    def file(self, rel):
+        """The SourceFile for a relative path (mapped and indexed once)."""
+        source = self._files.get(rel)
+        if source is None:
+            path = self.paths[rel]
+            data = _map_file(path)
+            digest = self._digests.get(rel) or hashlib.sha256(data).hexdigest()
+            self._digests[rel] = digest
+            source = SourceFile(path, data, self._offsets(digest, data))
+            self._files[rel] = source
+        return source
+
+    def _offsets(self, digest, data):
+        cache_file = self.cache_dir / f"v{CACHE_VERSION}-{digest}.offsets"
+        offsets = array("Q")
+        try:
+            offsets.frombytes(cache_file.read_bytes())
+            return offsets
+        except (OSError, ValueError):
+            pass
+
+        offsets = _line_offsets(data)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_suffix(".tmp")
+            tmp.write_bytes(offsets.tobytes())
+            tmp.replace(cache_file)
+        except OSError:
+            pass  # the cache is best-effort
+        return offsets
+
+    def resolve(self, *names):
+        """
+        Relative path of the source file a sheet refers to. Each name is tried
+        as is and without its "Prefix_" parts ("Ass1_BookDAO.java" ->
+        "BookDAO.java"), with the default extension added when missing.
+        Ambiguous names (several files called the same) do not match.
+        """
+        for name in names:
+            if not name:
+                continue
+            name = name.strip().replace("\\", "/").rsplit("/", 1)[-1].strip()
+            parts = name.split("_")
+            for i in range(len(parts)):
+                candidate = "_".join(parts[i:]).lower()
+                if not candidate:
+                    continue
+                for key in (candidate, candidate + SOURCE_EXTENSIONS[0]):
+                    matches = self.by_name.get(key, [])
+                    if len(matches) == 1:
+                        return matches[0]
+        return None
+
+    def snippet(self, rel, first, last, context=2, cited=None):
+        """
+        Lines first-context .. last+context of a source file, as
+        [(n, text, cited)], or [] if the cited lines are not in the file.
+        cited holds the cited line numbers (default: all of first..last).
+        """
+        source = self.file(rel)
+        if first > source.line_count:
+            return []
+        last = min(last, first + MAX_SNIPPET_LINES - 1)
+        if cited is None:
+            cited = range(first, last + 1)
+        return [
+            (n, text, first <= n <= last and n in cited)
+            for n, text in source.lines(first - context, last + context)
+        ]
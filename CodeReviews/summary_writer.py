@@ -0,0 +1,192 @@
+"""
+summary_writer.py
+
+Writers for the analysis summary sheet that never load the review workbook.
+
+The summary is a grid of tables laid out side by side (title row, header row,
+data rows, one blank column between tables), built once as a list of rows and
+written in bulk:
+
+ - write_summary_workbook: a standalone workbook through openpyxl's
+   write-only (streaming) mode;
+ - splice_summary_sheet: a copy of the source .xlsx with the summary added as
+   a new worksheet part. Every other part of the package is copied as-is, so
+   the source sheets are never parsed or re-serialized.
+"""
+import math
+import numbers
+import re
+import shutil
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.dataframe import dataframe_to_rows
+
+WORKSHEET_TYPE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+)
+WORKSHEET_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+)
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+# Characters that are not allowed in XML 1.0
+_ILLEGAL_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def summary_grid(blocks):
+    """
+    Lay out [(title, DataFrame)] side by side and return the rows of the grid
+    (lists of cell values, None for empty cells). Empty tables are skipped.
+    """
+    blocks = [(title, df) for title, df in blocks if not df.empty]
+    height = 2 + max((len(df) for _, df in blocks), default=0)
+    rows = [[] for _ in range(height)]
+    for title, df in blocks:
+        width = len(df.columns)
+        body = list(dataframe_to_rows(df, header=False, index=False))
+        if rows[0]:  # blank column between tables
+            for row in rows:
+                row.append(None)
+        rows[0].extend([title] + [None] * (width - 1))
+        rows[1].extend(df.columns)
+        for i, row in enumerate(rows[2:]):
+            row.extend(body[i] if i < len(body) else [None] * width)
+    # Trailing empty cells are not written
+    for row in rows:
+        while row and row[-1] is None:
+            row.pop()
+    return rows
+
+
+def write_summary_workbook(path, sheet_name, rows):
+    """Write rows as the only sheet of a new workbook (write-only mode)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def _cell_xml(ref, value):
+    if value is None:
+        return ""
+    if isinstance(value, bool) or type(value).__name__ == "bool_":
+        return f'<c r="{ref}" t="b"><v>{int(bool(value))}</v></c>'
+    if isinstance(value, numbers.Integral):
+        return f'<c r="{ref}"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Real):
+        if not math.isfinite(value):
+            return ""
+        return f'<c r="{ref}"><v>{float(value)!r}</v></c>'
+    text = escape(_ILLEGAL_XML_RE.sub("", str(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def write_sheet_xml(out, rows):
+    """Stream a minimal worksheet part (inline strings, no styles) to out."""
+    out.write(
+        b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        b"<sheetData>"
+    )
+    for r, row in enumerate(rows, start=1):
+        cells = "".join(
+            _cell_xml(f"{get_column_letter(c)}{r}", value)
+            for c, value in enumerate(row, start=1)
+        )
+        if cells:
+            out.write(f'<row r="{r}">{cells}</row>'.encode("utf-8"))
+    out.write(b"</sheetData></worksheet>")
+
+
+def _part_name(target):
+    """Zip member name of a relationship target in xl/_rels/workbook.xml.rels."""
+    return target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+
+def splice_summary_sheet(src, dest, sheet_name, rows):
+    """
+    Copy the workbook src to dest with rows written to sheet_name. A new sheet
+    is inserted as the first tab; an existing sheet with that name has its
+    content replaced in place.
+    """
+    with zipfile.ZipFile(src) as zin:
+        names = set(zin.namelist())
+        workbook_xml = zin.read("xl/workbook.xml").decode("utf-8")
+        rels_xml = zin.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+        types_xml = zin.read("[Content_Types].xml").decode("utf-8")
+
+        rel_targets = {
+            m.group("id"): m.group("target")
+            for m in re.finditer(
+                r'<Relationship\b(?=[^>]*\bId="(?P<id>[^"]+)")'
+                r'(?=[^>]*\bTarget="(?P<target>[^"]+)")[^>]*>',
+                rels_xml,
+            )
+        }
+        sheets_open = re.search(r"<((?:\w+:)?)sheets\b[^>]*>", workbook_xml)
+        prefix = sheets_open.group(1)
+        sheet_tags = re.findall(rf"<{prefix}sheet\b[^>]*>", workbook_xml)
+
+        part = None
+        for tag in sheet_tags:
+            name = re.search(r'\bname="([^"]*)"', tag).group(1)
+            rid = re.search(r'\b\w+:id="([^"]*)"', tag).group(1)
+            if name == escape(sheet_name, {'"': "&quot;"}):
+                part = _part_name(rel_targets[rid])
+
+        replaced = {}
+        if part is None:
+            # New worksheet part and relationship
+            n = 1
+            while f"xl/worksheets/sheet{n}.xml" in names:
+                n += 1
+            part = f"xl/worksheets/sheet{n}.xml"
+            rid = "rIdSummary"
+            while rid in rel_targets:
+                rid += "_"
+            sheet_ids = [int(i) for i in re.findall(r'\bsheetId="(\d+)"', workbook_xml)]
+            new_tag = (
+                f"<{prefix}sheet xmlns:sr={quoteattr(REL_NS)} "
+                f"name={quoteattr(sheet_name)} "
+                f'sheetId="{max(sheet_ids, default=0) + 1}" sr:id="{rid}"/>'
+            )
+            # Insert as the first tab; shift sheet indexes that follow it
+            workbook_xml = (
+                workbook_xml[: sheets_open.end()]
+                + new_tag
+                + workbook_xml[sheets_open.end() :]
+            )
+            workbook_xml = re.sub(
+                r'\b(localSheetId|activeTab)="(\d+)"',
+                lambda m: f'{m.group(1)}="{int(m.group(2)) + 1}"',
+                workbook_xml,
+            )
+            rels_xml = rels_xml.replace(
+                "</Relationships>",
+                f'<Relationship Id="{rid}" Type="{WORKSHEET_TYPE}" '
+                f'Target="/{part}"/></Relationships>',
+            )
+            types_xml = types_xml.replace(
+                "</Types>",
+                f'<Override PartName="/{part}" '
+                f'ContentType="{WORKSHEET_CONTENT_TYPE}"/></Types>',
+            )
+            replaced["xl/workbook.xml"] = workbook_xml
+            replaced["xl/_rels/workbook.xml.rels"] = rels_xml
+            replaced["[Content_Types].xml"] = types_xml
+
+        with zipfile.ZipFile(dest, "w", zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                if info.filename == part:
+                    continue
+                if info.filename in replaced:
+                    zout.writestr(info, replaced[info.filename].encode("utf-8"))
+                    continue
+                with zin.open(info) as fin, zout.open(info, "w") as fout:
+                    shutil.copyfileobj(fin, fout, 1 << 20)
+            with zout.open(part, "w") as fout:
+                write_sheet_xml(fout, rows)
@@ -0,0 +1,43 @@
+"""
+Shared fixtures of the test suite.
+
+The tools work on the files of their working directory (CodeReviews.xlsx,
+codes_mapping.txt, provided_src/, redactions.csv) and keep module-level state,
+so the tests run them as `acript` commands in a fresh copy of
+tests/fixtures/workspace.
+"""
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "workspace"
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """A fresh copy of the fixture workspace."""
+    path = tmp_path / "workspace"
+    shutil.copytree(FIXTURE_DIR, path)
+    return path
+
+
+@pytest.fixture
+def acript(workspace):
+    """Run `acript ARGS...` in the workspace; returns its stdout."""
+
+    def run(*args):
+        result = subprocess.run(
+            [sys.executable, str(REPO_DIR / "main.py"), *map(str, args)],
+            cwd=workspace,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+        )
+        assert result.returncode == 0, result.stderr
+        return result.stdout
+
+    return run
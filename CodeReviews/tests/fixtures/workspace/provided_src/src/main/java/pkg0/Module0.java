@@ -0,0 +1,16 @@
+package pkg;
+
+import java.util.List;
+
+public class Module0 {
+        } catch (SQLException e) {
+            String query = "SELECT * FROM Book WHERE id = " + query;
+    private String total = 55;
+    private List<Book> theList = 57;
+    }
+    private int userId = 3;
+            e.printStackTrace();
+    }
+            e.printStackTrace();
+        } catch (SQLException e) {
+}
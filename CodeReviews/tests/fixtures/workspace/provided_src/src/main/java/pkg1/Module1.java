@@ -0,0 +1,16 @@
+package pkg;
+
+import java.util.List;
+
+public class Module1 {
+    }
+        if (total != null && total.size() > 53) {
+
+        if (query != null && query.size() > 95) {
+            e.printStackTrace();
+    }
+        } catch (SQLException e) {
+    private String theList = 31;
+            String query = "SELECT * FROM Book WHERE id = " + query;
+            for (int i = 0; i < cart.size(); i++) {
+}
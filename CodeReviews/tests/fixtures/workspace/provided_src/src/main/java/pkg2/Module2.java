@@ -0,0 +1,16 @@
+package pkg;
+
+import java.util.List;
+
+public class Module2 {
+            for (int i = 0; i < query.size(); i++) {
+            e.printStackTrace();
+            e.printStackTrace();
+    private String total = 5;
+    // TODO: validate userId before use
+
+    }
+            e.printStackTrace();
+            e.printStackTrace();
+        } catch (SQLException e) {
+}
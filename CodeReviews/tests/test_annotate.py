@@ -0,0 +1,46 @@
+"""
+`acript annotate`: converting a single file must not overwrite an output
+that is newer than its input unless --force is given.
+"""
+import os
+
+
+def set_mtime(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+
+def test_strip_keeps_newer_source(tmp_path, acript):
+    source = tmp_path / "Foo.java"
+    annotated = tmp_path / "Foo_annotated.java"
+    source.write_text("class Foo {\n}\n", encoding="utf-8")
+    acript("annotate", source)
+    assert annotated.read_text(encoding="utf-8") == "class Foo { /*1*/\n} /*2*/\n"
+
+    # Foo.java edited after annotating: --strip leaves it alone
+    source.write_text("class Foo {\n    int edited;\n}\n", encoding="utf-8")
+    set_mtime(annotated, 1_000_000)
+    set_mtime(source, 2_000_000)
+    assert "Skipped" in acript("annotate", "--strip", annotated)
+    assert "edited" in source.read_text(encoding="utf-8")
+
+    assert "Stripped" in acript("annotate", "--strip", "--force", annotated)
+    assert source.read_text(encoding="utf-8") == "class Foo {\n}\n"
+
+    # The annotated file edited during the review: --strip writes it back
+    annotated.write_text("class Foo { /*1*/\n  int x; /*2*/\n}\n", encoding="utf-8")
+    set_mtime(annotated, source.stat().st_mtime + 10)
+    acript("annotate", "--strip", annotated)
+    assert source.read_text(encoding="utf-8") == "class Foo {\n  int x;\n}\n"
+
+
+def test_annotate_keeps_newer_output(tmp_path, acript):
+    source = tmp_path / "Foo.java"
+    annotated = tmp_path / "Foo_annotated.java"
+    source.write_text("class Foo {}\n", encoding="utf-8")
+    annotated.write_text("class Foo {} /*1*/ // reviewed\n", encoding="utf-8")
+    set_mtime(source, 1_000_000)
+    set_mtime(annotated, 2_000_000)
+    assert "Skipped" in acript("annotate", source)
+    assert "reviewed" in annotated.read_text(encoding="utf-8")
+    acript("annotate", "--force", source)
+    assert annotated.read_text(encoding="utf-8") == "class Foo {} /*1*/\n"
@@ -0,0 +1,45 @@
+"""The acript dispatcher (main.py) reaches every registered tool."""
+import subprocess
+import sys
+
+import pytest
+
+from conftest import REPO_DIR
+from main import COMMANDS
+
+HEAVY_MODULES = ("numpy", "openpyxl", "pandas")
+
+
+@pytest.mark.parametrize("command", sorted(COMMANDS))
+def test_command_help(acript, command):
+    assert "usage: acript " + command in acript(command, "--help")
+
+
+@pytest.mark.parametrize("command", sorted(COMMANDS))
+def test_help_skips_heavy_imports(command):
+    script = (
+        "import sys, main\n"
+        "try:\n"
+        f"    main.main([{command!r}, '--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print(*(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines()[-1] == ""
+
+
+def test_batch_round_trip(workspace, acript):
+    (workspace / "in" / "team").mkdir(parents=True)
+    (workspace / "CodeReviews.xlsx").rename(workspace / "in" / "team" / "Book.xlsx")
+    acript("batch", "to-csv", "in", "--output-root", "csv", "--jobs", "1")
+    assert (workspace / "csv" / "team" / "Book").is_dir()
+
+    acript("batch", "to-excel", "csv", "--output-root", "xlsx", "--jobs", "1")
+    assert (workspace / "xlsx" / "team" / "Book.xlsx").is_file()
@@ -0,0 +1,55 @@
+"""
+xlsx/csv_to_excel.py: cell values and types must match the pandas
+read_csv / to_excel path it replaced, whatever the chunk size, and a failed
+run must leave the previous workbook alone.
+"""
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+CSV = (
+    "Code,Score,Flag,Note,Late\n"
+    "1,2.5,True,NA,\n"
+    "2,nan,False,ok,\n"
+    "NULL,3,true,None,\n"
+    "4,,FALSE,,7\n"
+    "5,4.25,,n/a,8.5\n"
+)
+
+
+def sheet_values(path):
+    # Not read-only: rows are padded to the sheet width in both workbooks
+    ws = load_workbook(path).worksheets[0]
+    return [list(row) for row in ws.iter_rows(values_only=True)]
+
+
+@pytest.mark.parametrize("chunk_rows", [2, 10_000])
+def test_values_match_pandas(workspace, acript, chunk_rows):
+    (workspace / "csv").mkdir()
+    (workspace / "csv" / "1.Data.csv").write_text(CSV, encoding="utf-8")
+    acript("to-xlsx", "csv", "--output", "new.xlsx", "--chunk-rows", chunk_rows)
+
+    with pd.ExcelWriter(workspace / "old.xlsx", engine="openpyxl") as writer:
+        df = pd.read_csv(workspace / "csv" / "1.Data.csv", encoding="utf-8")
+        df.to_excel(writer, sheet_name="Data", index=False)
+
+    new = sheet_values(workspace / "new.xlsx")
+    assert new == sheet_values(workspace / "old.xlsx")
+    # Numbers stay numbers in every chunk, NA strings are blank cells
+    assert [row[4] for row in new[1:]] == [None, None, None, 7, 8.5]
+    assert [row[3] for row in new[1:]] == [None, "ok", None, None, None]
+
+
+def test_failed_run_keeps_previous_output(workspace, acript):
+    (workspace / "csv").mkdir()
+    (workspace / "csv" / "1.Data.csv").write_text(CSV, encoding="utf-8")
+    acript("to-xlsx", "csv", "--output", "out/book.xlsx")
+    before = (workspace / "out" / "book.xlsx").read_bytes()
+
+    # Not UTF-8: reading the second file fails halfway through the run
+    (workspace / "csv" / "2.Broken.csv").write_bytes(b"a,b\n\xff\xfe,1\n")
+    out = acript("to-xlsx", "csv", "--output", "out/book.xlsx")
+
+    assert "error occurred" in out
+    assert (workspace / "out" / "book.xlsx").read_bytes() == before
+    assert sorted(p.name for p in (workspace / "out").iterdir()) == ["book.xlsx"]
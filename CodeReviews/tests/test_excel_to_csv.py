@@ -0,0 +1,46 @@
+"""
+xlsx/excel_to_csv.py on workbooks written in openpyxl's write-only mode,
+which declare no sheet dimension: the CSV width must come from the data.
+"""
+import pandas as pd
+from openpyxl import Workbook
+
+
+def write_only_workbook(path):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Ass1_A.java")
+    ws.append(["Code Review Report"])
+    ws.append([])
+    ws.append(["Project Code: A.java"])
+    ws.append(["Reviewer(s):", "Reviewer 1"])
+    ws.append([])
+    ws.append(["Check code", "Description", "Line", "Comment", "Fix", "Reviewer"])
+    ws.append([5, "d", "12", "a, b", "fix", "Reviewer 1"])
+    ws.append([7, "d", "3-4", "multi\nline", None, "Reviewer 1"])
+    ws.append([])
+    ws.append([])
+    wb.create_sheet("Empty")
+    wb.save(path)
+
+
+def test_write_only_workbook(workspace, acript):
+    write_only_workbook(workspace / "book.xlsx")
+    acript("to-csv", "book.xlsx", "--output-dir", "csv", "--jobs", "1")
+
+    text = (workspace / "csv" / "1.Ass1_A.java.csv").read_text(encoding="utf-8")
+    assert text == (
+        "Code Review Report,Unnamed: 1,Unnamed: 2,Unnamed: 3,Unnamed: 4,Unnamed: 5\n"
+        ",,,,,\n"
+        "Project Code: A.java,,,,,\n"
+        "Reviewer(s):,Reviewer 1,,,,\n"
+        ",,,,,\n"
+        "Check code,Description,Line,Comment,Fix,Reviewer\n"
+        '5,d,12,"a, b",fix,Reviewer 1\n'
+        '7,d,3-4,"multi\nline",,Reviewer 1\n'
+    )
+    # Same as the pandas export the converter replaced
+    expected = pd.read_excel(workspace / "book.xlsx", sheet_name="Ass1_A.java")
+    assert text == expected.to_csv(index=False)
+
+    empty = (workspace / "csv" / "2.Empty.csv").read_text(encoding="utf-8")
+    assert empty == "\n"
@@ -0,0 +1,77 @@
+"""
+Golden-output tests: the LaTeX export, the Markdown preview and the analysis
+summary of the fixture workspace must match the files in tests/golden/.
+
+After an intended change of the output, regenerate the golden files with
+
+    UPDATE_GOLDEN=1 python -m pytest tests/test_golden.py
+
+and review their diff.
+"""
+import csv
+import io
+import os
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+UPDATE = os.environ.get("UPDATE_GOLDEN") == "1"
+
+
+def check_golden(name, outputs):
+    """Compare {relative path: text} with the files under tests/golden/name."""
+    golden = GOLDEN_DIR / name
+    if UPDATE:
+        for path in golden.rglob("*"):
+            if path.is_file():
+                path.unlink()
+        for rel, text in outputs.items():
+            (golden / rel).parent.mkdir(parents=True, exist_ok=True)
+            (golden / rel).write_text(text, encoding="utf-8", newline="")
+    expected = {
+        path.relative_to(golden).as_posix(): path.read_text(encoding="utf-8")
+        for path in golden.rglob("*")
+        if path.is_file()
+    }
+    assert sorted(outputs) == sorted(expected)
+    for rel, text in outputs.items():
+        assert text == expected[rel], f"{name}/{rel} differs from the golden file"
+
+
+def tex_outputs(export_dir):
+    return {
+        path.relative_to(export_dir).as_posix(): path.read_text(encoding="utf-8")
+        for path in sorted(export_dir.rglob("*"))
+        if path.is_file() and path.name != ".export_manifest.json"
+    }
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_latex_export(workspace, acript, jobs):
+    acript("export", "--full", "--jobs", jobs)
+    check_golden("tex", tex_outputs(workspace / "output_tex"))
+
+
+def test_incremental_export_keeps_outputs(workspace, acript):
+    acript("export")
+    first = tex_outputs(workspace / "output_tex")
+    assert "unchanged sheet(s) skipped" in acript("export")
+    assert tex_outputs(workspace / "output_tex") == first
+
+
+def test_markdown_preview(workspace, acript):
+    acript("export", "--preview", "md", "--preview-output", "preview.md")
+    text = (workspace / "preview.md").read_text(encoding="utf-8")
+    check_golden("preview", {"preview.md": text})
+
+
+def test_analysis_summary(workspace, acript):
+    acript("analyze", "--output-mode", "standalone", "--output", "summary.xlsx")
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for ws in load_workbook(workspace / "summary.xlsx", read_only=True):
+        writer.writerow([f"# {ws.title}"])
+        writer.writerows(ws.iter_rows(values_only=True))
+    check_golden("summary", {"summary.csv": out.getvalue()})
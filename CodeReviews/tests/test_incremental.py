@@ -0,0 +1,120 @@
+"""
+Incremental exports: outputs of sheets that disappear, are renamed or stop
+being reports must be removed from output_tex/ and from the lists that
+reference them, and a change of the rendering code must render sheets again.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from conftest import REPO_DIR
+
+REPORTS = ["Ass1_Module0.java", "Ass1_Module1.java", "Ass1_Module2.java"]
+
+
+def edit_workbook(workspace, edit):
+    path = workspace / "CodeReviews.xlsx"
+    wb = load_workbook(path)
+    edit(wb)
+    wb.save(path)
+
+
+def section(sheet_name):
+    return "sections/" + sheet_name.replace(".", "_") + ".tex"
+
+
+def reviews_list(workspace):
+    return (workspace / "output_tex" / "reviews_list.tex").read_text(encoding="utf-8")
+
+
+def test_removed_sheet(workspace, acript):
+    acript("export")
+    assert (workspace / "output_tex" / section(REPORTS[1])).exists()
+
+    edit_workbook(workspace, lambda wb: wb.remove(wb[REPORTS[1]]))
+    out = acript("export")
+
+    assert "Removed" in out
+    assert not (workspace / "output_tex" / section(REPORTS[1])).exists()
+    assert reviews_list(workspace) == (
+        f"\\input{{{section(REPORTS[0])}}}\n\\input{{{section(REPORTS[2])}}}\n"
+    )
+
+
+def test_renamed_sheet(workspace, acript):
+    acript("export")
+
+    def rename(wb):
+        wb[REPORTS[0]].title = "Ass1_Renamed.java"
+
+    edit_workbook(workspace, rename)
+    acript("export")
+
+    assert not (workspace / "output_tex" / section(REPORTS[0])).exists()
+    assert (workspace / "output_tex" / section("Ass1_Renamed.java")).exists()
+    assert section(REPORTS[0]) not in reviews_list(workspace)
+    assert section("Ass1_Renamed.java") in reviews_list(workspace)
+
+
+def test_no_report_left(workspace, acript):
+    acript("export")
+
+    def not_reports(wb):
+        for name in REPORTS:
+            wb[name]["A1"] = "Draft"
+
+    edit_workbook(workspace, not_reports)
+    acript("export")
+
+    assert not list((workspace / "output_tex" / "sections").glob("*.tex"))
+    assert "\\input" not in reviews_list(workspace)
+
+
+def test_include_units_drop_removed_sheet(workspace, acript):
+    acript("export", "--include-units")
+    # As if LaTeX had typeset every unit once
+    for name in REPORTS:
+        path = workspace / "output_tex" / section(name)
+        path.with_suffix(".aux").write_text("\\relax\n", encoding="utf-8")
+
+    edit_workbook(workspace, lambda wb: wb.remove(wb[REPORTS[2]]))
+    acript("export", "--include-units")
+
+    include_only = workspace / "output_tex" / "includeonly.tex"
+    text = include_only.read_text(encoding="utf-8")
+    assert section(REPORTS[2]).removesuffix(".tex") not in text
+    assert section(REPORTS[2]) not in reviews_list(workspace)
+    assert (
+        not (workspace / "output_tex" / section(REPORTS[2]))
+        .with_suffix(".aux")
+        .exists()
+    )
+
+
+def test_exporter_key_covers_render_modules():
+    # Local modules export_reviews loads that do not affect what is rendered
+    not_rendering = {"export_manifest", "profiling", "watch"}
+    script = (
+        "import sys, export_reviews\n"
+        "print(*export_reviews.render_module_files(), sep='\\n')\n"
+        "print('--')\n"
+        "print(*sorted(m.__file__ for m in list(sys.modules.values())"
+        " if getattr(m, '__file__', None)), sep='\\n')\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    keyed, loaded = out.split("--\n")
+    local = {
+        Path(f).resolve()
+        for f in loaded.split()
+        if Path(f).parent.resolve() == REPO_DIR
+    }
+    keyed = {Path(f) for f in keyed.split()}
+    assert {f for f in local if f.stem not in not_rendering} <= keyed
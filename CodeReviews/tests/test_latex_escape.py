@@ -0,0 +1,146 @@
+"""
+latex_escape.sanitize_latex and sanitize_latex_column must give exactly the
+output of the original character-by-character sanitize_latex of
+export_reviews.py, kept below as the reference.
+"""
+import math
+import random
+import re
+
+import pandas as pd
+import pytest
+
+import latex_escape
+from latex_escape import sanitize_latex, sanitize_latex_column
+
+
+def reference_sanitize_latex(text):
+    """sanitize_latex as it was before latex_escape.py (baseline commit)."""
+    if text is None or (isinstance(text, float) and pd.isna(text)):
+        return ""
+
+    s = str(text).replace("\r\n", " ").replace("\r", " ").replace("\n", " ").strip()
+
+    escape_map = {
+        "\\": r"\textbackslash{}",
+        "&": r"\&",
+        "%": r"\%",
+        "$": r"\$",
+        "#": r"\#",
+        "{": r"\{",
+        "}": r"\}",
+        "~": r"\textasciitilde{}",
+        "^": r"\textasciicircum{}",
+        "|": r"\textbar{}",
+    }
+    breakable_punct = ".,/:-_"
+
+    out_parts = []
+    for i, ch in enumerate(s):
+        next_ch = s[i + 1] if i + 1 < len(s) else ""
+        if ch in escape_map:
+            out_parts.append(escape_map[ch])
+            continue
+        if ch in breakable_punct and next_ch and next_ch != " ":
+            if ch == "_":
+                out_parts.append(r"\_\allowbreak{}")
+            else:
+                out_parts.append(f"{ch}\\allowbreak{{}}")
+            continue
+        out_parts.append(ch)
+
+    return re.sub(r"\s+", " ", "".join(out_parts)).strip()
+
+
+SPECIALS = "\\&%$#{}~^|"
+
+CASES = [
+    None,
+    float("nan"),
+    math.nan,
+    "",
+    "   ",
+    0,
+    12.0,
+    3.5,
+    True,
+    SPECIALS,
+    " ".join(SPECIALS),
+    "obj.method() and a_b_c, 1,2,3; x:y / a/b - c-d",
+    "__..,,;;::__//--",
+    "_ . , ; : / -",
+    "end.",
+    "end_",
+    "a_ b. c, d; e: f/ g- h",
+    "a  \t  b\r\n\r\nc\n\nd\re",
+    "  leading and trailing  \n",
+    "tab\tafter_\tand.\tend",
+    "Biến `tên_người_dùng` chưa được khởi tạo; sửa: dùng Optional<String>.",
+    "Đặt tên hằng số theo kiểu UPPER_CASE, ví dụ MAX_SIZE = 100%",
+    "a \x00 b",
+    " \x00 ",
+    "x \x00 y.z \x00 w_v",
+    "\x00",
+    "pre\x00post",
+]
+
+ALPHABET = SPECIALS + "_.,;:/-" + " \t\r\n\x00" + "abcXYZ019" + "ăâđêôơưàảãáạĐẾỒ"
+
+
+def random_strings(n, seed=0):
+    rng = random.Random(seed)
+    strings = []
+    for _ in range(n):
+        s = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 24)))
+        if rng.random() < 0.2:
+            s = f"{s} \x00 {s}"  # the batch separator inside a value
+        strings.append(s)
+    return strings
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    latex_escape._cache.clear()
+    yield
+    latex_escape._cache.clear()
+
+
+@pytest.mark.parametrize("value", CASES, ids=repr)
+def test_sanitize_latex_matches_reference(value):
+    assert sanitize_latex(value) == reference_sanitize_latex(value)
+
+
+def test_sanitize_latex_matches_reference_randomized():
+    for s in random_strings(5000):
+        assert sanitize_latex(s) == reference_sanitize_latex(s), repr(s)
+
+
+def test_column_matches_reference():
+    values = CASES + CASES[::-1]  # repeated values are served from the memo
+    assert sanitize_latex_column(values) == [
+        reference_sanitize_latex(v) for v in values
+    ]
+
+
+def test_column_matches_reference_randomized():
+    strings = random_strings(5000, seed=1)
+    for start in range(0, len(strings), 250):
+        chunk = strings[start : start + 250]
+        assert sanitize_latex_column(chunk) == [
+            reference_sanitize_latex(s) for s in chunk
+        ]
+
+
+def test_column_without_separator_in_values():
+    # Only the joined single-pass path, no fallback for "\x00"
+    strings = [s.replace("\x00", "") for s in random_strings(2000, seed=2)]
+    assert sanitize_latex_column(strings) == [
+        reference_sanitize_latex(s) for s in strings
+    ]
+
+
+def test_column_accepts_series():
+    series = pd.Series(["a_b", None, float("nan"), "x & y", "a_b"], dtype=object)
+    assert sanitize_latex_column(series) == [
+        reference_sanitize_latex(v) for v in series
+    ]
@@ -0,0 +1,45 @@
+"""
+Redactor: every configured original must be replaced, in exactly the
+spelling it was configured in, also with ignore_case and streamed input.
+"""
+import io
+
+import pytest
+
+from redaction import Redactor
+
+
+@pytest.mark.parametrize(
+    "original, text, expected",
+    [
+        ("Straße", "Straße STRASSE STRAßE straße", "X STRASSE X X"),
+        ("İstanbul", "İstanbul İSTANBUL", "X X"),
+        ("ΟΔΟΣ", "ΟΔΟΣ οδος οδοσ", "X X X"),
+        ("Nguyễn Văn An", "NGUYỄN VĂN AN, nguyễn văn an", "X, X"),
+        ("Ferroſ", "Ferroſ FERROS ferros", "X X X"),
+    ],
+)
+def test_ignore_case_non_ascii(original, text, expected):
+    redactor = Redactor([(original, "X")], ignore_case=True)
+    assert redactor.redact(text) == expected
+    out = io.StringIO()
+    redactor.redact_stream(io.StringIO(text), out, chunk_size=3)
+    assert out.getvalue() == expected
+
+
+def test_case_sensitive_by_default():
+    redactor = Redactor([("Straße", "X"), ("An", "Y")])
+    assert redactor.redact("Straße straße An an") == "X straße Y an"
+
+
+def test_longest_original_wins():
+    redactor = Redactor([("An", "Y"), ("Văn An", "X")], ignore_case=True)
+    assert redactor.redact("văn an / AN") == "X / Y"
+
+
+def test_cached_redactor_matches(tmp_path):
+    csv_path = tmp_path / "redactions.csv"
+    csv_path.write_text("Straße,X\nİstanbul,Y\n", encoding="utf-8")
+    for _ in range(2):  # built, then loaded from the cache
+        redactor = Redactor.from_csv(csv_path, ignore_case=True, cache_dir=tmp_path)
+        assert redactor.redact("STRAßE İstanbul") == "X Y"
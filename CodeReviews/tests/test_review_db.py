@@ -0,0 +1,50 @@
+"""
+The review database (`acript db`): exports and analysis read from it match
+the golden output of the workbook, and bad databases fail with one line.
+"""
+import sqlite3
+import subprocess
+import sys
+
+from conftest import REPO_DIR
+from test_golden import check_golden, tex_outputs
+
+
+def test_export_from_db_matches_workbook(workspace, acript):
+    acript("db", "--db", "reviews.db", "ingest")
+    acript("export", "--full", "--from-db", "reviews.db")
+    check_golden("tex", tex_outputs(workspace / "output_tex"))
+
+
+def test_sql_is_read_only(workspace, acript):
+    acript("db", "--db", "reviews.db", "ingest")
+    out = acript("db", "--db", "reviews.db", "sql", "SELECT count(*) AS n FROM sheets")
+    assert "n" in out
+    result = subprocess.run(
+        [sys.executable, str(REPO_DIR / "main.py"), "db", "--db", "reviews.db"]
+        + ["sql", "DELETE FROM findings"],
+        cwd=workspace,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 2
+    assert "readonly" in result.stderr
+
+
+def test_analysis_reports_bad_database(workspace):
+    (workspace / "corrupt.db").write_bytes(b"not a database" * 100)
+    old = workspace / "old.db"
+    with sqlite3.connect(old) as conn:
+        conn.execute("PRAGMA user_version = 99")
+    conn.close()
+    for db in ("corrupt.db", "old.db"):
+        result = subprocess.run(
+            [sys.executable, str(REPO_DIR / "main.py"), "analyze", "--from-db", db],
+            cwd=workspace,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+        )
+        assert result.returncode == 0
+        assert "Traceback" not in result.stderr
+        assert result.stdout.strip().startswith("Lỗi:")
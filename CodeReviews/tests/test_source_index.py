@@ -0,0 +1,54 @@
+import hashlib
+
+import source_index
+from source_index import SourceIndex, cited_lines, parse_line_spec
+
+
+def test_comma_separated_lines_stay_separate():
+    assert parse_line_spec("12, 14") == (12, 14)
+    assert 13 not in cited_lines("12, 14")
+    assert set(cited_lines("12, 14")) == {12, 14}
+    assert list(cited_lines("41-45")) == [41, 42, 43, 44, 45]
+    assert list(cited_lines(7.0)) == [7]
+    assert not cited_lines("n/a")
+
+
+def test_snippet_bolds_listed_lines_only(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "A.java").write_text("".join(f"l{n}\n" for n in range(1, 21)))
+    index = SourceIndex(tmp_path / "src", cache_dir=tmp_path / "cache")
+    lines = index.snippet("A.java", 12, 14, 1, cited_lines("12, 14"))
+    assert [(n, cited) for n, _, cited in lines] == [
+        (11, False),
+        (12, True),
+        (13, False),
+        (14, True),
+        (15, False),
+    ]
+
+
+def test_fingerprints_only_hash_changed_files(tmp_path, monkeypatch):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "A.java").write_text("class A {}\n")
+    (src / "B.java").write_text("class B {}\n")
+    cache = tmp_path / "cache"
+    first = SourceIndex(src, cache_dir=cache).fingerprints()
+
+    hashed = []
+    real_sha256 = hashlib.sha256
+
+    def sha256(data=b""):
+        hashed.append(data)
+        return real_sha256(data)
+
+    monkeypatch.setattr(source_index.hashlib, "sha256", sha256)
+    assert SourceIndex(src, cache_dir=cache).fingerprints() == first
+    assert len(hashed) == 1  # the root key of the digests file
+
+    (src / "B.java").write_text("class B { int x; }\n")
+    hashed.clear()
+    changed = dict(SourceIndex(src, cache_dir=cache).fingerprints())
+    assert changed["A.java"] == dict(first)["A.java"]
+    assert changed["B.java"] == real_sha256(b"class B { int x; }\n").hexdigest()
+    assert b"class B { int x; }\n" in hashed and b"class A {}\n" not in hashed
@@ -0,0 +1,57 @@
+"""
+watch.py
+
+Polling file watcher used by export_reviews.py --watch.
+
+Files are compared by (mtime_ns, size) signatures, which costs one stat() per
+file and works the same on every platform and on network drives, where
+change notifications are unreliable. A burst of writes (Excel saves through a
+temporary file, a rename and a lock file) is reported once, after the
+watched files have stayed unchanged for `debounce` seconds.
+"""
+import os
+import time
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def snapshot(paths):
+    """{path as str: file_signature} for every path."""
+    return {str(path): file_signature(path) for path in paths}
+
+
+def changed_paths(old, new):
+    """Sorted paths added, removed or modified between two snapshots."""
+    return sorted(p for p in old.keys() | new.keys() if old.get(p) != new.get(p))
+
+
+def wait_for_change(take_snapshot, previous, interval=0.2, debounce=0.3):
+    """
+    Poll take_snapshot() every `interval` seconds until it differs from
+    previous, then until it has not changed for `debounce` seconds.
+    Returns (new snapshot, changed paths). Changes that are undone within
+    the debounce window are ignored.
+    """
+    while True:
+        time.sleep(interval)
+        current = take_snapshot()
+        if current == previous:
+            continue
+
+        settled = time.monotonic()
+        while time.monotonic() - settled < debounce:
+            time.sleep(min(interval, debounce))
+            latest = take_snapshot()
+            if latest != current:
+                current, settled = latest, time.monotonic()
+
+        changed = changed_paths(previous, current)
+        if changed:
+            return current, changed
@@ -0,0 +1,176 @@
+"""
+workbook_reader.py
+
+Streaming reader for the review workbook, built on openpyxl read-only mode.
+
+Rows are yielded as tuples of cell values, converted the same way
+pandas.read_excel(header=None, dtype=object) would convert them (empty cells
+and pandas' default NA strings become None, integral floats become int), so
+the exporters produce the same output as with a full DataFrame parse.
+
+A report sheet is recognised from A1 alone and rows are only read up to the
+end of the sheet that is actually needed, so sheets that are not reports cost
+one row and memory stays flat with workbook size.
+
+openpyxl is only imported by open_workbook(), so callers that never open a
+workbook (split_report on cached rows) do not pay for the import.
+"""
+
+REPORT_TITLE = "Code Review Report"
+HEADER_CELL = "Check code"
+
+# Excel error values, as in openpyxl.cell.cell.ERROR_CODES
+ERROR_CODES = (
+    "#NULL!",
+    "#DIV/0!",
+    "#VALUE!",
+    "#REF!",
+    "#NAME?",
+    "#NUM!",
+    "#N/A",
+)
+
+# Strings pandas reads as NaN by default, plus Excel error values
+NA_VALUES = frozenset(
+    {
+        "",
+        "#N/A",
+        "#N/A N/A",
+        "#NA",
+        "-1.#IND",
+        "-1.#QNAN",
+        "-NaN",
+        "-nan",
+        "1.#IND",
+        "1.#QNAN",
+        "<NA>",
+        "N/A",
+        "NA",
+        "NULL",
+        "NaN",
+        "None",
+        "n/a",
+        "nan",
+        "null",
+    }
+).union(ERROR_CODES)
+
+
+def convert_value(value):
+    """Convert a raw openpyxl cell value; missing values become None."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return None if value in NA_VALUES else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_rows(ws):
+    """Yield the rows of a worksheet as tuples, without trailing empty cells."""
+    # Dimensions stored in the file may be stale; let openpyxl discover them
+    ws.reset_dimensions()
+    for raw in ws.iter_rows(values_only=True):
+        row = [convert_value(v) for v in raw]
+        while row and row[-1] is None:
+            row.pop()
+        yield tuple(row)
+
+
+def is_report(row):
+    """True if the first row (A1) marks a Code Review Report sheet."""
+    return bool(row) and isinstance(row[0], str) and REPORT_TITLE in row[0]
+
+
+def is_header_row(row):
+    """True for the 'Check code' row that starts the review table."""
+    return bool(row) and isinstance(row[0], str) and row[0].strip() == HEADER_CELL
+
+
+def is_empty_row(row):
+    return all(v is None for v in row)
+
+
+def split_report(rows):
+    """
+    Split the rows of a sheet into (meta_rows, table_rows).
+    Returns None if the sheet is not a report. table_rows is None when the
+    'Check code' header is missing; otherwise it holds the non-empty rows
+    after the header.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None or not is_report(first):
+        return None
+
+    meta_rows = [first]
+    for row in rows:
+        if is_header_row(row):
+            break
+        meta_rows.append(row)
+    else:
+        return meta_rows, None
+
+    table_rows = [row for row in rows if not is_empty_row(row)]
+    return meta_rows, table_rows
+
+
+def extract_metadata(rows):
+    """
+    Extract metadata as ordered pairs for a LaTeX tabular layout.
+    Handles:
+      - Multi-row metadata entries (continuation rows with blank key)
+      - Tabs correctly (each tab -> new cell)
+      - Appends ':' if missing in key
+      - Replaces empty values with '---'
+      - Joins multiple values on the same row with ' - '
+    Takes the metadata rows (tuples of cell values, None for empty cells).
+    Returns: list of tuples (key, [values])
+    """
+    metadata = []
+    current_key = None
+    current_values = []
+
+    for row in rows:
+        # Normalize each cell (strip, replace None with "")
+        cells = [str(x).strip() if x is not None else "" for x in row]
+        if not any(cells):
+            continue
+
+        key = cells[0].strip()
+        # join multiple filled cells (same row) with " - "
+        joined_value = " - ".join(v for v in cells[1:] if v).strip()
+        if not joined_value:
+            joined_value = "---"
+
+        if key:  # new key starts
+            if current_key:
+                metadata.append((current_key, current_values))
+            if not key.endswith(":"):
+                key += ":"
+            current_key = key
+            current_values = [joined_value]
+        elif current_key:  # continuation line (same metadata)
+            current_values.append(joined_value)
+
+    if current_key:
+        metadata.append((current_key, current_values))
+
+    return metadata
+
+
+def open_workbook(path):
+    """Open a workbook in read-only mode. Call .close() when done."""
+    from openpyxl import load_workbook
+
+    return load_workbook(path, read_only=True, data_only=True, keep_links=False)
+
+
+def iter_sheets(wb):
+    """Yield (sheet_name, rows) for every worksheet, in workbook order."""
+    for name in wb.sheetnames:
+        ws = wb[name]
+        if not hasattr(ws, "iter_rows"):  # chartsheets have no cells
+            continue
+        yield name, iter_rows(ws)
@@ -0,0 +1,212 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from csv_to_excel import CHUNK_ROWS, combine_csv_files, find_csv_files
+from excel_to_csv import export_workbook
+
+# --- Configuration ---
+OUTPUT_DIR = "out"
+# --- End Configuration ---
+
+
+def _walk(input_root, skip_dir):
+    """
+    (directory, file names) for every directory under input_root, in sorted
+    order. Hidden directories and skip_dir (the output tree) are not entered.
+    """
+    skip_dir = os.path.abspath(skip_dir)
+    for dirpath, dirnames, filenames in os.walk(input_root):
+        dirnames[:] = sorted(
+            d
+            for d in dirnames
+            if not d.startswith(".")
+            and os.path.abspath(os.path.join(dirpath, d)) != skip_dir
+        )
+        yield dirpath, sorted(filenames)
+
+
+def find_workbook_jobs(input_root, output_root):
+    """
+    (workbook, output directory) for every .xlsx file under input_root. The
+    CSV files of a/b/Team1.xlsx go to output_root/a/b/Team1/.
+    """
+    jobs = []
+    for dirpath, filenames in _walk(input_root, output_root):
+        rel_dir = os.path.relpath(dirpath, input_root)
+        for filename in filenames:
+            # Skip Excel's ~$ lock files
+            if filename.endswith(".xlsx") and not filename.startswith("~$"):
+                stem = filename[: -len(".xlsx")]
+                jobs.append(
+                    (
+                        os.path.join(dirpath, filename),
+                        os.path.normpath(os.path.join(output_root, rel_dir, stem)),
+                    )
+                )
+    return jobs
+
+
+def find_bundle_jobs(input_root, output_root):
+    """
+    (CSV bundle directory, output workbook) for every directory under
+    input_root that directly contains .csv files. The bundle a/b/Team1/ is
+    combined into output_root/a/b/Team1.xlsx.
+    """
+    jobs = []
+    for dirpath, filenames in _walk(input_root, output_root):
+        if not any(filename.endswith(".csv") for filename in filenames):
+            continue
+        rel_dir = os.path.relpath(dirpath, input_root)
+        if rel_dir == ".":
+            rel_dir = os.path.basename(os.path.abspath(input_root))
+        jobs.append(
+            (dirpath, os.path.normpath(os.path.join(output_root, rel_dir + ".xlsx")))
+        )
+    return jobs
+
+
+def _quiet(*args, **kwargs):
+    pass
+
+
+def workbook_job(input_file, output_dir, raw_header=False):
+    """Convert one workbook to CSV files; a failed sheet fails the job."""
+    sheets, rows, failed = export_workbook(
+        input_file, output_dir, 1, raw_header, log=_quiet
+    )
+    if failed:
+        raise RuntimeError(f"{len(failed)} sheet(s) failed: {', '.join(failed)}")
+    return f"{sheets} sheets, {rows} rows"
+
+
+def bundle_job(input_dir, output_file, chunk_rows=CHUNK_ROWS, raw_header=False):
+    """Combine the CSV files of one directory into a workbook."""
+    sheets, rows = combine_csv_files(
+        find_csv_files(input_dir), output_file, chunk_rows, raw_header, log=_quiet
+    )
+    return f"{sheets} sheets, {rows} rows"
+
+
+def run_job(func, *args):
+    """
+    Run one job and return (seconds, detail, error). Exceptions are returned
+    as text instead of raised, so a failing job never aborts the others.
+    """
+    start = time.perf_counter()
+    try:
+        detail, error = func(*args), None
+    except Exception as e:
+        detail, error = None, f"{type(e).__name__}: {e}"
+    return time.perf_counter() - start, detail, error
+
+
+def run_batch(func, jobs, options=(), workers=1):
+    """
+    Run func(input, output, *options) for every (input, output) job and yield
+    (input, output, seconds, detail, error) in completion order. With
+    workers > 1 jobs are fanned out to a process pool.
+    """
+    if workers <= 1 or len(jobs) < 2:
+        for source, target in jobs:
+            yield source, target, *run_job(func, source, target, *options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_job, func, source, target, *options): (source, target)
+            for source, target in jobs
+        }
+        for future in as_completed(futures):
+            source, target = futures[future]
+            try:
+                yield source, target, *future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                yield source, target, 0.0, None, f"{type(e).__name__}: {e}"
+
+
+def print_summary(results, elapsed):
+    """Per-job table of timings and failures, in input order."""
+    failures = [r for r in results if r[4] is not None]
+    print(f"\n{'Status':<7} {'Time':>8}  Job")
+    for source, target, seconds, detail, error in sorted(results):
+        status = "FAILED" if error else "ok"
+        print(f"{status:<7} {seconds:>7.2f}s  {source} -> {target}")
+        print(f"{'':<18}{error or detail}")
+
+    print(
+        f"\n{len(results) - len(failures)}/{len(results)} job(s) succeeded "
+        f"in {elapsed:.2f}s."
+    )
+    for source, _, _, _, error in sorted(failures):
+        print(f"   ❌ {source}: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert every workbook (to-csv) or every CSV bundle "
+        "(to-excel) under a directory tree, mirroring it in the output directory."
+    )
+    parser.add_argument(
+        "mode",
+        choices=["to-csv", "to-excel"],
+        help="to-csv: each .xlsx becomes a directory of CSV files; "
+        "to-excel: each directory of CSV files becomes a .xlsx",
+    )
+    parser.add_argument("input_root", help="directory tree to convert")
+    parser.add_argument(
+        "--output-root", "-o", default=OUTPUT_DIR, help="root of the mirrored output"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=0,
+        metavar="N",
+        help="number of worker processes (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=CHUNK_ROWS,
+        metavar="N",
+        help="rows read at a time from each CSV (to-excel)",
+    )
+    parser.add_argument(
+        "--raw-header",
+        action="store_true",
+        help="keep header rows as they are instead of pandas-style column names",
+    )
+    args = parser.parse_args(argv)
+
+    if args.mode == "to-csv":
+        jobs = find_workbook_jobs(args.input_root, args.output_root)
+        func, options = workbook_job, (args.raw_header,)
+    else:
+        jobs = find_bundle_jobs(args.input_root, args.output_root)
+        func, options = bundle_job, (args.chunk_rows, args.raw_header)
+
+    if not jobs:
+        print(f"❌ Error: Nothing to convert under '{args.input_root}'.")
+        raise SystemExit(1)
+
+    workers = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    print(f"--- Batch {args.mode}: {len(jobs)} job(s), {workers} worker(s) ---")
+
+    start = time.perf_counter()
+    results = []
+    for result in run_batch(func, jobs, options, workers):
+        results.append(result)
+        source, _, seconds, _, error = result
+        print(f"   {'❌' if error else '->'} {source} ({seconds:.2f}s)")
+    print_summary(results, time.perf_counter() - start)
+
+    if any(error for *_, error in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,48 @@
-import pandas as pd
-import os
+import argparse
+import csv
 import glob
+import os
 import re
+import time
+from itertools import islice
+
+from excel_to_csv import pandas_header
 
 # --- Configuration ---
 OUTPUT_DIR = "out"
 OUTPUT_FILENAME = "Combined_Workbook.xlsx"
+CHUNK_ROWS = 10_000  # Rows read and converted at a time
 # --- End Configuration ---
 
+_INT_RE = re.compile(r"[+-]?\d+")
+_FLOAT_RE = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?")
+_BOOLS = {"True": True, "TRUE": True, "true": True}
+_BOOLS.update({"False": False, "FALSE": False, "false": False})
+# pandas.read_csv's default na_values: these fields become empty cells
+NA_VALUES = frozenset(
+    [
+        "",
+        "#N/A",
+        "#N/A N/A",
+        "#NA",
+        "-1.#IND",
+        "-1.#QNAN",
+        "-NaN",
+        "-nan",
+        "1.#IND",
+        "1.#QNAN",
+        "<NA>",
+        "N/A",
+        "NA",
+        "NULL",
+        "NaN",
+        "None",
+        "n/a",
+        "nan",
+        "null",
+    ]
+)
+
 
 def natural_sort_key(s):
     """
@@ -20,71 +55,244 @@ def natural_sort_key(s):
     ]
 
 
-def csv_to_excel():
+def sheet_name_for(filepath):
     """
-    Finds all CSV files in the current directory, sorts them numerically by the
-    leading index, and combines them into a single Excel file in the 'out/' directory.
+    Infer the sheet name from the filename.
+    E.g., from '01.My Sheet.csv' -> 'My Sheet'
     """
-    print("--- Starting CSV to Excel Import ---")
+    filename = os.path.basename(filepath)
 
-    # 1. Find and sort CSV files
-    csv_files = glob.glob("*.csv")
-    if not csv_files:
-        print("❌ Error: No .csv files found in the current directory.")
-        return
+    # Use regex to strip the leading index and the .csv extension
+    match = re.match(r"^\d+\.(.*)\.csv$", filename)
+    if match:
+        sheet_name = match.group(1).strip()
+    else:
+        # Fallback for files without a leading index
+        sheet_name = filename.replace(".csv", "").strip()
+
+    # Excel limits sheet names to 31 characters
+    return sheet_name[:31]
+
+
+def _widen(column_type, value):
+    """
+    Type of a column of column_type (None: no value yet) once it also holds
+    value: int, then float, or bool, and str as soon as they are mixed.
+    """
+    if column_type in (None, int) and _INT_RE.fullmatch(value):
+        return int
+    if column_type in (None, int, float) and _FLOAT_RE.fullmatch(value):
+        return float
+    if column_type in (None, bool) and value in _BOOLS:
+        return bool
+    return str
+
+
+def infer_schema(rows):
+    """
+    Column types of rows (an iterable, read once), inferred from every
+    non-NA value like pandas does for a whole column: int, float, bool or
+    str.
+    """
+    schema = []
+    for row in rows:
+        if len(row) > len(schema):
+            schema += [None] * (len(row) - len(schema))
+        for i, value in enumerate(row):
+            if schema[i] is not str and value not in NA_VALUES:
+                schema[i] = _widen(schema[i], value)
+    return [column_type or str for column_type in schema]
+
+
+def _converter(column_type):
+    if column_type is bool:
+        return _BOOLS.__getitem__
+    if column_type is str:
+        return None
+    return column_type
+
+
+def convert_rows(rows, schema):
+    """
+    Convert a chunk of CSV rows with the sheet's schema. Empty and NA fields
+    (NA_VALUES) become empty cells; values that do not fit their column type
+    are kept as text.
+    """
+    converters = [_converter(t) for t in schema]
+    n = len(converters)
+    for row in rows:
+        out = []
+        for i, value in enumerate(row):
+            if value in NA_VALUES:
+                out.append(None)
+                continue
+            convert = converters[i] if i < n else None
+            if convert is not None:
+                try:
+                    value = convert(value)
+                except (ValueError, KeyError):
+                    pass
+            out.append(value)
+        yield out
 
+
+def append_csv(ws, filepath, chunk_rows=CHUNK_ROWS, raw_header=False):
+    """
+    Stream a CSV file into the write-only worksheet ws, chunk_rows rows at a
+    time. The column types are inferred from the whole file first, in a
+    separate pass that only reads the CSV, so that every chunk is converted
+    with the same schema. Returns the number of data rows.
+    """
+    with open(filepath, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        schema = infer_schema(reader)
+
+    rows_written = 0
+    with open(filepath, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return 0
+        if not raw_header:
+            header = pandas_header(header)
+        ws.append(header)
+
+        while chunk := list(islice(reader, chunk_rows)):
+            for row in convert_rows(chunk, schema):
+                ws.append(row)
+            rows_written += len(chunk)
+    return rows_written
+
+
+def find_csv_files(input_dir):
+    """CSV files directly in input_dir, in natural order of their names."""
+    csv_files = glob.glob(os.path.join(glob.escape(input_dir), "*.csv"))
     # Sort files using the natural_sort_key to respect the index order (01, 02, 10...)
-    csv_files.sort(key=natural_sort_key)
-    print(f"✅ Found and ordered {len(csv_files)} CSV files.")
+    csv_files.sort(key=lambda path: natural_sort_key(os.path.basename(path)))
+    return csv_files
 
-    # 2. Prepare environment and Excel writer
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    output_filepath = os.path.join(OUTPUT_DIR, OUTPUT_FILENAME)
 
-    # Initialize the Excel writer engine
-    writer = pd.ExcelWriter(output_filepath, engine="openpyxl")
+def combine_csv_files(
+    csv_files, output_filepath, chunk_rows=CHUNK_ROWS, raw_header=False, log=print
+):
+    """
+    Stream csv_files, in order, into one workbook at output_filepath. Each CSV
+    becomes a write-only worksheet filled chunk by chunk, so memory does not
+    grow with the size or number of the CSV files. Progress goes to log.
+    Returns (sheets, rows). The workbook is saved to a temporary file next to
+    output_filepath, which only replaces it once complete: on error an
+    existing output is left untouched and the exception re-raised.
+    """
+    from openpyxl import Workbook  # not needed for --help
 
-    print(f"Combining files into: {output_filepath}")
+    output_dir = os.path.dirname(output_filepath) or "."
+    os.makedirs(output_dir, exist_ok=True)
+    wb = Workbook(write_only=True)
+    total_rows = 0
+    tmp_path = os.path.join(
+        output_dir, f".{os.path.basename(output_filepath)}.{os.getpid()}.tmp"
+    )
 
     try:
-        # 3. Read and write each CSV as a sheet
-        for i, filepath in enumerate(csv_files):
-            # Infer the sheet name from the filename
-            # E.g., from '01.My Sheet.csv' -> 'My Sheet'
-            filename = os.path.basename(filepath)
+        # Stream each CSV into its own sheet
+        for filepath in csv_files:
+            sheet_name = sheet_name_for(filepath)
+            ws = wb.create_sheet(sheet_name)
 
-            # Use regex to strip the leading index and the .csv extension
-            match = re.match(r"^\d+\.(.*)\.csv$", filename)
-            if match:
-                sheet_name = match.group(1).strip()
-            else:
-                # Fallback for files without a leading index
-                sheet_name = filename.replace(".csv", "").strip()
+            sheet_start = time.perf_counter()
+            rows = append_csv(ws, filepath, chunk_rows, raw_header)
+            seconds = time.perf_counter() - sheet_start
+            total_rows += rows
+            megabytes = os.path.getsize(filepath) / 1e6
+            rate = rows / seconds if seconds else 0
+            log(
+                f"   -> Wrote '{os.path.basename(filepath)}' as sheet '{ws.title}' "
+                f"({rows} rows, {seconds:.2f}s, {rate:,.0f} rows/s, "
+                f"{megabytes / seconds if seconds else 0:.1f} MB/s)"
+            )
 
-            # Pandas limits sheet names to 31 characters
-            sheet_name = sheet_name[:31]
+        # Save the combined workbook
+        wb.save(tmp_path)
+        os.replace(tmp_path, output_filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
-            # Read the CSV file
-            df = pd.read_csv(filepath, encoding="utf-8")
+    return len(csv_files), total_rows
 
-            # Write to the Excel writer object
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
 
-            print(f"   -> Writing '{filename}' as sheet '{sheet_name}'")
+def csv_to_excel(
+    input_dir=".",
+    output_filepath=None,
+    chunk_rows=CHUNK_ROWS,
+    raw_header=False,
+):
+    """
+    Finds all CSV files in input_dir, sorts them numerically by the leading
+    index, and streams them into a single Excel file (by default in the 'out/'
+    directory).
+    """
+    print("--- Starting CSV to Excel Import ---")
 
-        # 4. Save the combined workbook
-        writer.close()
+    # 1. Find and sort CSV files
+    csv_files = find_csv_files(input_dir)
+    if not csv_files:
+        print(f"❌ Error: No .csv files found in '{input_dir}'.")
+        return
+    print(f"✅ Found and ordered {len(csv_files)} CSV files.")
 
-        print(f"\n✨ Import Complete! Combined workbook saved to '{output_filepath}'.")
+    # 2. Combine them
+    if output_filepath is None:
+        output_filepath = os.path.join(OUTPUT_DIR, OUTPUT_FILENAME)
+    print(f"Combining files into: {output_filepath}")
+    start = time.perf_counter()
 
+    try:
+        combine_csv_files(csv_files, output_filepath, chunk_rows, raw_header)
     except Exception as e:
         print(f"❌ An error occurred during processing: {e}")
-        writer.close()  # Ensure writer is closed even on error
-        # Attempt to delete partial file if error occurred
-        if os.path.exists(output_filepath):
-            os.remove(output_filepath)
+        return
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"\n✨ Import Complete! Combined workbook saved to '{output_filepath}' "
+        f"({elapsed:.2f}s)."
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Combine indexed CSV files into a single Excel workbook."
+    )
+    parser.add_argument(
+        "input_dir",
+        nargs="?",
+        default=".",
+        help="directory containing the CSV files (default: current directory)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help=f"workbook to write (default: {OUTPUT_DIR}/{OUTPUT_FILENAME})",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=CHUNK_ROWS,
+        metavar="N",
+        help="rows read and converted at a time",
+    )
+    parser.add_argument(
+        "--raw-header",
+        action="store_true",
+        help="write the first row as it is instead of pandas-style column names",
+    )
+    args = parser.parse_args(argv)
+    csv_to_excel(args.input_dir, args.output, args.chunk_rows, args.raw_header)
 
 
 if __name__ == "__main__":
-    # Ensure pandas and openpyxl are installed: pip install pandas openpyxl
-    csv_to_excel()
+    # Ensure openpyxl is installed: pip install openpyxl
+    main()
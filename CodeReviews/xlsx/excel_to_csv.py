@@ -1,64 +1,275 @@
-import pandas as pd
-import os
+import argparse
+import csv
 import glob
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # --- Configuration ---
 OUTPUT_DIR = "out"
+WRITE_BUFFER = 1 << 20  # Bytes buffered per CSV file before hitting the disk
+SPOOL_SIZE = 8 << 20  # Bytes of converted rows kept in memory, then spilled to disk
 # --- End Configuration ---
 
+# Workbook opened (read-only) once per worker process by open_workbook()
+_workbook = None
+
 
-def excel_to_csv():
+def open_workbook(input_file):
     """
-    Finds the first .xlsx or .xls file in the current directory and exports
-    each sheet to a separate, indexed CSV file in the 'out/' directory.
+    Open input_file in read-only mode for the sheet conversions of this
+    process. Read-only worksheets are streamed from the zip on demand, so only
+    the row being converted is held in memory.
     """
-    # 1. Prepare environment
-    print("--- Starting Excel to CSV Export ---")
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    from openpyxl import load_workbook  # not needed for --help
+
+    global _workbook
+    _workbook = load_workbook(
+        input_file, read_only=True, data_only=True, keep_links=False
+    )
+
+
+def csv_filename(index, sheet_name, padding):
+    """Indexed CSV name for a sheet, e.g. 01.Sheet Name.csv"""
+    # Replace characters that might be invalid in file paths
+    safe_sheet_name = sheet_name.replace("/", "_").replace("\\", "_")
+    return f"{str(index).zfill(padding)}.{safe_sheet_name}.csv"
+
+
+def convert_cell(value):
+    """Cell value as written to the CSV (integral floats without '.0')."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def pandas_header(values):
+    """
+    Column names the way pandas.read_excel builds them from the header row:
+    empty cells become 'Unnamed: N' and duplicates get a '.1', '.2'... suffix.
+    """
+    names = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value in (None, "") else str(convert_cell(value))
+        base = name
+        while name in seen:
+            seen[base] += 1
+            name = f"{base}.{seen[base]}"
+        seen[name] = 0
+        names.append(name)
+    return names
+
+
+def sheet_to_csv(sheet_name, output_filepath, raw_header=False):
+    """
+    Stream one sheet of the open workbook into a CSV file, row by row.
+    Like pandas, rows are padded to the width of the widest row and trailing
+    empty rows are dropped. The width comes from the data, not from the
+    dimension the sheet declares (write-only workbooks declare none), so rows
+    are first converted into an unpadded CSV spool (in memory up to
+    SPOOL_SIZE, then in a temporary file) and copied to the output padded
+    once the width is known. Unless raw_header is set, the header row is
+    renamed like pandas does ('Unnamed: N' for empty cells, '.N' suffixes
+    for duplicates).
+    Returns (number of data rows written, seconds).
+    """
+    start = time.perf_counter()
+    ws = _workbook[sheet_name]
+    # Do not trust the declared dimension to cut rows short
+    ws.reset_dimensions()
+
+    width = 0
+    rows_spooled = 0
+    with tempfile.SpooledTemporaryFile(
+        SPOOL_SIZE, mode="w+", newline="", encoding="utf-8"
+    ) as spool:
+        writer = csv.writer(spool, lineterminator="\n")
+        pending_blank = 0  # Empty rows are only written if data follows them
+        for row in ws.iter_rows(values_only=True):
+            row = [convert_cell(value) for value in row]
+            while row and row[-1] == "":
+                row.pop()
+            if not row and rows_spooled:  # the header row is always kept
+                pending_blank += 1
+                continue
+            for _ in range(pending_blank):
+                writer.writerow([])
+            rows_spooled += pending_blank + 1
+            pending_blank = 0
+            width = max(width, len(row))
+            writer.writerow(row)
 
-    # Search for the first Excel file
-    excel_files = glob.glob("*.xlsx") + glob.glob("*.xls")
+        spool.seek(0)
+        with open(
+            output_filepath, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER
+        ) as f:
+            writer = csv.writer(f, lineterminator="\n")
+            if not rows_spooled:
+                # Empty sheet, same as pandas: a lone empty line
+                writer.writerow([])
+            for i, row in enumerate(csv.reader(spool)):
+                row += [""] * (width - len(row))
+                if i == 0 and not raw_header:
+                    row = pandas_header(row)
+                writer.writerow(row)
 
-    if not excel_files:
-        print("❌ Error: No .xlsx or .xls file found in the current directory.")
+    return max(rows_spooled - 1, 0), time.perf_counter() - start
+
+
+def convert_sheets(input_file, targets, jobs=1, raw_header=False):
+    """
+    Convert every {sheet_name: output_filepath} of input_file and yield
+    (sheet_name, (rows, seconds) or the exception raised), in completion
+    order. Sequentially, the workbook already opened by open_workbook() is
+    used; with jobs > 1 sheets are fanned out to a process pool whose workers
+    open their own copy.
+    """
+    if jobs <= 1 or len(targets) < 2:
+        for sheet_name, path in targets.items():
+            try:
+                yield sheet_name, sheet_to_csv(sheet_name, path, raw_header)
+            except Exception as e:
+                yield sheet_name, e
         return
 
-    input_file = excel_files[0]
-    print(f"✅ Found Excel file: {input_file}")
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=open_workbook, initargs=(input_file,)
+    ) as pool:
+        futures = {
+            pool.submit(sheet_to_csv, sheet_name, path, raw_header): sheet_name
+            for sheet_name, path in targets.items()
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
 
+
+def export_workbook(input_file, output_dir, jobs=1, raw_header=False, log=print):
+    """
+    Export every worksheet of input_file to indexed CSV files in output_dir,
+    using `jobs` worker processes for the sheets. Progress goes to log.
+    Returns (sheets, rows, failed sheet names). Raises if the workbook cannot
+    be opened; a failing sheet does not stop the others.
+    """
+    open_workbook(input_file)
     try:
-        # Read all sheets from the Excel file
-        # sheet_name=None reads all sheets into a dictionary of DataFrames
-        xls = pd.ExcelFile(input_file)
-        sheet_names = xls.sheet_names
+        os.makedirs(output_dir, exist_ok=True)
+        # Chartsheets have no cells to export
+        sheet_names = [
+            ws.title for ws in _workbook.worksheets if hasattr(ws, "iter_rows")
+        ]
 
         # Determine the number of digits needed for zero-padding (e.g., 01, 02, ..., 10)
         padding = len(str(len(sheet_names)))
+        targets = {
+            sheet_name: os.path.join(output_dir, csv_filename(i, sheet_name, padding))
+            for i, sheet_name in enumerate(sheet_names, 1)
+        }
 
-        print(f"Found {len(sheet_names)} sheets. Exporting...")
+        jobs = max(min(jobs, len(targets)), 1)
+        log(f"Found {len(sheet_names)} sheets. Exporting with {jobs} worker(s)...")
 
-        for i, sheet_name in enumerate(sheet_names, 1):
-            # Read the sheet
-            df = xls.parse(sheet_name)
+        total_rows = 0
+        failed = []
+        for sheet_name, result in convert_sheets(input_file, targets, jobs, raw_header):
+            if isinstance(result, Exception):
+                failed.append(sheet_name)
+                log(f"   ❌ Sheet '{sheet_name}' failed: {result}")
+                continue
+            rows, seconds = result
+            total_rows += rows
+            log(
+                f"   -> Sheet '{sheet_name}' saved as: {targets[sheet_name]} "
+                f"({rows} rows, {seconds:.2f}s)"
+            )
+    finally:
+        _workbook.close()
+    return len(sheet_names), total_rows, failed
 
-            # Create the indexed filename (e.g., 01.Sheet Name.csv)
-            # Replace characters that might be invalid in file paths
-            safe_sheet_name = sheet_name.replace("/", "_").replace("\\", "_")
-            index_prefix = str(i).zfill(padding)
-            output_filename = f"{index_prefix}.{safe_sheet_name}.csv"
-            output_filepath = os.path.join(OUTPUT_DIR, output_filename)
 
-            # Save DataFrame to CSV. Setting index=False prevents writing the pandas row index.
-            df.to_csv(output_filepath, index=False, encoding="utf-8")
-
-            print(f"   -> Sheet '{sheet_name}' saved as: {output_filepath}")
+def excel_to_csv(input_file=None, output_dir=OUTPUT_DIR, jobs=0, raw_header=False):
+    """
+    Export each worksheet of an .xlsx file to a separate, indexed CSV file in
+    output_dir. Without input_file, the .xlsx file in the current directory
+    is used. Sheets are streamed in read-only mode and converted concurrently
+    by `jobs` worker processes (0 = one per CPU).
+    """
+    # 1. Prepare environment
+    print("--- Starting Excel to CSV Export ---")
 
-        print(f"\n✨ Export Complete! All files saved in the '{OUTPUT_DIR}/' folder.")
+    if input_file is None:
+        # Search for the Excel file (skipping Excel's ~$ lock files)
+        excel_files = sorted(
+            f for f in glob.glob("*.xlsx") if not os.path.basename(f).startswith("~$")
+        )
+        if not excel_files:
+            print("❌ Error: No .xlsx file found in the current directory.")
+            return
+        if len(excel_files) > 1:
+            print(
+                f"❌ Error: {len(excel_files)} .xlsx files found in the current "
+                f"directory ({', '.join(excel_files)}). Pass the one to export, "
+                "or convert them all with batch_convert.py."
+            )
+            return
+        input_file = excel_files[0]
+    print(f"✅ Found Excel file: {input_file}")
 
+    start = time.perf_counter()
+    jobs = jobs if jobs > 0 else os.cpu_count() or 1
+    try:
+        _, _, failed = export_workbook(input_file, output_dir, jobs, raw_header)
     except Exception as e:
-        print(f"❌ An error occurred during processing: {e}")
+        print(f"❌ An error occurred while opening '{input_file}': {e}")
+        return
+
+    elapsed = time.perf_counter() - start
+    if failed:
+        print(
+            f"\n⚠️ Export finished with {len(failed)} failed sheet(s) ({elapsed:.2f}s)."
+        )
+    else:
+        print(
+            f"\n✨ Export Complete! All files saved in the '{output_dir}/' folder "
+            f"({elapsed:.2f}s)."
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export every sheet of an Excel workbook to indexed CSV files."
+    )
+    parser.add_argument(
+        "input_file",
+        nargs="?",
+        help="workbook to export (default: the only .xlsx in the current directory)",
+    )
+    parser.add_argument(
+        "--output-dir", "-o", default=OUTPUT_DIR, help="directory for the CSV files"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=0,
+        metavar="N",
+        help="number of worker processes converting sheets (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--raw-header",
+        action="store_true",
+        help="write the first row as it is instead of pandas-style column names",
+    )
+    args = parser.parse_args(argv)
+    excel_to_csv(args.input_file, args.output_dir, args.jobs, args.raw_header)
 
 
 if __name__ == "__main__":
-    # Ensure pandas and openpyxl are installed: pip install pandas openpyxl
-    excel_to_csv()
+    # Ensure openpyxl is installed: pip install openpyxl
+    main()